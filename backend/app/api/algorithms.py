@@ -1,11 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
 from sqlalchemy import func
-import io
-import csv
-from fastapi.responses import StreamingResponse
 
-from app.api.deps import get_db
+from app.api.deps import async_read, get_db, invalidate_response_cache
 from app.models.algorithm import Algorithm
 from app.models.factory import Factory
 from app.models.model import Model
@@ -17,8 +14,13 @@ from app.schemas.algorithm import (
 )
 from app.utils.logger import logger
 from app.utils.resolver import resolve_algorithm_id
+from app.services.blob_gc import release_versions
+from app.services.counters import adjust_model_counts, refresh_algorithm_counts
+from app.services.events import emit
+from app.services.leaderboard import refresh_groups
+from app.services.reports import report_response
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(invalidate_response_cache)])
 
 # ======================================================
 # CREATE ALGORITHM (GLOBAL)
@@ -55,7 +57,6 @@ def create_algorithm(
 
     logger.info(f"Algorithm created: {db_algorithm.name} (ID: {db_algorithm.id})")
 
-    db_algorithm.models_count = 0
     return db_algorithm
 
 
@@ -66,31 +67,20 @@ def create_algorithm(
     "/",
     response_model=list[AlgorithmOut],
 )
+@async_read(response_model=list[AlgorithmOut])
 def list_algorithms(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
-    rows = (
-        db.query(
-            Algorithm,
-            func.count(Model.id).label("models_count"),
-        )
-        .outerjoin(Model, Model.algorithm_id == Algorithm.id)
-        .group_by(Algorithm.id)
+    return (
+        db.query(Algorithm)
         .order_by(Algorithm.created_at.desc())
         .offset(skip)
         .limit(limit)
         .all()
     )
 
-    results = []
-    for algo, count in rows:
-        algo.models_count = count
-        results.append(algo)
-
-    return results
-
 
 # ======================================================
 # GET SINGLE ALGORITHM
@@ -104,22 +94,11 @@ def get_algorithm(
     db: Session = Depends(get_db),
 ):
     algo_id = resolve_algorithm_id(db, algorithm_id)
-    row = (
-        db.query(
-            Algorithm,
-            func.count(Model.id).label("models_count"),
-        )
-        .outerjoin(Model, Model.algorithm_id == Algorithm.id)
-        .filter(Algorithm.id == algo_id)
-        .group_by(Algorithm.id)
-        .first()
-    )
+    algo = db.query(Algorithm).filter(Algorithm.id == algo_id).first()
 
-    if not row:
+    if not algo:
         raise HTTPException(404, "Algorithm not found")
 
-    algo, count = row
-    algo.models_count = count
     return algo
 
 
@@ -163,18 +142,13 @@ def update_algorithm(
 
     if payload.ini_config is not None:
         algo.ini_config = payload.ini_config
+    emit(db, "algorithm.updated", algorithm_id=algorithm_id, name=algo.name)
 
     db.commit()
     db.refresh(algo)
 
     logger.info(f"Algorithm updated: {algo.name} (ID: {algo.id})")
 
-    algo.models_count = (
-        db.query(func.count(Model.id))
-        .filter(Model.algorithm_id == algo.id)
-        .scalar()
-    )
-
     return algo
 
 
@@ -194,12 +168,24 @@ def delete_algorithm(
     if not algo:
         raise HTTPException(404, "Algorithm not found")
 
+    created_factory_ids = [
+        f_id for (f_id,) in db.query(Factory.id).filter(Factory.created_by_algorithm_id == algorithm_id)
+    ]
+    removed_models = db.query(Model.factory_id, Model.algorithm_id).filter(Model.algorithm_id == algorithm_id).all()
+
     # Remove references from factories to prevent foreign key constraint violations
     from sqlalchemy import text
     db.execute(text("UPDATE factories SET created_by_algorithm_id = NULL WHERE created_by_algorithm_id = :algo_id"), {"algo_id": algorithm_id})
     db.execute(text("DELETE FROM algorithm_factory_links WHERE algorithm_id = :algo_id"), {"algo_id": algorithm_id})
 
+    # Models / versions / artifacts go with the FK cascade; release their blob references first
+    release_versions(db, Model.algorithm_id == algorithm_id)
+
     db.delete(algo)
+    db.flush()
+    adjust_model_counts(db, removed_models, sign=-1)
+    refresh_groups(db, removed_models)
+    refresh_algorithm_counts(db, created_factory_ids)
     db.commit()
     logger.info(f"Algorithm deleted: {algo.name} (ID: {algo.id})")
 
@@ -332,94 +318,16 @@ def list_all_versions_for_algorithm(
 )
 def generate_algorithm_report(
     algorithm_id: int,
+    fmt: str = Query("csv", alias="format"),
     db: Session = Depends(get_db),
 ):
+    """Versions of the algorithm's models as CSV (streamed), Parquet or XLSX."""
     algo = db.query(Algorithm).filter(Algorithm.id == algorithm_id).first()
 
     if not algo:
         raise HTTPException(404, "Algorithm not found")
 
-    models = (
-        db.query(Model)
-        .options(joinedload(Model.versions).joinedload(ModelVersion.delta), joinedload(Model.factory))
-        .filter(Model.algorithm_id == algorithm_id)
-        .order_by(Model.name.asc())
-        .all()
-    )
-
-    stream = io.StringIO()
-    csv_writer = csv.writer(stream)
-    
-    # Write Algorithm Header Information
-    csv_writer.writerow(["Algorithm Details"])
-    csv_writer.writerow(["Name", algo.name])
-    csv_writer.writerow(["Description", algo.description or "N/A"])
-    csv_writer.writerow([])
-
-    if algo.ini_config:
-        csv_writer.writerow(["INI Configuration"])
-        for line in algo.ini_config.splitlines():
-            if line.strip(): # Avoid blank lines
-                csv_writer.writerow([line.strip()])
-        csv_writer.writerow([])
-
-    # Header Row
-    csv_writer.writerow([
-        "Factory Name",
-        "Model Name",
-        "Version Number",
-        "Created At",
-        "Description",
-        "Dataset Total Count",
-        "Accuracy",
-        "Precision",
-        "Recall",
-        "F1 Score",
-        "CPU Utilization (%)",
-        "GPU Utilization (%)",
-        "Inference Time (ms)",
-        "Hyperparameters",
-            "INI Configuration"
-        ])
-
-    for model in models:
-        # Sort versions in memory since they are eagerly loaded
-        versions = sorted(model.versions, key=lambda v: v.version_number)
-        
-        for v in versions:
-            dataset_count = v.delta.dataset_count if v.delta and v.delta.dataset_count is not None else 0
-            hyperparameters = str(v.parameters).replace('\n', ' | ').replace('\r', '') if v.parameters else "None"
-            ini_config_str = v.ini_config.replace('\n', ' | ').replace('\r', '') if hasattr(v, "ini_config") and v.ini_config else "None"
-            created_at_str = v.created_at.strftime("%d-%m-%Y %H:%M:%S") if v.created_at else "N/A"
-
-            csv_writer.writerow([
-                model.factory.name if model.factory else "N/A",
-                model.name,
-                v.version_number,
-                created_at_str,
-                v.note or "",
-                dataset_count,
-                v.accuracy if v.accuracy is not None else "N/A",
-                v.precision if v.precision is not None else "N/A",
-                v.recall if v.recall is not None else "N/A",
-                v.f1_score if v.f1_score is not None else "N/A",
-                v.cpu_utilization if v.cpu_utilization is not None else "N/A",
-                v.gpu_utilization if v.gpu_utilization is not None else "N/A",
-                v.inference_time if v.inference_time is not None else "N/A",
-                hyperparameters,
-                ini_config_str
-            ])
-            
-        if versions:
-            csv_writer.writerow([])
-
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="text/csv"
-    )
-    safe_name = algo.name.replace(" ", "_").lower()
-    response.headers["Content-Disposition"] = f"attachment; filename=algorithm_{safe_name}_report.csv"
-    return response
+    return report_response("algorithm", fmt, algo.name, algorithm_id=algorithm_id)
 
 
 # ======================================================
@@ -451,6 +359,8 @@ def remove_factory_from_algorithm(
     ).all()]
 
     if model_ids:
+        # Release blob references held by these versions (swept by the blob GC)
+        release_versions(db, ModelVersion.model_id.in_(model_ids))
         # Delete model versions first
         db.query(ModelVersion).filter(ModelVersion.model_id.in_(model_ids)).delete(synchronize_session=False)
         # Delete models
@@ -460,6 +370,10 @@ def remove_factory_from_algorithm(
     if factory.created_by_algorithm_id == algorithm_id:
         factory.created_by_algorithm_id = None
 
+    db.flush()
+    adjust_model_counts(db, [(factory_id, algorithm_id)] * len(model_ids), sign=-1)
+    refresh_groups(db, [(factory_id, algorithm_id)])
+    refresh_algorithm_counts(db, [factory_id])
     db.commit()
     logger.info(f"Factory {factory.name} (ID: {factory.id}) removed from algorithm {algo.name} (ID: {algo.id})")
 
@@ -5,11 +5,14 @@ from pathlib import Path
 import json
 import csv
 from mimetypes import guess_type
-from app.api.deps import get_db
+from app.api.deps import get_db, invalidate_response_cache
 from app.models.artifact import Artifact
 from app.schemas.artifact import ArtifactOut
+from app.services.blob_gc import release_blobs
+from app.services.counters import adjust_artifact_counts
+from app.services.tiering import recall_blobs
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(invalidate_response_cache)])
 MAX_PREVIEW_BYTES = 10_000 
 
 # ======================================================
@@ -41,6 +44,7 @@ def download_artifact(
     if not artifact:
         raise HTTPException(404, "Artifact not found")
 
+    recall_blobs([artifact.checksum])
     file_path = Path(artifact.path)
     if not file_path.exists():
         raise HTTPException(404, "File missing on server")
@@ -64,6 +68,7 @@ def preview_artifact(
     if not artifact:
         raise HTTPException(404, "Artifact not found")
 
+    recall_blobs([artifact.checksum])
     file_path = Path(artifact.path)
     if not file_path.exists():
         raise HTTPException(404, "File missing on server")
@@ -104,6 +109,8 @@ def delete_artifact(
     if not artifact:
         raise HTTPException(404, "Artifact not found")
 
+    release_blobs(db, {artifact.checksum: 1})
+    adjust_artifact_counts(db, [artifact], sign=-1)
     db.delete(artifact)
     db.commit()
 
@@ -122,6 +129,7 @@ def get_image(
     if artifact.type != "dataset":
         raise HTTPException(400, "Artifact is not an image")
 
+    recall_blobs([artifact.checksum])
     file_path = Path(artifact.path)
     if not file_path.exists():
         raise HTTPException(404, "Image file missing")
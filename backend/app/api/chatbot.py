@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
-from app.api.deps import get_db
+from app.api.deps import get_db, get_read_db
 from app.models import Factory, Algorithm, Model, ModelVersion
 from app.services.query_dispatcher import run_sql_agent, stream_sql_agent
 
@@ -16,22 +16,32 @@ class ChatRequest(BaseModel):
     message: str
     context: list = []   # [{"role": "user"|"bot", "content": "..."}, ...]
 
+# The interactive flows read and write on the primary (db); only the generated
+# read-only SQL goes to the read replica (read_db)
 @router.post("/ask")
-def ask_chatbot(payload: ChatRequest, db: Session = Depends(get_db)):
+def ask_chatbot(
+    payload: ChatRequest,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+):
     try:
         # Delegate to the MARS AI Agent
-        return run_sql_agent(payload.message, db, context=payload.context)
+        return run_sql_agent(payload.message, db, context=payload.context, read_session=read_db)
     except Exception as e:
         print(f"Chatbot error: {e}")
         return {"answer": f"Unexpected error: {e}", "type": "error"}
 
 @router.post("/stream")
-def stream_chatbot(payload: ChatRequest, db: Session = Depends(get_db)):
+def stream_chatbot(
+    payload: ChatRequest,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+):
     """
     Server-Sent Events endpoint for real-time chatbot streaming.
     """
     return StreamingResponse(
-        stream_sql_agent(payload.message, db, context=payload.context),
+        stream_sql_agent(payload.message, db, context=payload.context, read_session=read_db),
         media_type="text/event-stream"
     )
 
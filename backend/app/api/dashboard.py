@@ -1,78 +1,51 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc, distinct
+from sqlalchemy import and_, func, desc, distinct
 from datetime import datetime, timedelta
 
-from app.api.deps import get_db
+from app.api.deps import async_read, cached_response, get_db
 from app.models.factory import Factory
 from app.models.algorithm import Algorithm
 from app.models.model import Model
 from app.models.version import ModelVersion
-from app.models.artifact import Artifact
+from app.models.dashboard_aggregate import DashboardAggregate
+from app.services.dashboard_aggregates import ALL, get_aggregate
+from app.services.events import stream_events
+from app.services.leaderboard import ALL as LEADERBOARD_ALL, METRICS as LEADERBOARD_METRICS, top
+from app.services.metrics_store import SUMMARY_GROUPS, summarize
+from app.utils.downsample import lttb
 
 router = APIRouter()
 
 @router.get("/stats")
+@cached_response
+@async_read
 def get_dashboard_stats(factory_name: Optional[str] = None, db: Session = Depends(get_db)):
     """
     Get experimental high-level system vital signs.
     """
+    # Counts and storage come from the materialized aggregates (app.services.dashboard_aggregates)
     if factory_name:
         factory = db.query(Factory).filter(Factory.name == factory_name).first()
         if not factory:
             return {
-                "factories": 0, "algorithms": 0, "models": 0, "active_versions": 0, "total_storage_bytes": 0, "latest_deployment": None
+                "factories": 0, "algorithms": 0, "models": 0, "active_versions": 0,
+                "total_storage_bytes": 0, "physical_storage_bytes": 0, "latest_deployment": None,
             }
-        
-        algorithm_count = (
-            db.query(func.count(func.distinct(Model.algorithm_id)))
-            .filter(Model.factory_id == factory.id)
-            .scalar() or 0
-        )
-        
-        model_count = (
-            db.query(Model)
-            .filter(Model.factory_id == factory.id)
-            .count()
-        )
-        
-        active_version_count = (
-            db.query(ModelVersion)
-            .join(Model, ModelVersion.model_id == Model.id)
-            .filter(ModelVersion.is_active == True, Model.factory_id == factory.id)
-            .count()
-        )
-        
-        total_storage_bytes = (
-            db.query(func.sum(Artifact.size))
-            .join(ModelVersion, Artifact.version_id == ModelVersion.id)
-            .join(Model, ModelVersion.model_id == Model.id)
-            .filter(Model.factory_id == factory.id)
-            .scalar() or 0
-        )
-        
-        stats = {
-            "factories": 1,
-            "algorithms": algorithm_count,
-            "models": model_count,
-            "active_versions": active_version_count,
-            "total_storage_bytes": total_storage_bytes
-        }
+        aggregate = get_aggregate(db, factory.id)
     else:
-        factory_count = db.query(Factory).count()
-        algorithm_count = db.query(Algorithm).count()
-        model_count = db.query(Model).count()
-        active_version_count = db.query(ModelVersion).filter(ModelVersion.is_active == True).count()
-        total_storage_bytes = db.query(func.sum(Artifact.size)).scalar() or 0
-        
-        stats = {
-            "factories": factory_count,
-            "algorithms": algorithm_count,
-            "models": model_count,
-            "active_versions": active_version_count,
-            "total_storage_bytes": total_storage_bytes
-        }
+        aggregate = get_aggregate(db)
+
+    stats = {
+        "factories": aggregate.factories if aggregate else 0,
+        "algorithms": aggregate.algorithms if aggregate else 0,
+        "models": aggregate.models if aggregate else 0,
+        "active_versions": aggregate.active_versions if aggregate else 0,
+        "total_storage_bytes": aggregate.logical_bytes if aggregate else 0,
+        "physical_storage_bytes": (aggregate.physical_bytes or 0) if aggregate else 0,
+    }
 
     # Query latest active deployment matching the factory filter
     latest_q = (
@@ -117,6 +90,8 @@ def get_dashboard_stats(factory_name: Optional[str] = None, db: Session = Depend
     return stats
 
 @router.get("/recent-activity")
+@cached_response
+@async_read
 def get_recent_activity(factory_name: Optional[str] = None, limit: int = 10, db: Session = Depends(get_db)):
     """
     Get a feed of recent system events (Versions & Factories).
@@ -191,6 +166,8 @@ def get_recent_activity(factory_name: Optional[str] = None, limit: int = 10, db:
     return activity_log[:limit]
 
 @router.get("/charts/storage-distribution")
+@cached_response
+@async_read
 def get_storage_distribution(factory_name: Optional[str] = None, db: Session = Depends(get_db)):
     """
     Get artifact storage usage grouped by Factory (or by Algorithm if a factory is selected).
@@ -200,14 +177,11 @@ def get_storage_distribution(factory_name: Optional[str] = None, db: Session = D
         results = (
             db.query(
                 Algorithm.name,
-                func.sum(Artifact.size).label("total_size")
+                DashboardAggregate.logical_bytes.label("total_size")
             )
-            .join(Model, Model.algorithm_id == Algorithm.id)
-            .join(ModelVersion, ModelVersion.model_id == Model.id)
-            .join(Artifact, Artifact.version_id == ModelVersion.id)
-            .join(Factory, Factory.id == Model.factory_id)
-            .filter(Factory.name == factory_name)
-            .group_by(Algorithm.name)
+            .join(Algorithm, Algorithm.id == DashboardAggregate.algorithm_id)
+            .join(Factory, Factory.id == DashboardAggregate.factory_id)
+            .filter(Factory.name == factory_name, DashboardAggregate.logical_bytes > 0)
             .order_by(desc("total_size"))
             .limit(10)
             .all()
@@ -217,12 +191,10 @@ def get_storage_distribution(factory_name: Optional[str] = None, db: Session = D
         results = (
             db.query(
                 Factory.name,
-                func.sum(Artifact.size).label("total_size")
+                DashboardAggregate.logical_bytes.label("total_size")
             )
-            .join(Model, Model.factory_id == Factory.id)
-            .join(ModelVersion, ModelVersion.model_id == Model.id)
-            .join(Artifact, Artifact.version_id == ModelVersion.id)
-            .group_by(Factory.name)
+            .join(Factory, Factory.id == DashboardAggregate.factory_id)
+            .filter(DashboardAggregate.algorithm_id == ALL, DashboardAggregate.logical_bytes > 0)
             .order_by(desc("total_size"))
             .limit(10)
             .all()
@@ -234,6 +206,8 @@ def get_storage_distribution(factory_name: Optional[str] = None, db: Session = D
     ]
 
 @router.get("/charts/model-distribution")
+@cached_response
+@async_read
 def get_model_distribution(db: Session = Depends(get_db)):
     """
     Get distribution of Models by Algorithm type.
@@ -241,10 +215,10 @@ def get_model_distribution(db: Session = Depends(get_db)):
     results = (
         db.query(
             Algorithm.name,
-            func.count(Model.id).label("model_count")
+            DashboardAggregate.models.label("model_count")
         )
-        .join(Model, Model.algorithm_id == Algorithm.id)
-        .group_by(Algorithm.name)
+        .join(Algorithm, Algorithm.id == DashboardAggregate.algorithm_id)
+        .filter(DashboardAggregate.factory_id == ALL, DashboardAggregate.models > 0)
         .order_by(desc("model_count"))
         .limit(10)
         .all()
@@ -256,6 +230,8 @@ def get_model_distribution(db: Session = Depends(get_db)):
     ]
 
 @router.get("/charts/activity-trends")
+@cached_response
+@async_read
 def get_activity_trends(days: int = 30, factory_name: Optional[str] = None, db: Session = Depends(get_db)):
     """
     Get version creation/update counts aggregated by day for the last N days.
@@ -314,6 +290,8 @@ def get_activity_trends(days: int = 30, factory_name: Optional[str] = None, db:
     ]
 
 @router.get("/charts/performance-trends")
+@cached_response
+@async_read
 def get_performance_trends(factory_name: Optional[str] = None, db: Session = Depends(get_db)):
     """
     Get performance (accuracy) trends across model versions.
@@ -359,93 +337,343 @@ def get_performance_trends(factory_name: Optional[str] = None, db: Session = Dep
         "modelNames": list(models_map.keys())
     }
 
-@router.get("/factory-status")
-def get_factory_status(db: Session = Depends(get_db)):
+# ==========================================================
+# Downsampled performance-trend series
+# ==========================================================
+
+TREND_METRICS = ("accuracy", "precision", "recall", "f1_score")
+TREND_BUCKETS = ("version", "hour", "day", "week", "month")
+# SQL pre-aggregates a series to this many times max_points before LTTB picks the final points
+TREND_PREAGGREGATE_FACTOR = 4
+
+_SQLITE_BUCKET_ARGS = {
+    "hour": ("%Y-%m-%d %H:00:00",),
+    "day": ("%Y-%m-%d 00:00:00",),
+    "week": ("%Y-%m-%d 00:00:00", "weekday 0", "-6 days"),  # Monday of the week
+    "month": ("%Y-%m-01 00:00:00",),
+}
+
+
+def _time_bucket(db: Session, bucket: str, column):
+    if db.get_bind().dialect.name == "sqlite":
+        fmt, *modifiers = _SQLITE_BUCKET_ARGS[bucket]
+        return func.strftime(fmt, column, *modifiers)
+    return func.date_trunc(bucket, column)
+
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+@router.get("/charts/performance-trends/series")
+@cached_response
+@async_read
+def get_performance_trend_series(
+    metric: str = "accuracy",
+    bucket: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    top_k: int = Query(10, ge=1, le=50),
+    max_points: int = Query(200, ge=3, le=2000),
+    factory_name: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """
-    Get hierarchy of Factory -> Algorithm -> Active Models.
+    Metric trend of the top_k models (ranked by their latest value in the
+    range), aggregated per time bucket (or per run of consecutive versions
+    with bucket=version) in SQL and downsampled with LTTB to at most
+    max_points points per series, however many versions exist.
     """
-    active_versions = (
+    if metric not in TREND_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(TREND_METRICS)}")
+    if bucket not in TREND_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(TREND_BUCKETS)}")
+
+    value = getattr(ModelVersion, metric)
+    filters = [value.isnot(None)]
+    if start is not None:
+        filters.append(ModelVersion.created_at >= start)
+    if end is not None:
+        filters.append(ModelVersion.created_at < end)
+    if factory_name:
+        filters.append(Model.factory_id.in_(db.query(Factory.id).filter(Factory.name == factory_name)))
+
+    # Top K models by their latest value in the range
+    latest = (
         db.query(
-            ModelVersion.version_number,
-            ModelVersion.updated_at,
-            Model.id.label("model_id"),
-            Model.name.label("model_name"),
-            Algorithm.id.label("algorithm_id"),
-            Algorithm.name.label("algorithm_name"),
-            Factory.id.label("factory_id"),
-            Factory.name.label("factory_name")
+            ModelVersion.model_id,
+            value.label("value"),
+            func.row_number().over(
+                partition_by=ModelVersion.model_id,
+                order_by=(ModelVersion.created_at.desc(), ModelVersion.id.desc())
+            ).label("rn")
         )
         .join(Model, Model.id == ModelVersion.model_id)
-        .join(Algorithm, Algorithm.id == Model.algorithm_id)
-        .join(Factory, Factory.id == Model.factory_id)
-        .filter(ModelVersion.is_active == True)
+        .filter(*filters)
+        .subquery()
+    )
+    top = (
+        db.query(latest.c.model_id, latest.c.value)
+        .filter(latest.c.rn == 1)
+        .order_by(desc(latest.c.value), latest.c.model_id)
+        .limit(top_k)
         .all()
     )
-    
-    active_map = {}
-    for v in active_versions:
-        # Group active models by factory and algorithm
-        key = (v.factory_id, v.algorithm_id)
-        if key not in active_map:
-            active_map[key] = []
-        active_map[key].append({
-            "model_id": v.model_id,
-            "model_name": v.model_name,
-            "version_number": v.version_number,
-            "updated_at": v.updated_at
+    if not top:
+        return {"metric": metric, "bucket": bucket, "series": []}
+    model_ids = [r.model_id for r in top]
+
+    if bucket == "version":
+        tiles = (
+            db.query(
+                ModelVersion.model_id,
+                ModelVersion.version_number,
+                ModelVersion.created_at,
+                value.label("value"),
+                func.ntile(max_points * TREND_PREAGGREGATE_FACTOR).over(
+                    partition_by=ModelVersion.model_id,
+                    order_by=(ModelVersion.version_number, ModelVersion.id)
+                ).label("bucket")
+            )
+            .join(Model, Model.id == ModelVersion.model_id)
+            .filter(*filters, ModelVersion.model_id.in_(model_ids))
+            .subquery()
+        )
+        source, bucket_key, bucket_time = tiles, tiles.c.bucket, func.min(tiles.c.created_at)
+    else:
+        points = (
+            db.query(
+                ModelVersion.model_id,
+                ModelVersion.version_number,
+                value.label("value"),
+                _time_bucket(db, bucket, ModelVersion.created_at).label("bucket")
+            )
+            .join(Model, Model.id == ModelVersion.model_id)
+            .filter(*filters, ModelVersion.model_id.in_(model_ids))
+            .subquery()
+        )
+        source, bucket_key, bucket_time = points, points.c.bucket, points.c.bucket
+
+    rows = (
+        db.query(
+            source.c.model_id,
+            bucket_time.label("bucket_start"),
+            func.min(source.c.version_number).label("version"),
+            func.avg(source.c.value).label("value"),
+            func.min(source.c.value).label("min"),
+            func.max(source.c.value).label("max"),
+            func.count().label("versions")
+        )
+        .group_by(source.c.model_id, bucket_key)
+        .order_by(source.c.model_id, bucket_key)
+        .all()
+    )
+
+    by_model = {}
+    for r in rows:
+        by_model.setdefault(r.model_id, []).append({
+            "t": _as_datetime(r.bucket_start),
+            "version": r.version,
+            "value": float(r.value),
+            "min": float(r.min),
+            "max": float(r.max),
+            "count": r.versions
         })
 
-    # Query all models to build factory-algorithm associations
-    all_models = (
+    names = {
+        r.id: f"{r.name} ({(r.algorithm_name or '').strip()}) @ {r.factory_name.strip()}"
+        for r in (
+            db.query(Model.id, Model.name, Algorithm.name.label("algorithm_name"), Factory.name.label("factory_name"))
+            .outerjoin(Algorithm, Algorithm.id == Model.algorithm_id)
+            .join(Factory, Factory.id == Model.factory_id)
+            .filter(Model.id.in_(model_ids))
+        )
+    }
+
+    return {
+        "metric": metric,
+        "bucket": bucket,
+        "series": [
+            {
+                "model_id": r.model_id,
+                "name": names.get(r.model_id),
+                "latest": r.value,
+                "points": lttb(
+                    by_model.get(r.model_id, []),
+                    max_points,
+                    x=lambda p: p["t"].timestamp() if bucket != "version" else p["version"],
+                    y=lambda p: p["value"]
+                )
+            }
+            for r in top
+        ]
+    }
+
+@router.get("/metrics/summary")
+@cached_response
+@async_read
+def get_metrics_summary(
+    keys: List[str] = Query(default=["accuracy", "f1_score", "inference_time", "cpu_utilization", "gpu_utilization"]),
+    group_by: str = "algorithm",
+    factory_name: Optional[str] = None,
+    active_only: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Per-group avg/min/max/count of any version metric key (typed columns,
+    resource metrics, "param.<name>"), aggregated over the metrics store.
+    """
+    if group_by not in SUMMARY_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(SUMMARY_GROUPS)}")
+    return summarize(db, keys, group_by=group_by, factory_name=factory_name, active_only=active_only)
+
+@router.get("/leaderboard")
+@cached_response
+@async_read
+def get_leaderboard(
+    metric: str = "accuracy",
+    factory_id: Optional[int] = None,
+    algorithm_id: Optional[int] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Best active versions by a metric (highest first, lowest for
+    inference_time), overall or within a factory and/or algorithm.
+    """
+    if metric not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(LEADERBOARD_METRICS)}")
+    return top(
+        db,
+        metric,
+        factory_id=factory_id or LEADERBOARD_ALL,
+        algorithm_id=algorithm_id or LEADERBOARD_ALL,
+        limit=limit,
+    )
+
+@router.get("/activity/stream")
+def stream_activity(
+    since: Optional[int] = None,
+    factory_id: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+):
+    """
+    Live registry activity as Server-Sent Events: one event per factory /
+    model / version change (event name = kind, e.g. "version.created").
+    Starts after `since` or the Last-Event-ID header, otherwise from now.
+    """
+    return StreamingResponse(
+        stream_events(last_event_id if last_event_id is not None else since, factory_id=factory_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def build_factory_status(db: Session, factory_id: Optional[int] = None) -> list[dict]:
+    """
+    Factory -> Algorithm -> Active Models tree from one query: every factory
+    (with or without models) joined to its models' algorithms and active
+    versions, assembled through dict indexes in a single pass.
+    """
+    query = (
         db.query(
-            Model.id.label("model_id"),
-            Model.name.label("model_name"),
+            Factory.id.label("factory_id"),
+            Factory.name.label("factory_name"),
             Algorithm.id.label("algorithm_id"),
             Algorithm.name.label("algorithm_name"),
-            Factory.id.label("factory_id"),
-            Factory.name.label("factory_name")
+            Model.id.label("model_id"),
+            Model.name.label("model_name"),
+            ModelVersion.version_number,
+            ModelVersion.updated_at
         )
-        .join(Algorithm, Algorithm.id == Model.algorithm_id)
-        .join(Factory, Factory.id == Model.factory_id)
-        .order_by(Factory.name, Algorithm.name, Model.name)
-        .all()
+        .outerjoin(Model, Model.factory_id == Factory.id)
+        .outerjoin(Algorithm, Algorithm.id == Model.algorithm_id)
+        .outerjoin(ModelVersion, and_(ModelVersion.model_id == Model.id, ModelVersion.is_active == True))
     )
-    
+    if factory_id is not None:
+        query = query.filter(Factory.id == factory_id)
+
     status_tree = {}
-    
-    for row in all_models:
-        fid = row.factory_id
-        if fid not in status_tree:
-            status_tree[fid] = {
-                "factory_id": fid,
+    algo_nodes = {}
+    for row in query.order_by(Factory.name, Factory.id, Algorithm.name, Model.name):
+        factory_node = status_tree.get(row.factory_id)
+        if factory_node is None:
+            factory_node = status_tree[row.factory_id] = {
+                "factory_id": row.factory_id,
                 "factory_name": row.factory_name,
                 "algorithms": []
             }
-            
-        # Check if algorithm is already added to this factory
-        algo_node = next((a for a in status_tree[fid]["algorithms"] if a["algorithm_id"] == row.algorithm_id), None)
-        if not algo_node:
-            active_models = active_map.get((fid, row.algorithm_id), [])
-            algo_node = {
+        if row.algorithm_id is None:
+            continue
+
+        algo_node = algo_nodes.get((row.factory_id, row.algorithm_id))
+        if algo_node is None:
+            algo_node = algo_nodes[(row.factory_id, row.algorithm_id)] = {
                 "algorithm_id": row.algorithm_id,
                 "algorithm_name": row.algorithm_name,
-                "active_models": active_models
+                "active_models": []
             }
-            status_tree[fid]["algorithms"].append(algo_node)
-            
-    # Also fetch factories with no models to display empty states
-    empty_factories = db.query(Factory).filter(~Factory.models.any()).all()
-    for f in empty_factories:
-        if f.id not in status_tree:
-            status_tree[f.id] = {
-                "factory_id": f.id,
-                "factory_name": f.name,
-                "algorithms": []
-            }
-        
+            factory_node["algorithms"].append(algo_node)
+        if row.version_number is not None:
+            algo_node["active_models"].append({
+                "model_id": row.model_id,
+                "model_name": row.model_name,
+                "version_number": row.version_number,
+                "updated_at": row.updated_at
+            })
+
     return list(status_tree.values())
 
+
+@router.get("/factory-status")
+@cached_response
+@async_read
+def get_factory_status(
+    factory_id: Optional[int] = None,
+    expand: bool = True,
+    db: Session = Depends(get_db),
+):
+    """
+    Get hierarchy of Factory -> Algorithm -> Active Models.
+
+    expand=false returns only the factories with their algorithm and active
+    model counts; the UI then loads one factory's subtree with ?factory_id=.
+    """
+    if factory_id is not None:
+        tree = build_factory_status(db, factory_id)
+        if not tree:
+            raise HTTPException(status_code=404, detail="Factory not found")
+        return tree
+
+    if expand:
+        return build_factory_status(db)
+
+    rows = (
+        db.query(
+            Factory.id,
+            Factory.name,
+            func.count(distinct(Model.algorithm_id)).label("algorithms_count"),
+            func.count(ModelVersion.id).label("active_models_count")
+        )
+        .outerjoin(Model, Model.factory_id == Factory.id)
+        .outerjoin(ModelVersion, and_(ModelVersion.model_id == Model.id, ModelVersion.is_active == True))
+        .group_by(Factory.id, Factory.name)
+        .order_by(Factory.name, Factory.id)
+        .all()
+    )
+    return [
+        {
+            "factory_id": r.id,
+            "factory_name": r.name,
+            "algorithms": [],
+            "algorithms_count": r.algorithms_count,
+            "active_models_count": r.active_models_count,
+        }
+        for r in rows
+    ]
+
 @router.get("/charts/performance-metrics")
+@cached_response
+@async_read
 def get_performance_metrics(factory_name: Optional[str] = None, db: Session = Depends(get_db)):
     """
     Get performance metrics (Accuracy, F1) for all ACTIVE models.
@@ -479,6 +707,8 @@ def get_performance_metrics(factory_name: Optional[str] = None, db: Session = De
     ]
 
 @router.get("/comparison-hierarchy")
+@cached_response
+@async_read
 def get_comparison_hierarchy(db: Session = Depends(get_db)):
     """
     Get hierarchy of Algorithm -> Factory -> Model -> Versions for the Compare launcher.
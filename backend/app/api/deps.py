@@ -1,4 +1,13 @@
-from app.database import SessionLocal
+import functools
+import inspect
+
+from fastapi import Depends, Request
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+from app.database import AsyncSessionLocal, ReadSessionLocal, SessionLocal
+from app.services import response_cache
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +15,104 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Session for read-mostly routes: queries go to the read replica (if one is
+    configured), writes and everything after them to the primary.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class _ThreadpoolSession:
+    """Stands in for AsyncSession.run_sync when no async driver is installed."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_async_db():
+    """
+    Replica-routed AsyncSession on the async engines, or a threadpool-backed
+    stand-in with the same run_sync() when the async engine is disabled.
+    """
+    if AsyncSessionLocal is None:
+        db = ReadSessionLocal()
+        try:
+            yield _ThreadpoolSession(db)
+        finally:
+            db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def async_read(route=None, *, response_model=None):
+    """
+    Turns a read-only sync route (db: Session = Depends(get_db)) into an async
+    one running on get_async_db. The body runs via run_sync, so its ORM code is
+    unchanged, but it waits on the async driver instead of holding a worker
+    thread. The result is serialized (through response_model when the route
+    returns ORM objects) before the session closes, so lazy loads still work.
+    """
+    if route is None:
+        return functools.partial(async_read, response_model=response_model)
+
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+    signature = inspect.signature(route)
+    params = [
+        p.replace(default=Depends(get_async_db)) if p.name == "db" else p
+        for p in signature.parameters.values()
+    ]
+
+    def serialize(result):
+        if adapter is None:
+            return jsonable_encoder(result)
+        return adapter.dump_python(adapter.validate_python(result, from_attributes=True), mode="json")
+
+    @functools.wraps(route)
+    async def wrapper(**kwargs):
+        db = kwargs.pop("db")
+        return await db.run_sync(lambda session: serialize(route(db=session, **kwargs)))
+
+    wrapper.__signature__ = signature.replace(parameters=params)
+    return wrapper
+
+
+def cached_response(route):
+    """
+    Serves a read route from the response cache (app.services.response_cache),
+    keyed by its parameters other than db. Wrap an async_read route, so what is
+    cached is the serialized response.
+    """
+    name = f"{route.__module__}.{route.__name__}"
+
+    @functools.wraps(route)
+    async def wrapper(**kwargs):
+        key, value = response_cache.lookup(name, {k: v for k, v in kwargs.items() if k != "db"})
+        if value is not response_cache.MISS:
+            return value
+        value = await route(**kwargs)
+        response_cache.store(key, value)
+        return value
+
+    wrapper.__signature__ = inspect.signature(route)
+    return wrapper
+
+
+async def invalidate_response_cache(request: Request):
+    """
+    Router dependency for routers whose writes change cached responses: after
+    a successful POST/PUT/PATCH/DELETE the whole response cache is dropped.
+    """
+    yield
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        response_cache.invalidate()
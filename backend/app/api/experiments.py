@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import datetime
 
 from app.api.deps import get_db
 from app.models.experiment import Experiment, ExperimentRun
 from app.models.model import Model
 from app.models.version import ModelVersion
+from app.services.counters import adjust_run_counts
+from app.services.metrics_store import sync_run_metrics
 from app.schemas.experiment import (
     ExperimentCreate,
     ExperimentOut,
@@ -82,25 +83,13 @@ def list_experiments(
     if not model:
         raise HTTPException(404, "Model not found")
 
-    experiments = (
-        db.query(
-            Experiment,
-            func.count(ExperimentRun.id).label("runs_count"),
-        )
-        .outerjoin(ExperimentRun, ExperimentRun.experiment_id == Experiment.id)
+    return (
+        db.query(Experiment)
         .filter(Experiment.model_id == model_id)
-        .group_by(Experiment.id)
         .order_by(Experiment.created_at.desc())
         .all()
     )
 
-    results = []
-    for exp, run_count in experiments:
-        exp.runs_count = run_count
-        results.append(exp)
-
-    return results
-
 
 # ======================================================
 # CREATE RUN (MLFLOW CORE)
@@ -151,6 +140,9 @@ def create_run(
     )
 
     db.add(db_run)
+    db.flush()
+    adjust_run_counts(db, [experiment_id])
+    sync_run_metrics(db, [db_run])
     db.commit()
     db.refresh(db_run)
 
@@ -180,6 +172,7 @@ def update_run(
     db_run.metrics = run.metrics
     db_run.status = "FINISHED"
     db_run.finished_at = datetime.utcnow()
+    sync_run_metrics(db, [db_run])
 
     db.commit()
     db.refresh(db_run)
@@ -1,22 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, distinct
-import io
-import csv
-from fastapi.responses import StreamingResponse
 
-from app.api.deps import get_db
+from app.api.deps import async_read, get_db, get_read_db, invalidate_response_cache
 from app.models.factory import Factory
 from app.models.algorithm import Algorithm
 from app.models.model import Model
 from app.models.version import ModelVersion, VersionDelta
-from app.models.artifact import Artifact
+from app.models.metric import Metric
 from app.schemas.factory import FactoryCreate, FactoryOut, FactoryUpdate
 from app.schemas.algorithm import AlgorithmOut
 from app.utils.logger import logger
 from app.utils.resolver import resolve_factory_id
+from app.services.blob_gc import release_versions
+from app.services import response_cache
+from app.services.counters import adjust_model_counts, refresh_algorithm_counts
+from app.services.events import emit
+from app.services.leaderboard import refresh_groups
+from app.services.metrics_store import version_metric_query
+from app.services.reports import report_response
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(invalidate_response_cache)])
 
 # ======================================================
 # CREATE FACTORY
@@ -47,6 +51,9 @@ def create_factory(
         created_by_algorithm_id=factory.created_by_algorithm_id,
     )
     db.add(db_factory)
+    db.flush()
+    refresh_algorithm_counts(db, [db_factory.id])
+    emit(db, "factory.created", factory_id=db_factory.id, name=db_factory.name)
     db.commit()
     db.refresh(db_factory)
 
@@ -57,12 +64,13 @@ def create_factory(
 
 # ======================================================
 @router.get("/")
+@async_read
 def list_factories(
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db)
 ):
-    factories = db.query(Factory).options(joinedload(Factory.models)).offset(skip).limit(limit).all()
+    factories = db.query(Factory).offset(skip).limit(limit).all()
     
     if not factories:
         return []
@@ -85,31 +93,26 @@ def list_factories(
         creator_algos = db.query(Algorithm).filter(Algorithm.id.in_(creator_algo_ids)).all()
     creator_algo_map = {a.id: a.name for a in creator_algos}
 
-    factory_algo_map = {f_id: set() for f_id in factory_ids}
     factory_algo_name_map = {f_id: set() for f_id in factory_ids}
     
     for f_id, a_id, a_name in algo_query:
-        factory_algo_map[f_id].add(a_id)
         factory_algo_name_map[f_id].add(a_name)
 
     result = []
     for f in factories:
-        algo_ids = factory_algo_map.get(f.id, set())
         algo_names = list(factory_algo_name_map.get(f.id, set()))
         
         if f.created_by_algorithm_id is not None:
             c_name = creator_algo_map.get(f.created_by_algorithm_id)
-            if c_name:
-                if c_name not in algo_names:
-                    algo_names.append(c_name)
-                algo_ids.add(f.created_by_algorithm_id)
+            if c_name and c_name not in algo_names:
+                algo_names.append(c_name)
                 
         result.append({
             "id": f.id,
             "name": f.name,
             "description": f.description,
-            "algorithms_count": len(algo_ids),
-            "models_count": len(f.models) if f.models else 0,
+            "algorithms_count": f.algorithms_count,
+            "models_count": f.models_count,
             "created_at": f.created_at,
             "algorithm_names": algo_names,
         })
@@ -133,24 +136,19 @@ def get_factory(
         raise HTTPException(status_code=404, detail="Factory not found")
 
     algos = (
-        db.query(Algorithm.name, Algorithm.id)
+        db.query(Algorithm.name)
         .join(Model, Model.algorithm_id == Algorithm.id)
         .filter(Model.factory_id == fac_id)
         .distinct()
         .all()
     )
     algo_names = [a.name for a in algos]
-    algo_ids = {a.id for a in algos}
 
     if factory.created_by_algorithm_id is not None:
         creator_algo = db.query(Algorithm).filter(Algorithm.id == factory.created_by_algorithm_id).first()
-        if creator_algo:
-            if creator_algo.name not in algo_names:
-                algo_names.append(creator_algo.name)
-            algo_ids.add(creator_algo.id)
+        if creator_algo and creator_algo.name not in algo_names:
+            algo_names.append(creator_algo.name)
 
-    factory.algorithms_count = len(algo_ids)
-    factory.models_count = len(factory.models)
     factory.algorithm_names = algo_names
 
     return factory
@@ -173,6 +171,7 @@ def update_factory(
         factory.name = payload.name
     if payload.description is not None:
         factory.description = payload.description
+    emit(db, "factory.updated", factory_id=factory_id, name=factory.name)
 
     db.commit()
     db.refresh(factory)
@@ -192,7 +191,15 @@ def delete_factory(
     if not factory:
         raise HTTPException(status_code=404, detail="Factory not found")
 
+    # Models / versions / artifacts go with the FK cascade; release their blob references first
+    release_versions(db, Model.factory_id == factory_id)
+    removed_models = db.query(Model.factory_id, Model.algorithm_id).filter(Model.factory_id == factory_id).all()
+
     db.delete(factory)
+    db.flush()
+    adjust_model_counts(db, removed_models, sign=-1)
+    refresh_groups(db, removed_models)
+    emit(db, "factory.deleted", factory_id=factory_id, name=factory.name, models=len(removed_models))
     db.commit()
     logger.info(f"Factory deleted: {factory.name} (ID: {factory.id})")
     return {"message": "Factory deleted"}
@@ -201,10 +208,45 @@ def delete_factory(
 # ======================================================
 # DASHBOARD ENDPOINT
 # ======================================================
+def factory_resource_trends(db: Session, factory_id: int) -> list[dict]:
+    """
+    Average CPU / GPU utilization per algorithm of a factory: one GROUP BY over
+    the pre-parsed metrics store (app.services.metrics_store), cached per
+    factory in the response cache until the next registry write.
+    """
+    key, cached = response_cache.lookup("factory-resource-trends", {"factory_id": factory_id})
+    if cached is not response_cache.MISS:
+        return cached
+
+    rows = (
+        version_metric_query(db, Algorithm.name, Metric.key, func.avg(Metric.value).label("avg_value"))
+        .join(Algorithm, Model.algorithm_id == Algorithm.id)
+        .filter(Model.factory_id == factory_id)
+        .filter(Metric.key.in_(("cpu_utilization", "gpu_utilization")))
+        .group_by(Algorithm.name, Metric.key)
+        .all()
+    )
+    algo_resources = {}
+    for r in rows:
+        algo_resources.setdefault(r.name, {"cpu_utilization": 0.0, "gpu_utilization": 0.0})[r.key] = r.avg_value
+
+    resource_trends = [
+        {
+            "algorithm": algo,
+            "avg_cpu": round(data["cpu_utilization"], 1),
+            "avg_gpu": round(data["gpu_utilization"], 1)
+        }
+        for algo, data in algo_resources.items()
+    ]
+    resource_trends.sort(key=lambda x: x["avg_cpu"], reverse=True)
+    response_cache.store(key, resource_trends)
+    return resource_trends
+
+
 @router.get("/{factory_id}/dashboard")
 def get_factory_dashboard(
     factory_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     # 1. Verify Factory Exists
     factory = db.query(Factory).filter(Factory.id == factory_id).first()
@@ -229,8 +271,7 @@ def get_factory_dashboard(
 
     # Calculate total storage size for all artifacts in this factory
     total_storage = (
-        db.query(func.sum(Artifact.size))
-        .join(ModelVersion, Artifact.version_id == ModelVersion.id)
+        db.query(func.sum(ModelVersion.artifacts_bytes))
         .join(Model, ModelVersion.model_id == Model.id)
         .filter(Model.factory_id == factory_id)
         .scalar() or 0
@@ -283,57 +324,7 @@ def get_factory_dashboard(
     ]
 
     # 5. Resource Trends (Avg CPU/GPU per Algorithm)
-    resource_rows = (
-        db.query(Algorithm.name, ModelVersion.resource_metrics)
-        .join(Model, ModelVersion.model_id == Model.id)
-        .join(Algorithm, Model.algorithm_id == Algorithm.id)
-        .filter(Model.factory_id == factory_id)
-        .filter(ModelVersion.resource_metrics.isnot(None))
-        .all()
-    )
-
-    algo_resources = {}
-
-    for r in resource_rows:
-        algo = r.name
-        metrics = r.resource_metrics
-        if not metrics: 
-            continue
-        
-        def parse_val(val_str):
-            if not val_str: return 0.0
-            clean = val_str.lower().replace('%','').replace('gb','').replace('mb','').replace('ms','').strip()
-            try:
-                return float(clean)
-            except:
-                return 0.0
-        
-        cpu_val = 0.0
-        gpu_val = 0.0
-        
-        if isinstance(metrics, list):
-            for m in metrics:
-                if m.get("key") == "cpu_utilization":
-                    cpu_val = parse_val(m.get("value"))
-                elif m.get("key") == "gpu_utilization":
-                    gpu_val = parse_val(m.get("value"))
-        
-        if algo not in algo_resources:
-            algo_resources[algo] = {"cpu": 0.0, "gpu": 0.0, "count": 0}
-        
-        algo_resources[algo]["cpu"] += cpu_val
-        algo_resources[algo]["gpu"] += gpu_val
-        algo_resources[algo]["count"] += 1
-
-    resource_trends = []
-    for algo, data in algo_resources.items():
-        if data["count"] > 0:
-            resource_trends.append({
-                "algorithm": algo,
-                "avg_cpu": round(data["cpu"] / data["count"], 1),
-                "avg_gpu": round(data["gpu"] / data["count"], 1)
-            })
-    resource_trends.sort(key=lambda x: x["avg_cpu"], reverse=True)
+    resource_trends = factory_resource_trends(db, factory_id)
 
     # Calculate performance vs size quadrant data
     quadrant_rows = (
@@ -346,14 +337,12 @@ def get_factory_dashboard(
             ModelVersion.gpu_utilization,
             Model.name.label("model_name"),
             Algorithm.name.label("algorithm_name"),
-            func.sum(Artifact.size).label("total_size")
+            ModelVersion.artifacts_bytes.label("total_size")
         )
         .join(Model, Model.id == ModelVersion.model_id)
         .join(Algorithm, Algorithm.id == Model.algorithm_id)
-        .outerjoin(Artifact, Artifact.version_id == ModelVersion.id)
         .filter(Model.factory_id == factory_id)
         .filter(ModelVersion.accuracy.isnot(None))
-        .group_by(ModelVersion.id, Model.id, Algorithm.id)
         .all()
     )
 
@@ -393,87 +382,18 @@ def get_factory_dashboard(
 def generate_factory_report(
     factory_id: int,
     algorithm_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    fmt: str = Query("csv", alias="format"),
+    db: Session = Depends(get_read_db),
 ):
+    """Versions of the factory's models as CSV (streamed), Parquet or XLSX."""
     factory = db.query(Factory).filter(Factory.id == factory_id).first()
     if not factory:
         raise HTTPException(404, "Factory not found")
 
-    query = (
-        db.query(Model)
-        .options(
-            joinedload(Model.algorithm),
-            joinedload(Model.versions).joinedload(ModelVersion.delta)
-        )
-        .filter(Model.factory_id == factory_id)
+    return report_response(
+        "factory", fmt, factory.name, factory_id=factory_id, algorithm_id=algorithm_id
     )
 
-    if algorithm_id is not None:
-        query = query.filter(Model.algorithm_id == algorithm_id)
-
-    models = query.order_by(Model.name.asc()).all()
-
-    stream = io.StringIO()
-    writer = csv.writer(stream)
-
-    # Header
-    writer.writerow([
-        "Model Name",
-        "Algorithm Name",
-        "Version",
-        "Status",
-        "Created At",
-        "Description",
-        "Dataset Count",
-        "Accuracy",
-        "Precision",
-        "Recall",
-        "F1 Score",
-        "CPU Utilization (%)",
-        "GPU Utilization (%)",
-        "Inference Time (ms)",
-        "Hyperparameters",
-    ])
-
-    for model in models:
-        versions = sorted(model.versions, key=lambda v: v.version_number)
-
-        if not versions:
-            writer.writerow([model.name, model.algorithm.name if model.algorithm else "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A"])
-            continue
-
-        for v in versions:
-            dataset_count = v.delta.dataset_count if v.delta and v.delta.dataset_count is not None else 0
-            hyperparams = str(v.parameters) if v.parameters else "None"
-            created_str = v.created_at.strftime("%d-%m-%Y %H:%M:%S") if v.created_at else "N/A"
-            status_label = "Active" if v.is_active else "Inactive"
-
-            writer.writerow([
-                model.name,
-                model.algorithm.name if model.algorithm else "N/A",
-                f"v{v.version_number}",
-                status_label,
-                created_str,
-                v.note or "",
-                dataset_count,
-                v.accuracy if v.accuracy is not None else "N/A",
-                v.precision if v.precision is not None else "N/A",
-                v.recall if v.recall is not None else "N/A",
-                v.f1_score if v.f1_score is not None else "N/A",
-                v.cpu_utilization if v.cpu_utilization is not None else "N/A",
-                v.gpu_utilization if v.gpu_utilization is not None else "N/A",
-                v.inference_time if v.inference_time is not None else "N/A",
-                hyperparams,
-            ])
-
-        writer.writerow([])
-
-    csv_output = "\ufeff" + stream.getvalue()
-    response = StreamingResponse(iter([csv_output]), media_type="text/csv; charset=utf-8")
-    safe_name = factory.name.replace(" ", "_").lower()
-    response.headers["Content-Disposition"] = f"attachment; filename=factory_{safe_name}_report.csv"
-    return response
-
 
 # ======================================================
 # LIST ALGORITHMS IN FACTORY
@@ -530,17 +450,18 @@ def list_algorithms_for_factory(
                 .scalar()
             )
             
-        algo.models_count = count
-        algo.accuracy = best_active
-        results.append(algo)
+        # models_count here is per factory, not the algorithm's stored total
+        results.append(
+            AlgorithmOut.model_validate(algo).model_copy(update={"models_count": count, "accuracy": best_active})
+        )
 
     # Also include the creator algorithm if not already listed
     if factory.created_by_algorithm_id is not None and factory.created_by_algorithm_id not in seen_ids:
         creator_algo = db.query(Algorithm).filter(Algorithm.id == factory.created_by_algorithm_id).first()
         if creator_algo:
-            creator_algo.models_count = 0
-            creator_algo.accuracy = None
-            results.append(creator_algo)
+            results.append(
+                AlgorithmOut.model_validate(creator_algo).model_copy(update={"models_count": 0, "accuracy": None})
+            )
 
     return results
 
@@ -1,11 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-import io
-import csv
-from fastapi.responses import StreamingResponse
 
-from app.api.deps import get_db
+from app.api.deps import async_read, get_db, invalidate_response_cache
 from app.models.model import Model
 from app.models.algorithm import Algorithm
 from app.models.factory import Factory
@@ -13,8 +10,13 @@ from app.models.version import ModelVersion
 from app.schemas.model import ModelCreate, ModelOut
 from app.utils.logger import logger
 from app.utils.resolver import resolve_algorithm_id, resolve_factory_id, resolve_model_id
+from app.services.blob_gc import release_versions
+from app.services.counters import adjust_model_counts
+from app.services.events import emit
+from app.services.leaderboard import refresh_groups
+from app.services.reports import report_response
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(invalidate_response_cache)])
 
 # ======================================================
 # CREATE MODEL
@@ -64,6 +66,9 @@ def create_model(
         factory_id=fac_id,
     )
     db.add(db_model)
+    db.flush()
+    adjust_model_counts(db, [(fac_id, algo_id)])
+    emit(db, "model.created", factory_id=fac_id, algorithm_id=algo_id, model_id=db_model.id, name=db_model.name)
     db.commit()
     db.refresh(db_model)
 
@@ -79,6 +84,7 @@ def create_model(
     "/{algorithm_id}/factories/{factory_id}/models",
     response_model=list[ModelOut],
 )
+@async_read(response_model=list[ModelOut])
 def list_models(
     algorithm_id: str,
     factory_id: str,
@@ -95,25 +101,13 @@ def list_models(
     if not factory:
         raise HTTPException(404, "Factory not found")
 
-    models = (
-        db.query(
-            Model,
-            func.count(ModelVersion.id).label("versions_count"),
-        )
-        .outerjoin(ModelVersion, ModelVersion.model_id == Model.id)
+    return (
+        db.query(Model)
         .filter(Model.algorithm_id == algo_id, Model.factory_id == fac_id)
-        .group_by(Model.id)
         .order_by(Model.created_at.desc())
         .all()
     )
 
-    results = []
-    for model, count in models:
-        model.versions_count = count
-        results.append(model)
-
-    return results
-
 
 # ======================================================
 # UPDATE MODEL
@@ -165,6 +159,7 @@ def update_model(
 
     db_model.name = model.name
     db_model.description = model.description
+    emit(db, "model.updated", factory_id=fac_id, algorithm_id=algo_id, model_id=mod_id, name=db_model.name)
 
     db.commit()
     db.refresh(db_model)
@@ -204,12 +199,17 @@ def delete_model(
     if not model:
         raise HTTPException(404, "Model not found")
 
-    # delete versions first
+    # Release blob references, then delete versions
+    release_versions(db, ModelVersion.model_id == mod_id)
     db.query(ModelVersion).filter(
         ModelVersion.model_id == mod_id
     ).delete()
 
     db.delete(model)
+    db.flush()
+    adjust_model_counts(db, [(fac_id, algo_id)], sign=-1)
+    refresh_groups(db, [(fac_id, algo_id)])
+    emit(db, "model.deleted", factory_id=fac_id, algorithm_id=algo_id, model_id=mod_id, name=model.name)
     db.commit()
     logger.info(f"Model deleted: {model.name} (ID: {model.id})")
 
@@ -244,12 +244,6 @@ def get_model(
     if not model:
         raise HTTPException(404, "Model not found")
 
-    model.versions_count = (
-        db.query(func.count(ModelVersion.id))
-        .filter(ModelVersion.model_id == mod_id)
-        .scalar()
-    )
-
     return model
 
 
@@ -268,11 +262,6 @@ def get_model_by_id(
     model = db.query(Model).filter(Model.id == mod_id).first()
     if not model:
         raise HTTPException(404, "Model not found")
-    model.versions_count = (
-        db.query(func.count(ModelVersion.id))
-        .filter(ModelVersion.model_id == mod_id)
-        .scalar()
-    )
     return model
 
 
@@ -286,8 +275,10 @@ def generate_model_report(
     algorithm_id: str,
     factory_id: str,
     model_id: str,
+    fmt: str = Query("csv", alias="format"),
     db: Session = Depends(get_db),
 ):
+    """Versions of the model as CSV (streamed), Parquet or XLSX."""
     algo_id = resolve_algorithm_id(db, algorithm_id)
     fac_id = resolve_factory_id(db, factory_id)
     mod_id = resolve_model_id(db, model_id, algo_id, fac_id)
@@ -305,59 +296,4 @@ def generate_model_report(
     if not model:
         raise HTTPException(404, "Model not found")
 
-    versions = (
-        db.query(ModelVersion)
-        .filter(ModelVersion.model_id == mod_id)
-        .order_by(ModelVersion.version_number.asc())
-        .all()
-    )
-
-    stream = io.StringIO()
-    csv_writer = csv.writer(stream)
-    
-    # Header Row
-    csv_writer.writerow([
-        "Version Number",
-        "Created At",
-        "Description",
-        "Dataset Total Count",
-        "Accuracy",
-        "Precision",
-        "Recall",
-        "F1 Score",
-        "CPU Utilization (%)",
-        "GPU Utilization (%)",
-        "Inference Time (ms)",
-        "Hyperparameters",
-            "INI Configuration"
-        ])
-
-    for v in versions:
-        dataset_count = v.delta.dataset_count if v.delta and v.delta.dataset_count is not None else 0
-        hyperparameters = str(v.parameters).replace('\n', ' | ').replace('\r', '') if v.parameters else "None"
-        ini_config_str = v.ini_config.replace('\n', ' | ').replace('\r', '') if hasattr(v, "ini_config") and v.ini_config else "None"
-        created_at_str = v.created_at.strftime("%d-%m-%Y %H:%M:%S") if v.created_at else "N/A"
-
-        csv_writer.writerow([
-            v.version_number,
-            created_at_str,
-            v.note or "",
-            dataset_count,
-            v.accuracy if v.accuracy is not None else "N/A",
-            v.precision if v.precision is not None else "N/A",
-            v.recall if v.recall is not None else "N/A",
-            v.f1_score if v.f1_score is not None else "N/A",
-            v.cpu_utilization if v.cpu_utilization is not None else "N/A",
-            v.gpu_utilization if v.gpu_utilization is not None else "N/A",
-            v.inference_time if v.inference_time is not None else "N/A",
-            hyperparameters,
-                ini_config_str
-            ])
-
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="text/csv"
-    )
-    safe_name = model.name.replace(" ", "_").lower()
-    response.headers["Content-Disposition"] = f"attachment; filename=model_{safe_name}_report.csv"
-    return response
+    return report_response("model", fmt, model.name, model_id=mod_id)
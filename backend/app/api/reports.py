@@ -0,0 +1,109 @@
+import os
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.models.report_job import ReportJob
+from app.schemas.report import ReportJobOut
+from app.services.report_jobs import SUBTREES, build, etag, request_report, subtree_state
+from app.services.reports import FORMATS, check_format, report_filename
+
+router = APIRouter()
+
+
+def _not_modified(if_none_match: str | None, tag: str) -> bool:
+    return if_none_match is not None and tag in (t.strip() for t in if_none_match.split(","))
+
+
+def _download(job: ReportJob, filename: str, tag: str) -> FileResponse:
+    return FileResponse(
+        job.path,
+        media_type=FORMATS[job.format][0],
+        filename=filename,
+        # Revalidate every time: the ETag changes as soon as the subtree does
+        headers={"ETag": tag, "Cache-Control": "no-cache"},
+    )
+
+
+# ======================================================
+# REPORT JOBS
+# ======================================================
+@router.get("/jobs/{job_id}", response_model=ReportJobOut)
+def get_report_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    job = db.query(ReportJob).filter(ReportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(404, "Report job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(
+    job_id: int,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    """The file of a completed build (it may predate the latest changes)."""
+    job = db.query(ReportJob).filter(ReportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(404, "Report job not found")
+    if job.status != "completed":
+        raise HTTPException(409, f"Report job is {job.status}")
+    if not job.path or not os.path.exists(job.path):
+        raise HTTPException(410, "Report file is no longer available")
+
+    tag = etag(job.fingerprint)
+    if _not_modified(if_none_match, tag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+    entity, columns, *_ = SUBTREES[job.kind]
+    name = db.query(columns[0]).filter(entity.id == job.entity_id).scalar() or str(job.entity_id)
+    return _download(job, report_filename(job.kind, job.format, name), tag)
+
+
+# ======================================================
+# CURRENT REPORT (CACHED, BUILT IN THE BACKGROUND)
+# ======================================================
+# After the /jobs routes, which this pattern would shadow
+@router.get("/{kind}/{entity_id}")
+def get_report(
+    kind: str,
+    entity_id: int,
+    background_tasks: BackgroundTasks,
+    fmt: str = Query("csv", alias="format"),
+    algorithm_id: int | None = Query(None),
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    The factory / algorithm / model report for the current state of its
+    subtree. 304 when If-None-Match has the current ETag, the file when a
+    build of this state exists, else 202 with the build job (queued here if
+    needed); poll /reports/jobs/{id} or wait for "report.completed" on
+    /dashboard/activity/stream, then request the report again.
+    """
+    if kind not in SUBTREES:
+        raise HTTPException(404, f"Unknown report: {kind}")
+    check_format(fmt)
+    if algorithm_id is not None and kind != "factory":
+        raise HTTPException(400, "algorithm_id only applies to factory reports")
+
+    name, fingerprint = subtree_state(db, kind, entity_id, fmt, algorithm_id=algorithm_id)
+    tag = etag(fingerprint)
+    if _not_modified(if_none_match, tag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+
+    job, created = request_report(db, kind, entity_id, fmt, fingerprint, algorithm_id=algorithm_id)
+    if job.status == "completed":
+        return _download(job, report_filename(kind, fmt, name), tag)
+    if created:
+        background_tasks.add_task(build, job.id)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(ReportJobOut.model_validate(job)),
+        headers={"Location": f"/reports/jobs/{job.id}"},
+    )
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, invalidate_response_cache
+from app.models.algorithm import Algorithm
+from app.models.factory import Factory
+from app.models.model import Model
+from app.models.retention_policy import RetentionPolicy
+from app.schemas.retention import RetentionPolicyCreate, RetentionPolicyOut, RetentionPolicyUpdate
+from app.services.retention import prune_versions
+from app.utils.logger import logger
+
+router = APIRouter(dependencies=[Depends(invalidate_response_cache)])
+
+
+# ======================================================
+# LIST / CREATE RETENTION POLICIES
+# ======================================================
+@router.get("/policies", response_model=list[RetentionPolicyOut])
+def list_retention_policies(db: Session = Depends(get_db)):
+    return db.query(RetentionPolicy).order_by(RetentionPolicy.id).all()
+
+
+@router.post(
+    "/policies",
+    response_model=RetentionPolicyOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_retention_policy(
+    payload: RetentionPolicyCreate,
+    db: Session = Depends(get_db),
+):
+    for column, entity, label in (
+        ("model_id", Model, "Model"),
+        ("factory_id", Factory, "Factory"),
+        ("algorithm_id", Algorithm, "Algorithm"),
+    ):
+        target_id = getattr(payload, column)
+        if target_id is None:
+            continue
+        if not db.query(entity.id).filter(entity.id == target_id).first():
+            raise HTTPException(404, f"{label} not found")
+        if db.query(RetentionPolicy.id).filter(getattr(RetentionPolicy, column) == target_id).first():
+            raise HTTPException(400, f"{label} already has a retention policy")
+
+    policy = RetentionPolicy(**payload.model_dump())
+    db.add(policy)
+    db.commit()
+    db.refresh(policy)
+    logger.info(f"Retention policy created: ID {policy.id} (keep last {policy.keep_last})")
+    return policy
+
+
+# ======================================================
+# UPDATE / DELETE RETENTION POLICY
+# ======================================================
+@router.put("/policies/{policy_id}", response_model=RetentionPolicyOut)
+def update_retention_policy(
+    policy_id: int,
+    payload: RetentionPolicyUpdate,
+    db: Session = Depends(get_db),
+):
+    policy = db.query(RetentionPolicy).filter(RetentionPolicy.id == policy_id).first()
+    if not policy:
+        raise HTTPException(404, "Retention policy not found")
+
+    for k, v in payload.model_dump(exclude_unset=True).items():
+        if v is not None:
+            setattr(policy, k, v)
+    db.commit()
+    db.refresh(policy)
+    return policy
+
+
+@router.delete("/policies/{policy_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_retention_policy(
+    policy_id: int,
+    db: Session = Depends(get_db),
+):
+    policy = db.query(RetentionPolicy).filter(RetentionPolicy.id == policy_id).first()
+    if not policy:
+        raise HTTPException(404, "Retention policy not found")
+    db.delete(policy)
+    db.commit()
+
+
+# ======================================================
+# RUN PRUNER NOW
+# ======================================================
+@router.post("/run")
+def run_retention(
+    dry_run: bool = Query(True, description="Only report which versions would be deleted"),
+):
+    return prune_versions(dry_run=dry_run)
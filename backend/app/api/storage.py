@@ -0,0 +1,96 @@
+import threading
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.services.storage_reconciler import ReconcileReport, reconcile
+from app.services import scrubber, tiering
+
+router = APIRouter()
+
+_lock = threading.Lock()
+_current: ReconcileReport | None = None
+
+
+# ======================================================
+# STORAGE RECONCILE (MARK & SWEEP REPORT)
+# ======================================================
+@router.post("/reconcile", status_code=status.HTTP_202_ACCEPTED)
+def start_reconcile(
+    apply: bool = Query(False, description="Fix the blob index and dangling rows instead of only reporting"),
+    workers: int = Query(8, ge=1, le=64),
+    max_files_per_second: float | None = Query(None, gt=0),
+):
+    """
+    Starts a reconcile run in the background; poll GET /storage/reconcile.
+    Only one run at a time per API process.
+    """
+    global _current
+    with _lock:
+        if _current and _current.data["status"] == "running":
+            raise HTTPException(409, "A reconcile run is already in progress")
+        _current = ReconcileReport(apply)
+        report = _current
+
+    threading.Thread(
+        target=reconcile,
+        kwargs={
+            "apply": apply,
+            "workers": workers,
+            "max_files_per_second": max_files_per_second,
+            "report": report,
+        },
+        daemon=True,
+    ).start()
+    return report.snapshot()
+
+
+@router.get("/reconcile")
+def get_reconcile_report():
+    if not _current:
+        raise HTTPException(404, "No reconcile run yet")
+    return _current.snapshot()
+
+
+# ======================================================
+# STORAGE TIERING
+# ======================================================
+@router.get("/tiers")
+def get_tier_summary(db: Session = Depends(get_db)):
+    """Blob count and bytes per storage tier."""
+    return tiering.tier_summary(db)
+
+
+@router.post("/tiers/demote")
+def run_tiering(
+    cold_after_days: int = Query(tiering.COLD_AFTER_DAYS, ge=0),
+    max_blobs: int | None = Query(None, gt=0),
+):
+    """Runs the tiering policy now instead of waiting for the scheduler."""
+    return tiering.demote_cold_blobs(cold_after_days=cold_after_days, max_blobs=max_blobs)
+
+
+# ======================================================
+# INTEGRITY SCRUBBER
+# ======================================================
+@router.get("/scrub")
+def get_scrub_status(db: Session = Depends(get_db)):
+    """Progress of the current/last scrub run plus verification coverage of the store."""
+    return {"run": scrubber.status_snapshot(), "coverage": scrubber.coverage(db)}
+
+
+@router.post("/scrub", status_code=status.HTTP_202_ACCEPTED)
+def start_scrub(
+    max_blobs: int = Query(scrubber.SCRUB_BLOBS_PER_RUN, gt=0),
+    workers: int = Query(scrubber.SCRUB_WORKERS, ge=1, le=64),
+    max_bytes_per_second: int = Query(scrubber.SCRUB_RATE_BYTES, ge=0),
+):
+    if scrubber.status_snapshot()["running"]:
+        raise HTTPException(409, "A scrub run is already in progress")
+    threading.Thread(
+        target=scrubber.scrub,
+        kwargs={"max_blobs": max_blobs, "workers": workers, "max_bytes_per_second": max_bytes_per_second},
+        daemon=True,
+    ).start()
+    return {"message": "Scrub started"}
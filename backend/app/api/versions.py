@@ -12,33 +12,53 @@ from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from pathlib import Path
 from fastapi import Query
-from app.api.deps import get_db
+from app.api.deps import async_read, get_db, invalidate_response_cache
 from app.models.model import Model
 from app.models.version import ModelVersion, VersionDelta
 from app.models.artifact import Artifact
 from app.models.algorithm import Algorithm
 from app.models.factory import Factory
-from app.schemas.version import VersionOut
+from app.models.ingest_job import IngestJob
+from app.schemas.ingest import IngestJobOut, UploadParamsOut
+from app.schemas.version import (
+    VersionOut,
+    VersionBatchCreate,
+    VersionManifest,
+    VersionManifestBase,
+    ArtifactRef,
+    BlobLookup,
+    VersionTagsUpdate,
+)
 from app.utils.hashing import sha256_bytes
 from app.utils.logger import logger
+from app.utils.storage import CACHE_ROOT, TEMP_ROOT, STAGING_ROOT
 from app.utils.resolver import resolve_model_id, resolve_version_id
-from fastapi.responses import FileResponse
+from app.services.version_registry import register_versions, resolve_blob_refs, require_blob_refs
+from app.services.ingest_progress import ProgressReporter, stream_job_events
+from app.services.upload_tuner import upload_tuner
+from app.services.blob_gc import restore_blobs, retain_blobs, retain_artifacts, release_artifacts
+from app.services.counters import adjust_artifact_counts, adjust_artifact_query_counts, adjust_version_counts
+from app.services.dashboard_aggregates import mark_dirty
+from app.services.events import emit, emit_for_model
+from app.services.leaderboard import refresh_models
+from app.services.metrics_store import sync_version_metrics
+from app.services.tiering import recall_blobs, recall_version
+from fastapi.responses import FileResponse, StreamingResponse
 import zipfile
 import tempfile
 import os
 import hashlib
 import shutil
 import json
+import uuid
+import time
 from concurrent.futures import ThreadPoolExecutor
+from pydantic import TypeAdapter, ValidationError
 from app.schemas.artifact import ArtifactOut
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(invalidate_response_cache)])
 
-STORAGE_ROOT = Path("storage")
-CACHE_ROOT = STORAGE_ROOT / "cache"
-TEMP_ROOT = STORAGE_ROOT / "temp"
-CACHE_ROOT.mkdir(parents=True, exist_ok=True)
-TEMP_ROOT.mkdir(parents=True, exist_ok=True)
+ARTIFACT_REF_LIST = TypeAdapter(list[ArtifactRef])
 
 # ======================================================
 # CREATE VERSION (TRUE DVC DATASET DELTA)
@@ -89,6 +109,9 @@ def create_version(
     custom_params: str | None = Form(None), # JSON string for dynamic key-values
     ini_config: str | None = Form(None),
 
+    # Register-by-reference: JSON list of {name, type, checksum} already in the blob store
+    artifact_manifest: str | None = Form(None),
+
     note: str = Form(""),
     db: Session = Depends(get_db),
 ):
@@ -153,9 +176,18 @@ def create_version(
         except Exception as e:
             print(f"Error parsing custom_params: {e}")
 
-    
-    
-    
+    # -------------------------------
+    # Validate referenced blobs (no upload needed)
+    # -------------------------------
+    manifest_refs = []
+    manifest_blobs = {}
+    if artifact_manifest:
+        try:
+            manifest_refs = ARTIFACT_REF_LIST.validate_json(artifact_manifest)
+        except ValidationError as e:
+            raise HTTPException(400, f"Invalid artifact_manifest: {e.errors()}")
+        manifest_blobs = require_blob_refs(db, manifest_refs)
+
     # -------------------------------
     # Create new version
     # -------------------------------
@@ -200,6 +232,7 @@ def create_version(
     )
     db.add(version)
     db.flush()  # Populate version.id for artifacts
+    sync_version_metrics(db, [version])
 
     dataset_checksums: set[str] = set()
     label_checksums: set[str] = set()
@@ -260,6 +293,7 @@ def create_version(
     } if prev_version else set()
 
     new_files_on_disk = []
+    blob_sources = {}  # store path -> upload with its content (restore_blobs)
 
     # --------------------------------------------------
     # Shared processor (DVC-style)
@@ -328,6 +362,7 @@ def create_version(
                         checksum=old.checksum,
                     )
                 )
+                blob_sources[old.path] = info["file_obj"].file
                 if artifact_type == "dataset":
                     dataset_reused += 1
                 else:
@@ -342,6 +377,7 @@ def create_version(
                     with open(cache_path, "wb") as f:
                         shutil.copyfileobj(info["file_obj"].file, f)
                     new_files_on_disk.append(cache_path)
+                blob_sources[str(cache_path)] = info["file_obj"].file
 
                 artifacts_to_insert.append(
                     Artifact(
@@ -391,6 +427,7 @@ def create_version(
         else:
             try: os.unlink(tmp_path)
             except: pass
+        blob_sources[str(cache_path)] = spooled_file
 
         db.add(
             Artifact(
@@ -408,6 +445,36 @@ def create_version(
         process_files(dataset_files, "dataset", dataset_checksums, prev_dataset_checksums)
         process_files(label_files, "label", label_checksums, prev_label_checksums)
 
+        # Artifacts registered by reference share the stored blob (metadata only)
+        referenced_artifacts = []
+        for ref in manifest_refs:
+            path, size = manifest_blobs[ref.checksum]
+            referenced_artifacts.append(
+                Artifact(
+                    version_id=version.id,
+                    name=ref.name,
+                    type=ref.type,
+                    path=path,
+                    size=size,
+                    checksum=ref.checksum,
+                )
+            )
+            # New vs reused against the previous snapshot, as register_versions counts them
+            if ref.type == "dataset":
+                if ref.checksum in prev_dataset_checksums:
+                    dataset_reused += 1
+                else:
+                    dataset_new += 1
+                dataset_checksums.add(ref.checksum)
+            elif ref.type == "label":
+                if ref.checksum in prev_label_checksums:
+                    label_reused += 1
+                else:
+                    label_new += 1
+                label_checksums.add(ref.checksum)
+        if referenced_artifacts:
+            db.bulk_save_objects(referenced_artifacts)
+
         dataset_removed = len(prev_dataset_checksums - dataset_checksums)
         label_removed = len(prev_label_checksums - label_checksums)
 
@@ -436,6 +503,24 @@ def create_version(
             )
         )
 
+        # One blob reference per artifact row of the new snapshot
+        db.flush()
+        retain_blobs(
+            db,
+            db.query(Artifact.checksum, Artifact.path, Artifact.size)
+            .filter(Artifact.version_id == version.id),
+        )
+        new_files_on_disk.extend(restore_blobs(db, blob_sources))
+        adjust_artifact_query_counts(db, db.query(Artifact).filter(Artifact.version_id == version.id))
+        adjust_version_counts(db, [model_id])
+        refresh_models(db, [model_id])
+        emit(
+            db, "version.created",
+            factory_id=factory_id, algorithm_id=algorithm_id,
+            model_id=model_id, version_id=version.id,
+            version_number=version.version_number,
+        )
+
         db.commit()
         db.refresh(version)
         logger.info(f"Version created: {version.version_number} (Model ID: {model_id}, Version ID: {version.id})")
@@ -451,6 +536,239 @@ def create_version(
         print(f"FAILED ATOMIC VERSION CREATE: {e}")
         raise HTTPException(500, detail=str(e))
 
+# ======================================================
+# BATCH REGISTER VERSIONS (CI MANIFEST)
+# ======================================================
+@router.post(
+    "/versions/batch",
+    response_model=list[VersionOut],
+    status_code=status.HTTP_201_CREATED,
+)
+def create_versions_batch(
+    payload: VersionBatchCreate,
+    db: Session = Depends(get_db),
+):
+    """
+    Registers many versions (possibly across models) in one transaction.
+    Artifacts reference blobs that were already uploaded, by sha256.
+    """
+    if not payload.versions:
+        raise HTTPException(400, "Manifest contains no versions")
+
+    try:
+        versions = register_versions(db, payload.versions)
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        print(f"FAILED BATCH VERSION CREATE: {e}")
+        raise HTTPException(500, detail=str(e))
+
+    version_ids = [v.id for v in versions]
+    logger.info(f"Batch registered {len(version_ids)} versions (Version IDs: {version_ids})")
+
+    return (
+        db.query(ModelVersion)
+        .options(joinedload(ModelVersion.delta))
+        .filter(ModelVersion.id.in_(version_ids))
+        .order_by(ModelVersion.id.asc())
+        .all()
+    )
+
+# ======================================================
+# REGISTER VERSION BY REFERENCE (METADATA ONLY)
+# ======================================================
+@router.post(
+    "/{algorithm_id}/factories/{factory_id}/models/{model_id}/versions/from-manifest",
+    response_model=VersionOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_version_from_manifest(
+    algorithm_id: int,
+    factory_id: int,
+    model_id: int,
+    payload: VersionManifestBase,
+    db: Session = Depends(get_db),
+):
+    """
+    Creates a version whose files are all blobs already in the store,
+    e.g. promoting a dataset to another factory's model or re-tagging weights.
+    """
+    model_obj = (
+        db.query(Model)
+        .filter(Model.id == model_id, Model.algorithm_id == algorithm_id, Model.factory_id == factory_id)
+        .first()
+    )
+    if not model_obj:
+        raise HTTPException(404, "Model not found")
+
+    try:
+        [version] = register_versions(
+            db, [VersionManifest(model_id=model_id, **payload.model_dump())]
+        )
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        print(f"FAILED MANIFEST VERSION CREATE: {e}")
+        raise HTTPException(500, detail=str(e))
+
+    db.refresh(version)
+    logger.info(f"Version created from manifest: {version.version_number} (Model ID: {model_id}, Version ID: {version.id})")
+    return version
+
+
+@router.post("/blobs/lookup")
+def lookup_blobs(
+    payload: BlobLookup,
+    db: Session = Depends(get_db),
+):
+    """
+    Tells a client which checksums the store already holds,
+    so only the missing ones need to be uploaded.
+    """
+    checksums = {c.strip().lower() for c in payload.checksums}
+    found = resolve_blob_refs(db, checksums)
+    return {
+        "present": sorted(found.keys()),
+        "missing": sorted(checksums - found.keys()),
+    }
+
+# ======================================================
+# QUEUED INGEST (LARGE UPLOADS)
+# ======================================================
+@router.post(
+    "/{algorithm_id}/factories/{factory_id}/models/{model_id}/versions/ingest",
+    response_model=IngestJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def enqueue_version_ingest(
+    algorithm_id: int,
+    factory_id: int,
+    model_id: int,
+    dataset_files: list[UploadFile] = File([]),
+    label_files: list[UploadFile] = File([]),
+    model_files: list[UploadFile] = File([]),
+    code_files: list[UploadFile] = File([]),
+    manifest: str = Form("{}"),  # JSON: metrics, parameters, note, base_version_id, artifacts refs
+    db: Session = Depends(get_db),
+):
+    """
+    Stages the uploaded files and queues them for a worker.
+    Hashing, storing and the version insert happen outside the request;
+    poll /ingest-jobs/{job_id} for the result.
+    """
+    model_obj = (
+        db.query(Model)
+        .filter(Model.id == model_id, Model.algorithm_id == algorithm_id, Model.factory_id == factory_id)
+        .first()
+    )
+    if not model_obj:
+        raise HTTPException(404, "Model not found")
+
+    try:
+        meta = VersionManifestBase.model_validate_json(manifest)
+    except ValidationError as e:
+        raise HTTPException(400, f"Invalid manifest: {e.errors()}")
+
+    job_dir = STAGING_ROOT / uuid.uuid4().hex
+    job_dir.mkdir(parents=True)
+    staged = []
+    try:
+        for artifact_type, files in (
+            ("dataset", dataset_files),
+            ("label", label_files),
+            ("model", model_files),
+            ("code", code_files),
+        ):
+            for file in files:
+                if not file or not file.filename:
+                    continue
+                staged_path = job_dir / str(len(staged))
+                file.file.seek(0)
+                with open(staged_path, "wb") as out:
+                    shutil.copyfileobj(file.file, out, 1024 * 1024)
+                staged.append({
+                    "path": str(staged_path),
+                    "name": file.filename,
+                    "type": artifact_type,
+                    "size": staged_path.stat().st_size,
+                })
+
+        job = IngestJob(
+            model_id=model_id,
+            status="queued",
+            staging_dir=str(job_dir),
+            stage="queued",
+            manifest={**meta.model_dump(), "files": staged},
+            files_received=len(staged),
+            bytes_received=sum(f["size"] for f in staged),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+    except Exception as e:
+        db.rollback()
+        shutil.rmtree(job_dir, ignore_errors=True)
+        print(f"FAILED INGEST ENQUEUE: {e}")
+        raise HTTPException(500, detail=str(e))
+
+    logger.info(f"Ingest job queued: {job.id} (Model ID: {model_id}, Files: {len(staged)})")
+    return job
+
+
+@router.get(
+    "/ingest-jobs/{job_id}",
+    response_model=IngestJobOut,
+)
+def get_ingest_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    job = db.query(IngestJob).filter(IngestJob.id == job_id).first()
+    if not job:
+        raise HTTPException(404, "Ingest job not found")
+    return job
+
+
+@router.get("/ingest-jobs/{job_id}/events")
+def stream_ingest_job_events(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Server-Sent Events with bytes received / hashed / deduped / written and
+    DB rows flushed for an ingest job or chunked upload session.
+    """
+    if not db.query(IngestJob.id).filter(IngestJob.id == job_id).first():
+        raise HTTPException(404, "Ingest job not found")
+    return StreamingResponse(
+        stream_job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/{algorithm_id}/factories/{factory_id}/models/{model_id}/ingest-jobs",
+    response_model=list[IngestJobOut],
+)
+def list_ingest_jobs(
+    model_id: int,
+    db: Session = Depends(get_db),
+):
+    return (
+        db.query(IngestJob)
+        .filter(IngestJob.model_id == model_id)
+        .order_by(IngestJob.id.desc())
+        .limit(100)
+        .all()
+    )
+
 # ======================================================
 # LIST ALL VERSIONS (TIMELINE)
 # ======================================================
@@ -458,6 +776,7 @@ def create_version(
     "/{algorithm_id}/factories/{factory_id}/models/{model_id}/versions",
     response_model=list[VersionOut],
 )
+@async_read(response_model=list[VersionOut])
 def list_versions(
     algorithm_id: str,
     factory_id: str,
@@ -516,6 +835,7 @@ def get_version(
 def checkout_version(
     model_id: int,
     version_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     version = (
@@ -536,11 +856,51 @@ def checkout_version(
 
     # Activate selected
     version.is_active = True
+    mark_dirty(db, model_ids=[model_id])
+    refresh_models(db, [model_id])
+    emit_for_model(
+        db, "version.checked_out", model_id,
+        version_id=version.id, version_number=version.version_number,
+    )
     db.commit()
 
+    # The active version is served again: bring its blobs back from cold storage
+    background_tasks.add_task(recall_version, version.id)
+
     return {"message": f"Checked out version v{version.version_number}"}
 
 
+# ======================================================
+# VERSION TAGS (PROTECTED FROM RETENTION)
+# ======================================================
+@router.put(
+    "/{algorithm_id}/factories/{factory_id}/models/{model_id}/versions/{version_id}/tags",
+    response_model=VersionOut,
+)
+def set_version_tags(
+    model_id: int,
+    version_id: int,
+    payload: VersionTagsUpdate,
+    db: Session = Depends(get_db),
+):
+    version = (
+        db.query(ModelVersion)
+        .filter(
+            ModelVersion.id == version_id,
+            ModelVersion.model_id == model_id,
+        )
+        .first()
+    )
+    if not version:
+        raise HTTPException(404, "Version not found")
+
+    version.tags = payload.tags
+    emit_for_model(db, "version.updated", model_id, version_id=version.id, tags=payload.tags)
+    db.commit()
+    db.refresh(version)
+    return version
+
+
 
 @router.get(
     "/{algorithm_id}/factories/{factory_id}/models/{model_id}/versions/{version_id}/delta"
@@ -739,6 +1099,9 @@ def download_version(
     # --------------------------------------------------
     checksums = [a.checksum for a in artifacts]
     origin_map = {}
+
+    # Blobs demoted to cold storage are copied back before streaming
+    recall_blobs(checksums)
     
     if checksums:
         # Find min version_number for each checksum for this model
@@ -826,15 +1189,16 @@ def download_version(
 def delete_version(
     model_id: int,
     version_id: int,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
+    # Locked so an overlapping retention prune cannot release the same references
     version = (
         db.query(ModelVersion)
         .filter(
             ModelVersion.id == version_id,
             ModelVersion.model_id == model_id,
         )
+        .with_for_update()
         .first()
     )
 
@@ -843,15 +1207,14 @@ def delete_version(
 
     was_active = version.is_active
 
-    # Get artifact info for garbage collection
-    artifacts_to_check = []
-    for a in version.artifacts:
-        if a.checksum and a.path:
-            artifacts_to_check.append((a.checksum, a.path))
+    # Drop blob references in bulk; unreferenced blobs are swept by the GC later
+    release_artifacts(db, db.query(Artifact).filter(Artifact.version_id == version.id))
 
     db.delete(version)
     db.flush()  # Ensure deletion is reflected in session for subsequent query
+    adjust_version_counts(db, [version.model_id], sign=-1)
     
+    next_best = None
     if was_active:
         # Find the next best version to activate (highest remaining version_number)
         next_best = (
@@ -865,40 +1228,18 @@ def delete_version(
         )
         if next_best:
             next_best.is_active = True
+    refresh_models(db, [model_id])
+    emit_for_model(
+        db, "version.deleted", model_id,
+        version_id=version_id, version_number=version.version_number,
+        activated_version_id=next_best.id if next_best else None,
+    )
 
     db.commit()
 
     logger.info(f"Version deleted: Version ID {version_id} (Model ID: {model_id})")
-
-    # Post-commit: Schedule heavy GC in background
-    background_tasks.add_task(background_garbage_collection, artifacts_to_check)
     return
 
-def background_garbage_collection(artifacts_to_check: list[tuple[str, str]]):
-    """
-    Runs in background to delete physical files that are no longer referenced.
-    Re-creates a fresh DB session because the original one is closed.
-    """
-    from app.database import SessionLocal
-    db = SessionLocal()
-    try:
-        for checksum, path in artifacts_to_check:
-            # Check if any other version (of any model) is using this exact physical file
-            is_still_referenced = db.query(Artifact).filter(Artifact.checksum == checksum).first()
-            
-            if not is_still_referenced:
-                # The file is orphaned - delete from host PC
-                p = Path(path)
-                if p.exists():
-                    try:
-                        p.unlink()
-                        print(f"Garbage Collection: Deleted orphaned artifact {checksum[:8]} at {path}")
-                    except Exception as e:
-                        print(f"Error deleting file {path}: {e}")
-    finally:
-        db.close()
-
-
 
 @router.post(
     "/{algorithm_id}/factories/{factory_id}/models/{model_id}/versions/{version_id}/edit",
@@ -1034,32 +1375,44 @@ def edit_version(
         except Exception as e:
             print(f"Error parsing custom_resource_metrics: {e}")
 
+    sync_version_metrics(db, [version])
+
 
     # -------------------------------
     # GLOBAL artifact index
     # -------------------------------
-    global_artifacts = {
-        a.checksum: a
-        for a in db.query(Artifact)
-        .filter(Artifact.type.in_(["dataset", "label"]))
-        .distinct(Artifact.checksum)
-    }
+    def find_cached(checksums) -> dict:
+        """One dataset/label artifact per already stored checksum."""
+        found = {}
+        ordered = sorted(checksums)
+        for i in range(0, len(ordered), 500):
+            for a in (
+                db.query(Artifact)
+                .filter(Artifact.checksum.in_(ordered[i : i + 500]))
+                .filter(Artifact.type.in_(["dataset", "label"]))
+            ):
+                found.setdefault(a.checksum, a)
+        return found
    
     new_files_on_disk = []
+    added_artifacts = []  # Blob references to take before commit
+    blob_sources = {}  # store path -> upload with its content (restore_blobs)
 
     # --------------------------------------------------
     # Helper to replace snapshot (DVC-style)
     # --------------------------------------------------
     def replace_files(files: list[UploadFile], artifact_type: str):
+        hashed = []
         for file in files:
-            data = file.file.read()
+            hashed.append((file, sha256_bytes(file.file.read())))
             file.file.seek(0)
-            checksum = sha256_bytes(data)
+        global_artifacts = find_cached({checksum for _, checksum in hashed})
 
+        for file, checksum in hashed:
             # Reuse globally cached file
             if checksum in global_artifacts:
                 old = global_artifacts[checksum]
-                db.add(
+                added_artifacts.append(
                     Artifact(
                         version_id=version.id,
                         name=old.name,
@@ -1069,9 +1422,12 @@ def edit_version(
                         checksum=old.checksum,
                     )
                 )
+                blob_sources[old.path] = file.file
                 continue
 
             # New file
+            data = file.file.read()
+            file.file.seek(0)
             cache_dir = CACHE_ROOT / checksum[:2] / checksum[2:4]
             cache_dir.mkdir(parents=True, exist_ok=True)
             cache_path = cache_dir / checksum
@@ -1080,8 +1436,9 @@ def edit_version(
                 with open(cache_path, "wb") as f:
                     f.write(data)
                 new_files_on_disk.append(cache_path)
+            blob_sources[str(cache_path)] = file.file
 
-            db.add(
+            added_artifacts.append(
                 Artifact(
                     version_id=version.id,
                     name=file.filename,
@@ -1105,8 +1462,9 @@ def edit_version(
             with open(cache_path, "wb") as f:
                 f.write(data)
             new_files_on_disk.append(cache_path)
+        blob_sources[str(cache_path)] = file.file
 
-        db.add(
+        added_artifacts.append(
             Artifact(
                 version_id=version.id,
                 name=file.filename,
@@ -1120,18 +1478,24 @@ def edit_version(
     try:
         if dataset_files is not None:
             if dataset_mode == "replace":
-                db.query(Artifact).filter(
+                replaced = db.query(Artifact).filter(
                     Artifact.version_id == version.id,
                     Artifact.type == "dataset",
-                ).delete(synchronize_session=False)
+                )
+                release_artifacts(db, replaced)
+                adjust_artifact_query_counts(db, replaced, sign=-1)
+                replaced.delete(synchronize_session=False)
             replace_files(dataset_files, "dataset")
 
         if label_files is not None:
             if label_mode == "replace":
-                db.query(Artifact).filter(
+                replaced = db.query(Artifact).filter(
                     Artifact.version_id == version.id,
                     Artifact.type == "label",
-                ).delete(synchronize_session=False)
+                )
+                release_artifacts(db, replaced)
+                adjust_artifact_query_counts(db, replaced, sign=-1)
+                replaced.delete(synchronize_session=False)
             replace_files(label_files, "label")
 
         if model_files:
@@ -1139,13 +1503,26 @@ def edit_version(
                 save_single(f, "model")
 
         if code_files:
-            db.query(Artifact).filter(
+            replaced = db.query(Artifact).filter(
                 Artifact.version_id == version.id,
                 Artifact.type == "code"
-            ).delete()
+            )
+            release_artifacts(db, replaced)
+            adjust_artifact_query_counts(db, replaced, sign=-1)
+            replaced.delete()
             for f in code_files:
                 save_single(f, "code")
 
+        db.add_all(added_artifacts)
+        retain_artifacts(db, added_artifacts)
+        new_files_on_disk.extend(restore_blobs(db, blob_sources))
+        adjust_artifact_counts(db, added_artifacts)
+        refresh_models(db, [version.model_id])
+        emit_for_model(
+            db, "version.updated", version.model_id,
+            version_id=version.id, version_number=version.version_number,
+        )
+
         db.commit()
         #logger.info(f"Version updated: Version ID {version_id} (Model ID: {model_id})")
     except Exception as e:
@@ -1179,6 +1556,74 @@ def list_artifacts(
     )
 
 
+# ======================================================
+# CHUNK UPLOAD SESSION (PROGRESS TRACKING)
+# ======================================================
+@router.post(
+    "/{algorithm_id}/factories/{factory_id}/models/{model_id}/versions/{version_id}/upload-sessions",
+    response_model=IngestJobOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def open_upload_session(
+    version_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Opens a progress session for a series of upload_chunk calls.
+    Pass its id as session_id to each chunk and follow /ingest-jobs/{id}/events.
+    """
+    version = db.query(ModelVersion).filter(ModelVersion.id == version_id).first()
+    if not version:
+        raise HTTPException(404, "Version not found")
+
+    session = IngestJob(
+        model_id=version.model_id,
+        version_id=version.id,
+        status="receiving",
+        stage="receiving",
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+@router.post(
+    "/ingest-jobs/{job_id}/close",
+    response_model=IngestJobOut,
+)
+def close_upload_session(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    session = (
+        db.query(IngestJob)
+        .filter(IngestJob.id == job_id, IngestJob.status == "receiving")
+        .first()
+    )
+    if not session:
+        raise HTTPException(404, "Open upload session not found")
+
+    session.status = "closed"
+    session.stage = "closed"
+    session.finished_at = func.now()
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+# ======================================================
+# ADAPTIVE UPLOAD PARAMETERS
+# ======================================================
+@router.get("/uploads/params", response_model=UploadParamsOut)
+def get_upload_params():
+    """
+    Chunk limits the background uploader should use right now, derived from
+    measured upload_chunk latency/throughput and DB pool load.
+    """
+    return upload_tuner.params()
+
+
 # ======================================================
 # CHUNK UPLOAD (BACKGROUND STREAMING)
 # ======================================================
@@ -1190,19 +1635,26 @@ def upload_chunk(
     version_id: int,
     files: list[UploadFile] = File(...),
     artifact_type: str = Form(...), # "dataset" or "label"
+    session_id: int | None = Form(None), # optional upload session for progress events
     db: Session = Depends(get_db),
 ):
     version = db.query(ModelVersion).filter(ModelVersion.id == version_id).first()
     if not version:
         raise HTTPException(404, "Version not found")
 
+    reporter = ProgressReporter(session_id)
+    started = time.perf_counter()
+
     file_names = [f.filename for f in files]
     if file_names:
-        db.query(Artifact).filter(
+        replaced = db.query(Artifact).filter(
             Artifact.version_id == version.id,
             Artifact.type == artifact_type,
             Artifact.name.in_(file_names)
-        ).delete(synchronize_session=False)
+        )
+        release_artifacts(db, replaced)
+        adjust_artifact_query_counts(db, replaced, sign=-1)
+        replaced.delete(synchronize_session=False)
         db.flush()
 
     # Reuse the bulk logic (simplified inline version for chunks)
@@ -1228,6 +1680,9 @@ def upload_chunk(
     with ThreadPoolExecutor(max_workers=16) as executor:
         io_results = list(executor.map(handle_single_file, files))
 
+    chunk_bytes = sum(info["size"] for _, info in io_results)
+    reporter.add(files_received=len(files), bytes_received=chunk_bytes, bytes_hashed=chunk_bytes)
+
     for checksum_str, info in io_results:
         file_map[checksum_str] = info
 
@@ -1270,6 +1725,7 @@ def upload_chunk(
                 )
             )
             reused_files_count += 1
+            reporter.add(files_processed=1, bytes_deduped=info["size"])
         else:
             cache_dir = CACHE_ROOT / checksum[:2] / checksum[2:4]
             cache_dir.mkdir(parents=True, exist_ok=True)
@@ -1279,6 +1735,9 @@ def upload_chunk(
                 info["file_obj"].file.seek(0)
                 with open(cache_path, "wb") as f:
                     shutil.copyfileobj(info["file_obj"].file, f)
+                reporter.add(files_processed=1, bytes_written=info["size"])
+            else:
+                reporter.add(files_processed=1, bytes_deduped=info["size"])
 
             artifacts_to_insert.append(
                 Artifact(
@@ -1298,6 +1757,9 @@ def upload_chunk(
 
     if artifacts_to_insert:
         db.bulk_save_objects(artifacts_to_insert)
+        retain_artifacts(db, artifacts_to_insert)
+        restore_blobs(db, {a.path: file_map[a.checksum]["file_obj"].file for a in artifacts_to_insert})
+        adjust_artifact_counts(db, artifacts_to_insert)
         
         # 4. Update Delta
         # Doing this inside the same transaction is safer
@@ -1320,7 +1782,15 @@ def upload_chunk(
             # Or assume create_version always creates a delta.
             # create_version DOES create a delta.
             pass
+        emit_for_model(
+            db, "version.updated", version.model_id,
+            version_id=version.id, version_number=version.version_number,
+        )
 
     db.commit()
-    return {"uploaded": len(artifacts_to_insert)}
+    reporter.add(rows_flushed=len(artifacts_to_insert))
+    reporter.flush()
+
+    upload_tuner.record(len(files), chunk_bytes, time.perf_counter() - started)
+    return {"uploaded": len(artifacts_to_insert), "upload_params": upload_tuner.params()}
 
@@ -1,93 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import factories, algorithms, models, versions, experiments, artifacts, auth, dashboard, chatbot
+from app.api import factories, algorithms, models, versions, experiments, artifacts, auth, dashboard, chatbot, storage, retention, reports
 from app.api.knowledge_base import router as kb_router
 from app.database import Base, engine
-from sqlalchemy import text
-
-def run_db_migrations():
-    try:
-        with engine.connect() as conn:
-            is_postgres = (engine.dialect.name == 'postgresql')
-            
-            if is_postgres:
-                res_table = conn.execute(text("SELECT to_regclass('public.models');")).fetchone()
-                if res_table and res_table[0]:
-                    res_col = conn.execute(text("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name='models' AND column_name='factory_id';
-                    """)).fetchone()
-                    
-                    if not res_col:
-                        conn.execute(text("ALTER TABLE models ADD COLUMN factory_id INTEGER;"))
-                        conn.execute(text("""
-                            ALTER TABLE models 
-                            ADD CONSTRAINT fk_models_factory 
-                            FOREIGN KEY (factory_id) 
-                            REFERENCES factories(id) 
-                            ON DELETE CASCADE;
-                        """))
-                        
-                        res_algo = conn.execute(text("""
-                            SELECT column_name 
-                            FROM information_schema.columns 
-                            WHERE table_name='algorithms' AND column_name='factory_id';
-                        """)).fetchone()
-                        
-                        if res_algo:
-                            conn.execute(text("""
-                                UPDATE models 
-                                SET factory_id = algorithms.factory_id 
-                                FROM algorithms 
-                                WHERE models.algorithm_id = algorithms.id;
-                            """))
-                        conn.commit()
-
-                res_algo_table = conn.execute(text("SELECT to_regclass('public.algorithms');")).fetchone()
-                if res_algo_table and res_algo_table[0]:
-                    res_algo_col = conn.execute(text("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name='algorithms' AND column_name='factory_id';
-                    """)).fetchone()
-                    
-                    if res_algo_col:
-                        constraints = conn.execute(text("""
-                            SELECT constraint_name 
-                            FROM information_schema.table_constraints 
-                            WHERE table_name='algorithms' AND constraint_type='FOREIGN KEY';
-                        """)).fetchall()
-                        for c in constraints:
-                            try:
-                                conn.execute(text(f"ALTER TABLE algorithms DROP CONSTRAINT {c[0]};"))
-                            except:
-                                pass
-                        conn.execute(text("ALTER TABLE algorithms DROP COLUMN factory_id;"))
-                        conn.commit()
-            else:
-                try:
-                    conn.execute(text("ALTER TABLE models ADD COLUMN factory_id INTEGER REFERENCES factories(id) ON DELETE CASCADE;"))
-                    conn.execute(text("UPDATE models SET factory_id = (SELECT factory_id FROM algorithms WHERE algorithms.id = models.algorithm_id);"))
-                    conn.commit()
-                except:
-                    pass
-                
-                try:
-                    conn.execute(text("ALTER TABLE algorithms DROP COLUMN factory_id;"))
-                    conn.commit()
-                except:
-                    pass
-    except Exception as e:
-        print(f"Migration log (normal if DB not initialized yet): {e}")
-
-# Run migrations
-run_db_migrations()
+from app.migrations import run_migrations
+from app.services import ingest_queue, blob_gc, scheduler, tiering, scrubber, dashboard_aggregates, leaderboard, events, report_jobs, retention as retention_service
+import os
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+# Bring existing databases up to date (see app/migrations)
+run_migrations(engine)
+
+# Build the blob refcount index on first start after upgrading
+try:
+    blob_gc.backfill_blob_index()
+except Exception as e:
+    print(f"Blob index backfill skipped: {e}")
+
 # --------------------------------------------------------------------------------
 # Patch python-multipart to allow >1000 files (DoS protection default)
 # --------------------------------------------------------------------------------
@@ -101,10 +34,38 @@ starlette.requests.Request.form.__kwdefaults__["max_fields"] = 100000
 # --------------------------------------------------------------------------------
 
 
+# In-process ingest workers (set INGEST_WORKERS=0 when running
+# `python -m app.services.ingest_queue` as separate worker processes)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+
+scheduler.register("blob-gc", blob_gc.GC_INTERVAL_SECONDS, blob_gc.sweep_zero_ref_blobs)
+scheduler.register("tiering", tiering.TIERING_INTERVAL_SECONDS, tiering.demote_cold_blobs)
+scheduler.register("retention", retention_service.RETENTION_INTERVAL_SECONDS, retention_service.prune_versions)
+scheduler.register("scrubber", scrubber.SCRUB_INTERVAL_SECONDS, scrubber.scrub)
+scheduler.register("dashboard-aggregates", dashboard_aggregates.DASHBOARD_REFRESH_INTERVAL_SECONDS, dashboard_aggregates.refresh)
+scheduler.register("leaderboard", leaderboard.LEADERBOARD_REFRESH_INTERVAL_SECONDS, leaderboard.refresh_all)
+scheduler.register("leaderboard-overall", leaderboard.LEADERBOARD_REFRESH_INTERVAL_SECONDS, leaderboard.refresh_overall)
+scheduler.register("change-events", events.EVENT_PRUNE_INTERVAL_SECONDS, events.prune)
+scheduler.register("report-cache", report_jobs.REPORT_PRUNE_INTERVAL_SECONDS, report_jobs.prune)
+
+# Registry changes committed in this process refresh the dashboard aggregates
+# now instead of at the next interval
+events.subscribe(lambda batch: scheduler.wake("dashboard-aggregates"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    stop_ingest = ingest_queue.start_worker_threads(INGEST_WORKERS)
+    stop_scheduler = scheduler.start()
+    yield
+    stop_ingest.set()
+    stop_scheduler.set()
+
+
 app = FastAPI(
     title="MLOps Platform Backend",
     description="DVC + MLflow style backend",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS (for React)
@@ -128,6 +89,9 @@ app.include_router(versions.router, prefix="/algorithms", tags=["Versions"])
 app.include_router(experiments.router, prefix="/algorithms", tags=["Experiments"])
 app.include_router(artifacts.router, prefix="/artifacts", tags=["Artifacts"])  
 app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(storage.router, prefix="/storage", tags=["Storage"])
+app.include_router(retention.router, prefix="/retention", tags=["Retention"])
+app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 app.include_router(chatbot.router)
 app.include_router(kb_router)
 
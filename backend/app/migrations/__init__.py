@@ -0,0 +1,122 @@
+"""
+Schema migrations.
+
+Every migration is a module in this package with an upgrade(conn) function,
+listed in MIGRATIONS in the order it must run. Applied migrations are
+recorded in the schema_migrations table, so each one runs once per database.
+
+Migrations run after Base.metadata.create_all: a fresh database already has
+the current schema, so every upgrade must check what exists before changing
+it. A module can set TRANSACTIONAL = False to run in autocommit mode (e.g. for
+CREATE INDEX CONCURRENTLY on Postgres).
+
+CLI: python -m app.migrations [--list]
+"""
+import argparse
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.engine import Engine
+
+from app.migrations import (
+    m0001_models_factory_id,
+    m0002_storage_and_tag_columns,
+    m0003_hot_path_indexes,
+    m0004_denormalized_counters,
+    m0005_metrics_store,
+    m0006_leaderboard,
+    m0007_change_events,
+    m0008_report_jobs,
+    m0009_blob_missing_flag,
+)
+from app.utils.logger import logger
+
+MIGRATIONS = [
+    m0001_models_factory_id,
+    m0002_storage_and_tag_columns,
+    m0003_hot_path_indexes,
+    m0004_denormalized_counters,
+    m0005_metrics_store,
+    m0006_leaderboard,
+    m0007_change_events,
+    m0008_report_jobs,
+    m0009_blob_missing_flag,
+]
+
+# Serializes migrations when several API processes start at once (Postgres)
+ADVISORY_LOCK_ID = 735_201_036
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def _version(module) -> str:
+    return module.__name__.rsplit(".", 1)[-1]
+
+
+def applied_versions(engine: Engine) -> set[str]:
+    with engine.connect() as conn:
+        return {v for (v,) in conn.execute(select(schema_migrations.c.version))}
+
+
+def run_migrations(engine: Engine) -> list[str]:
+    """Applies pending migrations in order. Returns the versions applied."""
+    _metadata.create_all(bind=engine)
+    is_postgres = engine.dialect.name == "postgresql"
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if is_postgres:
+            lock_conn.exec_driver_sql(f"SELECT pg_advisory_lock({ADVISORY_LOCK_ID})")
+        try:
+            done = applied_versions(engine)
+            applied = []
+            for module in MIGRATIONS:
+                version = _version(module)
+                if version in done:
+                    continue
+                if getattr(module, "TRANSACTIONAL", True):
+                    with engine.begin() as conn:
+                        module.upgrade(conn)
+                        _record(conn, version)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        module.upgrade(conn)
+                        _record(conn, version)
+                applied.append(version)
+                logger.info(f"Migrations: applied {version}")
+            return applied
+        finally:
+            if is_postgres:
+                lock_conn.exec_driver_sql(f"SELECT pg_advisory_unlock({ADVISORY_LOCK_ID})")
+
+
+def _record(conn, version: str):
+    conn.execute(schema_migrations.insert().values(version=version, applied_at=datetime.now(timezone.utc)))
+
+
+def main():
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--list", action="store_true", help="show migration status without applying anything")
+    args = parser.parse_args()
+
+    if args.list:
+        _metadata.create_all(bind=engine)
+        done = applied_versions(engine)
+        for module in MIGRATIONS:
+            version = _version(module)
+            print(f"{'applied' if version in done else 'pending':8} {version}")
+        return
+
+    applied = run_migrations(engine)
+    print("\n".join(applied) if applied else "Nothing to apply")
+
+
+if __name__ == "__main__":
+    main()
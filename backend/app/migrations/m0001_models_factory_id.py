@@ -0,0 +1,43 @@
+"""
+Moves factory_id from algorithms to models.
+
+Algorithms used to belong to one factory; models now carry the factory
+themselves so an algorithm can be shared. Existing models inherit the
+factory of their algorithm before the old column is dropped.
+"""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    inspector = inspect(conn)
+    if not inspector.has_table("models") or not inspector.has_table("algorithms"):
+        return
+    model_columns = {c["name"] for c in inspector.get_columns("models")}
+    algorithm_columns = {c["name"] for c in inspector.get_columns("algorithms")}
+    is_postgres = conn.dialect.name == "postgresql"
+
+    if "factory_id" not in model_columns:
+        if is_postgres:
+            conn.execute(text("ALTER TABLE models ADD COLUMN factory_id INTEGER"))
+            conn.execute(text("""
+                ALTER TABLE models
+                ADD CONSTRAINT fk_models_factory
+                FOREIGN KEY (factory_id)
+                REFERENCES factories(id)
+                ON DELETE CASCADE
+            """))
+        else:
+            conn.execute(text("ALTER TABLE models ADD COLUMN factory_id INTEGER REFERENCES factories(id) ON DELETE CASCADE"))
+
+        if "factory_id" in algorithm_columns:
+            conn.execute(text("""
+                UPDATE models
+                SET factory_id = (SELECT factory_id FROM algorithms WHERE algorithms.id = models.algorithm_id)
+            """))
+
+    if "factory_id" in algorithm_columns:
+        if is_postgres:
+            for fk in inspector.get_foreign_keys("algorithms"):
+                if "factory_id" in fk["constrained_columns"] and fk.get("name"):
+                    conn.execute(text(f'ALTER TABLE algorithms DROP CONSTRAINT "{fk["name"]}"'))
+        conn.execute(text("ALTER TABLE algorithms DROP COLUMN factory_id"))
@@ -0,0 +1,34 @@
+"""
+Columns added to existing tables after they were first created: blob tiering
+and scrubber bookkeeping, and version tags used by retention.
+"""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    is_postgres = conn.dialect.name == "postgresql"
+    timestamp = "TIMESTAMP WITH TIME ZONE" if is_postgres else "DATETIME"
+    new_columns = {
+        "blobs": {
+            "tier": "VARCHAR NOT NULL DEFAULT 'hot'",
+            "last_accessed_at": timestamp,
+            "last_verified_at": timestamp,
+        },
+        "model_versions": {
+            "tags": "JSONB" if is_postgres else "JSON",
+        },
+    }
+
+    inspector = inspect(conn)
+    for table, columns in new_columns.items():
+        if not inspector.has_table(table):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        for column, ddl in columns.items():
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+    # create_all only indexes tables it creates
+    if inspector.has_table("blobs"):
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_blobs_tier ON blobs (tier)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_blobs_last_verified_at ON blobs (last_verified_at)"))
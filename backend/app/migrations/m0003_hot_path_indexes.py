@@ -0,0 +1,62 @@
+"""
+Indexes for the foreign keys and filters on the hot query paths.
+
+- artifacts (version_id, type): every per-version listing, diff, download and
+  edit filters on version_id, usually with a type (dataset/label/code)
+- artifacts (checksum, type): dedup lookups on upload (checksum IN (...) AND
+  type = ?) and the blob GC / tiering lookups by checksum
+- model_versions (model_id, version_number): version listings, "latest
+  version" and next-version-number queries
+- model_versions (model_id, updated_at) WHERE is_active: the handful of
+  active versions the dashboard and checkout look up; partial so it stays tiny
+- models (factory_id, algorithm_id) and models (algorithm_id): the model
+  scoping filter used by every nested route and the dashboard joins
+
+Built CONCURRENTLY on Postgres so big tables stay writable meanwhile. The same
+indexes are declared on the models, so create_all builds them on new databases.
+See scripts/explain_indexes.py for before/after plans.
+"""
+from sqlalchemy import inspect, text
+
+TRANSACTIONAL = False
+
+# SQLite only uses a partial index when the query repeats its predicate
+# verbatim, and SQLAlchemy renders "is_active == True" as "is_active = 1" there
+ACTIVE = {"postgresql": "is_active", "sqlite": "is_active = 1"}
+
+INDEXES = [
+    ("ix_artifacts_version_id_type", "artifacts", "version_id, type", None),
+    ("ix_artifacts_checksum_type", "artifacts", "checksum, type", None),
+    ("ix_model_versions_model_id_version_number", "model_versions", "model_id, version_number", None),
+    ("ix_model_versions_active", "model_versions", "model_id, updated_at", ACTIVE),
+    ("ix_models_factory_id_algorithm_id", "models", "factory_id, algorithm_id", None),
+    ("ix_models_algorithm_id", "models", "algorithm_id", None),
+]
+
+
+def upgrade(conn):
+    create_indexes(conn, INDEXES)
+
+
+def create_indexes(conn, indexes):
+    """Creates (name, table, columns, where-by-dialect) indexes that are missing."""
+    is_postgres = conn.dialect.name == "postgresql"
+    inspector = inspect(conn)
+    for name, table, columns, where in indexes:
+        if not inspector.has_table(table):
+            continue
+        if is_postgres:
+            # A cancelled concurrent build leaves an INVALID index behind; rebuild it
+            conn.execute(text(f"""
+                DO $$ BEGIN
+                    IF EXISTS (
+                        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                        WHERE c.relname = '{name}' AND NOT i.indisvalid
+                    ) THEN
+                        DROP INDEX {name};
+                    END IF;
+                END $$
+            """))
+        concurrently = "CONCURRENTLY " if is_postgres else ""
+        predicate = f" WHERE {where[conn.dialect.name]}" if where and conn.dialect.name in where else ""
+        conn.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns}){predicate}"))
@@ -0,0 +1,53 @@
+"""
+Counter columns read by the list endpoints instead of COUNT(*) joins (see
+app.services.counters), backfilled from the base tables.
+
+The backfill is a frozen copy of counters.RECOUNT_STATEMENTS as of this
+migration, so later changes to the service do not change what it does.
+"""
+from sqlalchemy import inspect, text
+
+BACKFILL = [
+    """UPDATE model_versions SET
+        artifacts_count = (SELECT COUNT(*) FROM artifacts a WHERE a.version_id = model_versions.id),
+        artifacts_bytes = (SELECT COALESCE(SUM(a.size), 0) FROM artifacts a WHERE a.version_id = model_versions.id)""",
+    """UPDATE models SET
+        versions_count = (SELECT COUNT(*) FROM model_versions v WHERE v.model_id = models.id)""",
+    """UPDATE algorithms SET
+        models_count = (SELECT COUNT(*) FROM models m WHERE m.algorithm_id = algorithms.id)""",
+    """UPDATE factories SET
+        models_count = (SELECT COUNT(*) FROM models m WHERE m.factory_id = factories.id),
+        algorithms_count = (SELECT COUNT(DISTINCT m.algorithm_id) FROM models m WHERE m.factory_id = factories.id)
+            + CASE WHEN created_by_algorithm_id IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM models m
+                WHERE m.factory_id = factories.id AND m.algorithm_id = factories.created_by_algorithm_id
+            ) THEN 1 ELSE 0 END""",
+    """UPDATE experiments SET
+        runs_count = (SELECT COUNT(*) FROM experiment_runs r WHERE r.experiment_id = experiments.id)""",
+]
+
+
+def upgrade(conn):
+    counter = "INTEGER NOT NULL DEFAULT 0"
+    new_columns = {
+        "factories": {
+            "algorithms_count": counter,
+            "models_count": counter,
+            # Read by the backfill; databases from before factory creators lack it
+            "created_by_algorithm_id": "INTEGER REFERENCES algorithms(id)",
+        },
+        "algorithms": {"models_count": counter},
+        "models": {"versions_count": counter},
+        "experiments": {"runs_count": counter},
+        "model_versions": {"artifacts_count": counter, "artifacts_bytes": "BIGINT NOT NULL DEFAULT 0"},
+    }
+
+    inspector = inspect(conn)
+    for table, columns in new_columns.items():
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        for column, ddl in columns.items():
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+    for statement in BACKFILL:
+        conn.execute(text(statement))
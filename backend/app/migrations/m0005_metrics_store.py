@@ -0,0 +1,161 @@
+"""
+Long-format metrics table (see app.services.metrics_store), backfilled from
+the version metric columns, resource_metrics / parameters JSON and run
+metrics.
+
+The table definition, the metric column list and the value parsing are
+frozen copies of the model and service as of this migration, so later
+changes to either do not change what it creates or writes.
+"""
+import math
+import re
+
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, select
+from sqlalchemy.dialects.postgresql import JSONB
+
+JSONVariant = JSON().with_variant(JSONB, "postgresql")
+BATCH_SIZE = 1000
+
+metadata = MetaData()
+
+metrics = Table(
+    "metrics", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version_id", Integer, ForeignKey("model_versions.id", ondelete="CASCADE"), nullable=True),
+    Column("run_id", Integer, ForeignKey("experiment_runs.id", ondelete="CASCADE"), nullable=True),
+    Column("key", String, nullable=False),
+    Column("value", Float, nullable=False),
+    Column("unit", String, nullable=True),
+    Column("recorded_at", DateTime(timezone=True), nullable=True),
+    Index("ix_metrics_key_version_id", "key", "version_id"),
+    Index("ix_metrics_version_id", "version_id"),
+    Index("ix_metrics_run_id_key", "run_id", "key"),
+)
+
+# model_versions metric columns and their units
+COLUMN_UNITS = {
+    "accuracy": "%",
+    "precision": "%",
+    "recall": "%",
+    "f1_score": "%",
+    "cpu_utilization": "%",
+    "gpu_utilization": "%",
+    "inference_time": "ms",
+    "cpu_memory_usage": "MB",
+    "gpu_memory_usage": "MB",
+    "cameras_supported": "count",
+    **{f"{kind}_{outcome}": "count" for kind in ("frame", "alert") for outcome in ("tp", "tn", "fp", "fn")},
+}
+
+PARAM_PREFIX = "param."
+
+# The columns the backfill reads (also what the ForeignKeys above resolve against)
+model_versions = Table(
+    "model_versions", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime(timezone=True)),
+    Column("resource_metrics", JSONVariant),
+    Column("parameters", JSONVariant),
+    *(Column(column, Float) for column in COLUMN_UNITS),
+)
+experiment_runs = Table(
+    "experiment_runs", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("metrics", JSON),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime),
+)
+
+_NUMBER = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([^\d\s][^\d]*?)?\s*$")
+
+
+def _parse_number(value, unit=None):
+    if isinstance(value, dict):
+        return _parse_number(value.get("value"), value.get("unit") or unit)
+    if isinstance(value, bool) or value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        match = _NUMBER.match(value)
+        if not match:
+            return None, None
+        number = float(match.group(1))
+        unit = unit or match.group(2)
+    else:
+        return None, None
+    if not math.isfinite(number):
+        return None, None
+    return number, (unit.strip() or None) if isinstance(unit, str) else None
+
+
+def _json_entries(data):
+    if isinstance(data, dict):
+        return [(str(k), v) for k, v in data.items()]
+    if isinstance(data, list):
+        return [
+            (str(item["key"]), {"value": item.get("value"), "unit": item.get("unit")})
+            for item in data
+            if isinstance(item, dict) and item.get("key")
+        ]
+    return []
+
+
+def _numeric(entries, prefix=""):
+    values = {}
+    for key, raw in entries:
+        number, unit = _parse_number(raw)
+        if number is not None:
+            values[f"{prefix}{key}"] = (number, unit)
+    return values
+
+
+def _version_metrics(version):
+    values = _numeric(_json_entries(version.resource_metrics))
+    # The typed columns win over a resource_metrics entry of the same key
+    for column, unit in COLUMN_UNITS.items():
+        number, _ = _parse_number(getattr(version, column))
+        if number is not None:
+            values[column] = (number, unit)
+    values.update(_numeric(_json_entries(version.parameters), PARAM_PREFIX))
+    return values
+
+
+def _rows(entity_column, entity_id, values, recorded_at):
+    return [
+        {
+            "version_id": entity_id if entity_column == "version_id" else None,
+            "run_id": entity_id if entity_column == "run_id" else None,
+            "key": key,
+            "value": number,
+            "unit": unit,
+            "recorded_at": recorded_at,
+        }
+        for key, (number, unit) in values.items()
+    ]
+
+
+def _backfill(conn, table, to_rows):
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            select(table).where(table.c.id > last_id).order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        rows = [r for entity in batch for r in to_rows(entity)]
+        if rows:
+            conn.execute(metrics.insert(), rows)
+        last_id = batch[-1].id
+
+
+def upgrade(conn):
+    # New table: create_all made it on databases started with this code,
+    # but run_migrations may be invoked on its own (python -m app.migrations)
+    metrics.create(bind=conn, checkfirst=True)
+    conn.execute(metrics.delete())
+    _backfill(conn, model_versions, lambda v: _rows("version_id", v.id, _version_metrics(v), v.created_at))
+    _backfill(
+        conn, experiment_runs,
+        lambda run: _rows("run_id", run.id, _numeric(_json_entries(run.metrics)), run.finished_at or run.started_at),
+    )
@@ -0,0 +1,90 @@
+"""
+Leaderboards (see app.services.leaderboard): partial indexes on the metric
+columns of active versions, and the precomputed top-K table, filled from
+the current active versions. Indexes are built CONCURRENTLY on Postgres.
+
+The table definition, the metric list and the ranking SQL are frozen copies
+of the model and service as of this migration.
+"""
+import os
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, text
+
+from app.migrations.m0003_hot_path_indexes import ACTIVE, create_indexes
+
+TRANSACTIONAL = False
+
+# metric -> True when higher is better
+METRICS = {
+    "accuracy": True,
+    "precision": True,
+    "recall": True,
+    "f1_score": True,
+    "inference_time": False,
+}
+
+# level -> grouping columns of models (factory_id, algorithm_id); None means every one (0)
+LEVELS = {
+    "all": (None, None),
+    "factory": ("factory_id", None),
+    "algorithm": (None, "algorithm_id"),
+    "pair": ("factory_id", "algorithm_id"),
+}
+
+INDEXES = [
+    (f"ix_model_versions_active_{metric}", "model_versions", metric, ACTIVE)
+    for metric in METRICS
+]
+
+metadata = MetaData()
+
+# Referenced by the version_id foreign key
+Table("model_versions", metadata, Column("id", Integer, primary_key=True))
+
+leaderboard_entries = Table(
+    "leaderboard_entries", metadata,
+    Column("metric", String, primary_key=True),
+    Column("factory_id", Integer, primary_key=True, autoincrement=False),
+    Column("algorithm_id", Integer, primary_key=True, autoincrement=False),
+    Column("rank", Integer, primary_key=True, autoincrement=False),
+    Column("version_id", Integer, ForeignKey("model_versions.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("model_id", Integer, nullable=False),
+    Column("value", Float, nullable=False),
+    Column("refreshed_at", DateTime(timezone=True), nullable=True),
+)
+
+
+def _backfill_sql(metric: str, level: str, active: str) -> str:
+    factory_column, algorithm_column = LEVELS[level]
+    partition = ", ".join(f"m.{c}" for c in (factory_column, algorithm_column) if c)
+    direction = "DESC" if METRICS[metric] else "ASC"
+    return f"""
+        INSERT INTO leaderboard_entries
+            (metric, factory_id, algorithm_id, rank, version_id, model_id, value, refreshed_at)
+        SELECT '{metric}', factory_id, algorithm_id, position, version_id, model_id, value, CURRENT_TIMESTAMP
+        FROM (
+            SELECT
+                {f"m.{factory_column}" if factory_column else "0"} AS factory_id,
+                {f"m.{algorithm_column}" if algorithm_column else "0"} AS algorithm_id,
+                v.id AS version_id, v.model_id AS model_id, v.{metric} AS value,
+                ROW_NUMBER() OVER (
+                    {f"PARTITION BY {partition}" if partition else ""}
+                    ORDER BY v.{metric} {direction}, v.id
+                ) AS position
+            FROM model_versions v
+            JOIN models m ON m.id = v.model_id
+            WHERE v.{active} AND v.{metric} IS NOT NULL AND m.algorithm_id IS NOT NULL
+        ) ranked
+        WHERE position <= :top_k
+    """
+
+
+def upgrade(conn):
+    create_indexes(conn, INDEXES)
+    leaderboard_entries.create(bind=conn, checkfirst=True)
+    active = ACTIVE.get(conn.dialect.name, "is_active = true")
+    top_k = int(os.getenv("LEADERBOARD_TOP_K", "10"))
+    conn.execute(leaderboard_entries.delete())
+    for metric in METRICS:
+        for level in LEVELS:
+            conn.execute(text(_backfill_sql(metric, level, active)), {"top_k": top_k})
@@ -0,0 +1,9 @@
+"""
+Registry change log (see app.services.events), read by the live activity
+stream.
+"""
+from app.models.change_event import ChangeEvent
+
+
+def upgrade(conn):
+    ChangeEvent.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,25 @@
+"""
+Report build jobs and their cached output (see app.services.report_jobs),
+and the change_events indexes their fingerprints look up the latest change
+of a subtree with. Indexes are built CONCURRENTLY on Postgres.
+"""
+from sqlalchemy import text
+
+from app.migrations.m0003_hot_path_indexes import create_indexes
+from app.models.report_job import ReportJob
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("ix_change_events_kind_id", "change_events", "kind, id", None),
+    ("ix_change_events_factory_id_id", "change_events", "factory_id, id", None),
+    ("ix_change_events_algorithm_id_id", "change_events", "algorithm_id, id", None),
+    ("ix_change_events_model_id_id", "change_events", "model_id, id", None),
+]
+
+
+def upgrade(conn):
+    create_indexes(conn, INDEXES)
+    # Superseded by ix_change_events_factory_id_id
+    conn.execute(text("DROP INDEX IF EXISTS ix_change_events_factory_id"))
+    ReportJob.__table__.create(bind=conn, checkfirst=True)
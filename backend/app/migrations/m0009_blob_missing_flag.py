@@ -0,0 +1,14 @@
+"""
+blobs.missing_at: set by the scrubber when a blob's file is gone from the
+store, cleared when it verifies again.
+"""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    timestamp = "TIMESTAMP WITH TIME ZONE" if conn.dialect.name == "postgresql" else "DATETIME"
+    inspector = inspect(conn)
+    if not inspector.has_table("blobs"):
+        return
+    if "missing_at" not in {c["name"] for c in inspector.get_columns("blobs")}:
+        conn.execute(text(f"ALTER TABLE blobs ADD COLUMN missing_at {timestamp}"))
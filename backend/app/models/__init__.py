@@ -4,3 +4,11 @@ from app.models.model import Model
 from app.models.version import ModelVersion
 from app.models.experiment import Experiment
 from app.models.artifact import Artifact
+from app.models.ingest_job import IngestJob
+from app.models.blob import Blob
+from app.models.retention_policy import RetentionPolicy
+from app.models.dashboard_aggregate import DashboardAggregate
+from app.models.metric import Metric
+from app.models.leaderboard_entry import LeaderboardEntry
+from app.models.change_event import ChangeEvent
+from app.models.report_job import ReportJob
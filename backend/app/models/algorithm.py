@@ -12,8 +12,8 @@ class Algorithm(Base):
     ini_config = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    # runtime only
-    models_count: int = 0
+    # Denormalized counter, maintained by app.services.counters
+    models_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     models = relationship(
         "Model",
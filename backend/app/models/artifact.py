@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from app.database import Base
 from sqlalchemy.orm import relationship
 
 class Artifact(Base):
     __tablename__ = "artifacts"
+    __table_args__ = (
+        Index("ix_artifacts_version_id_type", "version_id", "type"),
+        Index("ix_artifacts_checksum_type", "checksum", "type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     version_id = Column(Integer, ForeignKey("model_versions.id", ondelete="CASCADE"))
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Blob(Base):
+    """
+    One row per stored file in storage/cache (content addressed by checksum).
+    ref_count is the number of artifact rows pointing at it; blobs that stay
+    at zero for the GC grace period are swept from disk.
+    tier is "hot" (path under storage/cache), "cold" (path under the cold
+    storage root) or "quarantine" (failed an integrity check, moved aside);
+    artifact rows always keep the hot path. missing_at is set while the
+    scrubber finds no file at path.
+    """
+    __tablename__ = "blobs"
+
+    checksum = Column(String, primary_key=True)
+    path = Column(String, nullable=False)
+    size = Column(BigInteger)
+    ref_count = Column(Integer, nullable=False, default=0)
+    zero_ref_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    tier = Column(String, nullable=False, default="hot", server_default="hot", index=True)
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)
+    last_verified_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    missing_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ChangeEvent(Base):
+    """
+    Append-only log of registry changes (factory / model / version created,
+    updated, deleted, checked out), written in the same transaction as the
+    change by app.services.events. The ids are the cursor of the live
+    activity stream. The entity ids are plain columns, not foreign keys, so
+    events outlive what they describe.
+    """
+    __tablename__ = "change_events"
+    __table_args__ = (
+        Index("ix_change_events_kind_id", "kind", "id"),
+        Index("ix_change_events_factory_id_id", "factory_id", "id"),
+        Index("ix_change_events_algorithm_id_id", "algorithm_id", "id"),
+        Index("ix_change_events_model_id_id", "model_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # e.g. "version.created"
+    factory_id = Column(Integer, nullable=True)
+    algorithm_id = Column(Integer, nullable=True)
+    model_id = Column(Integer, nullable=True)
+    version_id = Column(Integer, nullable=True)
+    data = Column(JSON, default=dict)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
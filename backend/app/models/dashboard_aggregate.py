@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, BigInteger, Boolean, DateTime
+from app.database import Base
+
+
+class DashboardAggregate(Base):
+    """
+    Precomputed dashboard figures, one row per scope:
+
+      (0, 0)                      whole system
+      (factory_id, 0)             one factory
+      (factory_id, algorithm_id)  one algorithm within one factory
+      (0, algorithm_id)           one algorithm across factories
+
+    logical_bytes sums artifact sizes (shared files counted once per
+    reference); physical_bytes counts every stored blob once and is only kept
+    on the system and factory rows. Rows are rebuilt by
+    app.services.dashboard_aggregates from the factories marked dirty.
+    """
+    __tablename__ = "dashboard_aggregates"
+
+    factory_id = Column(Integer, primary_key=True, autoincrement=False)
+    algorithm_id = Column(Integer, primary_key=True, autoincrement=False)
+    factories = Column(Integer, nullable=False, default=0)
+    algorithms = Column(Integer, nullable=False, default=0)
+    models = Column(Integer, nullable=False, default=0)
+    versions = Column(Integer, nullable=False, default=0)
+    active_versions = Column(Integer, nullable=False, default=0)
+    logical_bytes = Column(BigInteger, nullable=False, default=0)
+    physical_bytes = Column(BigInteger, nullable=True)
+    dirty = Column(Boolean, nullable=False, default=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=True)
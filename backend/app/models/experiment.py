@@ -18,8 +18,8 @@ class Experiment(Base):
     model_id = Column(Integer, ForeignKey("models.id", ondelete="CASCADE"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    # runtime
-    runs_count: int = 0
+    # Denormalized counter, maintained by app.services.counters
+    runs_count = Column(Integer, nullable=False, default=0, server_default="0")
 
 
 class ExperimentRun(Base):
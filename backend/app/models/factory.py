@@ -12,9 +12,9 @@ class Factory(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by_algorithm_id = Column(Integer, ForeignKey("algorithms.id"), nullable=True)
 
-    # NOT columns – runtime attributes
-    algorithms_count: int = 0
-    models_count: int = 0
+    # Denormalized counters, maintained by app.services.counters
+    algorithms_count = Column(Integer, nullable=False, default=0, server_default="0")
+    models_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     models = relationship(
         "Model",
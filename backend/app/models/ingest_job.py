@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model_id = Column(Integer, ForeignKey("models.id", ondelete="CASCADE"))
+    version_id = Column(Integer, ForeignKey("model_versions.id", ondelete="SET NULL"), nullable=True)
+    # queued / running / completed / failed for worker jobs,
+    # receiving / closed for chunked upload sessions (never claimed by workers)
+    status = Column(String, index=True, default="queued")
+    stage = Column(String, nullable=True)
+
+    staging_dir = Column(String, nullable=True)
+    # Version metadata (VersionManifestBase) + staged files [{"path", "name", "type"}]
+    manifest = Column(JSON, default=dict)
+    error = Column(Text, nullable=True)
+
+    # Progress counters, incremented atomically (concurrent chunks share a row)
+    files_received = Column(Integer, default=0)
+    files_processed = Column(Integer, default=0)
+    bytes_received = Column(BigInteger, default=0)
+    bytes_hashed = Column(BigInteger, default=0)
+    bytes_deduped = Column(BigInteger, default=0)
+    bytes_written = Column(BigInteger, default=0)
+    rows_flushed = Column(Integer, default=0)
+
+    attempts = Column(Integer, default=0)
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
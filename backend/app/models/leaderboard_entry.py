@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from app.database import Base
+
+
+class LeaderboardEntry(Base):
+    """
+    Precomputed top-K active versions per metric and group: factory_id /
+    algorithm_id 0 means every factory / algorithm, so each metric has rows
+    for (0, 0), (factory, 0), (0, algorithm) and (factory, algorithm).
+    Maintained by app.services.leaderboard on version writes.
+    """
+    __tablename__ = "leaderboard_entries"
+
+    metric = Column(String, primary_key=True)
+    factory_id = Column(Integer, primary_key=True, autoincrement=False)
+    algorithm_id = Column(Integer, primary_key=True, autoincrement=False)
+    rank = Column(Integer, primary_key=True, autoincrement=False)
+    version_id = Column(Integer, ForeignKey("model_versions.id", ondelete="CASCADE"), nullable=False, index=True)
+    model_id = Column(Integer, nullable=False)
+    value = Column(Float, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=True)
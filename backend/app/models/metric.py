@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from app.database import Base
+
+
+class Metric(Base):
+    """
+    Long-format copy of every numeric metric of a version or experiment run:
+    one row per (entity, key), typed value plus unit. Kept in sync on write
+    by app.services.metrics_store from the ModelVersion metric columns,
+    resource_metrics, numeric parameters ("param.<name>") and run metrics,
+    so analytics aggregate in SQL instead of parsing JSON row by row.
+
+    Exactly one of version_id / run_id is set.
+    """
+    __tablename__ = "metrics"
+    __table_args__ = (
+        Index("ix_metrics_key_version_id", "key", "version_id"),
+        Index("ix_metrics_version_id", "version_id"),
+        Index("ix_metrics_run_id_key", "run_id", "key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    version_id = Column(Integer, ForeignKey("model_versions.id", ondelete="CASCADE"), nullable=True)
+    run_id = Column(Integer, ForeignKey("experiment_runs.id", ondelete="CASCADE"), nullable=True)
+    key = Column(String, nullable=False)
+    value = Column(Float, nullable=False)
+    unit = Column(String, nullable=True)
+    recorded_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
 from sqlalchemy.orm import relationship
 
 class Model(Base):
     __tablename__ = "models"
+    __table_args__ = (
+        Index("ix_models_factory_id_algorithm_id", "factory_id", "algorithm_id"),
+        Index("ix_models_algorithm_id", "algorithm_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -13,8 +17,8 @@ class Model(Base):
     factory_id = Column(Integer, ForeignKey("factories.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    # runtime only
-    versions_count: int = 0
+    # Denormalized counter, maintained by app.services.counters
+    versions_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     algorithm = relationship(
         "Algorithm",
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ReportJob(Base):
+    """
+    A report build (app.services.report_jobs). fingerprint identifies the
+    state of the report's subtree the file was built from; a completed job
+    is served as long as the subtree's fingerprint is unchanged.
+    """
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        Index("ix_report_jobs_fingerprint", "fingerprint", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # factory / algorithm / model
+    entity_id = Column(Integer, nullable=False)
+    algorithm_id = Column(Integer, nullable=True)  # factory reports restricted to one algorithm
+    format = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    # queued / running / completed / failed
+    status = Column(String, default="queued")
+    path = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RetentionPolicy(Base):
+    """
+    Version retention rule scoped to exactly one of model, factory or algorithm.
+    The active version, the last keep_last versions and (if keep_tagged)
+    tagged versions are kept; the pruner deletes the rest.
+    """
+    __tablename__ = "retention_policies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model_id = Column(Integer, ForeignKey("models.id", ondelete="CASCADE"), nullable=True, unique=True)
+    factory_id = Column(Integer, ForeignKey("factories.id", ondelete="CASCADE"), nullable=True, unique=True)
+    algorithm_id = Column(Integer, ForeignKey("algorithms.id", ondelete="CASCADE"), nullable=True, unique=True)
+    keep_last = Column(Integer, nullable=False, default=10)
+    keep_tagged = Column(Boolean, nullable=False, default=True)
+    enabled = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
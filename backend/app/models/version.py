@@ -1,10 +1,30 @@
-from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, String, Float
+from sqlalchemy import BigInteger, Column, Integer, Boolean, DateTime, ForeignKey, String, Float, Index, JSON, text
 from sqlalchemy.sql import func
 from app.database import Base
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
+
+# JSONB on Postgres, JSON (text) elsewhere, e.g. SQLite edge deployments
+JSONVariant = JSON().with_variant(JSONB, "postgresql")
+
 class ModelVersion(Base):
     __tablename__ = "model_versions"
+    __table_args__ = (
+        Index("ix_model_versions_model_id_version_number", "model_id", "version_number"),
+        # Partial: only the few active versions are indexed
+        Index(
+            "ix_model_versions_active", "model_id", "updated_at",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1"),
+        ),
+        # Leaderboard metrics of active versions (app.services.leaderboard)
+        *(
+            Index(
+                f"ix_model_versions_active_{metric}", metric,
+                postgresql_where=text("is_active"), sqlite_where=text("is_active = 1"),
+            )
+            for metric in ("accuracy", "precision", "recall", "f1_score", "inference_time")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     model_id = Column(Integer, ForeignKey("models.id", ondelete="CASCADE"))
@@ -38,9 +58,14 @@ class ModelVersion(Base):
     alert_fp = Column(Integer, nullable=True)
     alert_fn = Column(Integer, nullable=True)
 
-    parameters = Column(JSONB, default=dict)
-    resource_metrics = Column(JSONB, default=dict)
+    parameters = Column(JSONVariant, default=dict)
+    resource_metrics = Column(JSONVariant, default=dict)
     ini_config = Column(String, nullable=True)
+    tags = Column(JSONVariant, default=list)  # e.g. ["release", "baseline"]; tagged versions survive retention
+
+    # Denormalized counters, maintained by app.services.counters
+    artifacts_count = Column(Integer, nullable=False, default=0, server_default="0")
+    artifacts_bytes = Column(BigInteger, nullable=False, default=0, server_default="0")
     
     artifacts = relationship(
         "Artifact",
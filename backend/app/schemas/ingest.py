@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class IngestJobOut(BaseModel):
+    id: int
+    model_id: int
+    version_id: int | None
+    status: str
+    stage: str | None = None
+    error: str | None
+
+    files_received: int = 0
+    files_processed: int = 0
+    bytes_received: int = 0
+    bytes_hashed: int = 0
+    bytes_deduped: int = 0
+    bytes_written: int = 0
+    rows_flushed: int = 0
+
+    attempts: int | None
+    created_at: datetime | None
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
+
+
+class UploadParamsOut(BaseModel):
+    max_files: int
+    max_bytes: int
+    concurrency: int
+    db_pool_load: float
+    seconds_per_file: float | None = None
+    bytes_per_second: int | None = None
+    samples: int
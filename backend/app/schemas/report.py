@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class ReportJobOut(BaseModel):
+    id: int
+    kind: str
+    entity_id: int
+    algorithm_id: int | None = None
+    format: str
+    status: str
+    size: int | None = None
+    error: str | None = None
+    created_at: datetime | None
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field, model_validator
+from datetime import datetime
+
+
+class RetentionPolicyBase(BaseModel):
+    keep_last: int = Field(10, ge=1)
+    keep_tagged: bool = True
+    enabled: bool = True
+
+
+class RetentionPolicyCreate(RetentionPolicyBase):
+    model_id: int | None = None
+    factory_id: int | None = None
+    algorithm_id: int | None = None
+
+    @model_validator(mode="after")
+    def validate_scope(self):
+        scopes = [s for s in (self.model_id, self.factory_id, self.algorithm_id) if s is not None]
+        if len(scopes) != 1:
+            raise ValueError("Set exactly one of model_id, factory_id or algorithm_id")
+        return self
+
+
+class RetentionPolicyUpdate(BaseModel):
+    keep_last: int | None = Field(None, ge=1)
+    keep_tagged: bool | None = None
+    enabled: bool | None = None
+
+
+class RetentionPolicyOut(RetentionPolicyBase):
+    id: int
+    model_id: int | None
+    factory_id: int | None
+    algorithm_id: int | None
+    created_at: datetime | None
+    updated_at: datetime | None
+
+    class Config:
+        from_attributes = True
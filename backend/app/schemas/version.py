@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator
 from datetime import datetime
-from typing import Optional,Dict,Any
+from typing import Optional,Dict,Any,List
 
 
 class VersionDeltaOut(BaseModel):
@@ -55,6 +55,9 @@ class VersionOut(BaseModel):
 
     parameters: Dict[str, Any] | None = None 
     resource_metrics: Dict[str, Any] | None = None 
+    tags: List[str] | None = None
+    artifacts_count: int = 0
+    artifacts_bytes: int = 0
     delta: VersionDeltaOut | None = None 
 
     @field_validator("accuracy", "precision", "recall", "f1_score", mode="before")
@@ -66,3 +69,84 @@ class VersionOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ArtifactRef(BaseModel):
+    name: str
+    type: str  # dataset, label, model, code
+    checksum: str
+
+    @field_validator("type")
+    @classmethod
+    def validate_type(cls, v):
+        if v not in ("dataset", "label", "model", "code"):
+            raise ValueError("type must be one of dataset, label, model, code")
+        return v
+
+    @field_validator("checksum")
+    @classmethod
+    def normalize_checksum(cls, v):
+        v = v.strip().lower()
+        if len(v) != 64 or any(c not in "0123456789abcdef" for c in v):
+            raise ValueError("checksum must be a sha256 hex digest")
+        return v
+
+
+class VersionManifestBase(BaseModel):
+    base_version_id: int | None = None
+    note: str = ""
+    ini_config: str | None = None
+
+    accuracy: float | None = None
+    precision: float | None = None
+    recall: float | None = None
+    f1_score: float | None = None
+
+    cpu_utilization: float | None = None
+    gpu_utilization: float | None = None
+    inference_time: float | None = None
+    cpu_memory_usage: float | None = None
+    gpu_memory_usage: float | None = None
+    cameras_supported: int | None = None
+
+    frame_tp: int | None = None
+    frame_tn: int | None = None
+    frame_fp: int | None = None
+    frame_fn: int | None = None
+
+    alert_tp: int | None = None
+    alert_tn: int | None = None
+    alert_fp: int | None = None
+    alert_fn: int | None = None
+
+    parameters: Dict[str, Any] = {}
+    resource_metrics: Any = {}
+    artifacts: List[ArtifactRef] = []
+
+    @field_validator("accuracy", "precision", "recall", "f1_score")
+    @classmethod
+    def validate_metrics(cls, v):
+        if v is not None and not (0.0 <= float(v) <= 100.0):
+            raise ValueError("Metric must be between 0 and 100")
+        return v
+
+
+class VersionManifest(VersionManifestBase):
+    model_id: int
+
+
+class BlobLookup(BaseModel):
+    checksums: List[str]
+
+
+class VersionBatchCreate(BaseModel):
+    versions: List[VersionManifest]
+
+
+class VersionTagsUpdate(BaseModel):
+    tags: List[str]
+
+    @field_validator("tags")
+    @classmethod
+    def normalize_tags(cls, v):
+        return sorted({t.strip() for t in v if t and t.strip()})
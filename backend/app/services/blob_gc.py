@@ -0,0 +1,388 @@
+"""
+Reference-counted garbage collection for the content-addressed blob store.
+
+Every artifact row holds one reference on its blob (blobs.ref_count). Writers
+take references in bulk in the same transaction that inserts the artifact rows
+and deleters drop them in bulk in the transaction that deletes the rows, so a
+delete costs a handful of grouped statements instead of one lookup per file.
+
+A blob whose count reaches zero is only stamped (zero_ref_at). The periodic
+sweeper removes blobs that stayed unreferenced for the whole grace period, in
+batches, re-checking the count under a row lock. An upload that takes a new
+reference before that simply clears the stamp and the file survives.
+
+The sweeper moves a file out of the store (to "<checksum>.gc") while it still
+holds the row lock and only unlinks it once the row delete is committed. A
+writer whose reference lands after a sweep (its retain_blobs waited for the
+lock, then re-created the row) finds the file missing and puts it back with
+restore_blobs.
+"""
+import os
+import shutil
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import bindparam, case, event, func, select
+from sqlalchemy.orm import Query, Session
+
+from app.database import SessionLocal, engine
+from app.models.artifact import Artifact
+from app.models.blob import Blob
+from app.models.model import Model
+from app.models.version import ModelVersion
+from app.services.tiering import TIER_COLD, TIER_HOT
+from app.utils.logger import logger
+from app.utils.storage import cache_path_for, place_blob
+
+GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+GC_INTERVAL_SECONDS = int(os.getenv("BLOB_GC_INTERVAL", "300"))
+GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH", "1000"))
+GC_SUFFIX = ".gc"  # swept file waiting for its delete to commit
+
+blobs = Blob.__table__
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _insert_for(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def retain_blobs(db: Session, rows):
+    """
+    Takes one reference per (checksum, path, size) row, creating blob index
+    entries for checksums seen for the first time. Runs in the caller's
+    transaction as a single multi-row upsert.
+    """
+    counts = Counter()
+    info = {}
+    for checksum, path, size in rows:
+        if not checksum:
+            continue
+        counts[checksum] += 1
+        info.setdefault(checksum, (path, size))
+    if not counts:
+        return
+
+    # Sorted so concurrent writers lock rows in the same order
+    params = [
+        {"checksum": c, "path": info[c][0], "size": info[c][1], "ref_count": n}
+        for c, n in sorted(counts.items())
+    ]
+
+    insert = _insert_for(db)
+    if insert is not None:
+        stmt = insert(blobs)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[blobs.c.checksum],
+            set_={
+                "ref_count": blobs.c.ref_count + stmt.excluded.ref_count,
+                "zero_ref_at": None,
+            },
+        )
+        db.execute(stmt, params)
+        return
+
+    # Dialects without ON CONFLICT: update known rows, insert the rest
+    known = set()
+    checksums = [p["checksum"] for p in params]
+    for i in range(0, len(checksums), GC_BATCH_SIZE):
+        batch = checksums[i : i + GC_BATCH_SIZE]
+        known.update(c for (c,) in db.execute(select(blobs.c.checksum).where(blobs.c.checksum.in_(batch))))
+    updates = [p for p in params if p["checksum"] in known]
+    inserts = [p for p in params if p["checksum"] not in known]
+    if updates:
+        db.execute(
+            blobs.update()
+            .where(blobs.c.checksum == bindparam("b_checksum"))
+            .values(ref_count=blobs.c.ref_count + bindparam("b_n"), zero_ref_at=None),
+            [{"b_checksum": p["checksum"], "b_n": p["ref_count"]} for p in updates],
+        )
+    if inserts:
+        db.execute(blobs.insert(), inserts)
+
+
+def retain_artifacts(db: Session, artifacts):
+    """retain_blobs for Artifact objects or artifact row dicts."""
+    retain_blobs(
+        db,
+        (
+            (a["checksum"], a["path"], a["size"]) if isinstance(a, dict) else (a.checksum, a.path, a.size)
+            for a in artifacts
+        ),
+    )
+
+
+def restore_blobs(db: Session, sources: dict) -> list[Path]:
+    """
+    Puts back blobs a sweep removed between the caller's existence check and
+    its retain_blobs call. sources maps store path -> the file the caller has
+    the content in (a staged file path or an open binary file). Call it after
+    retain_blobs, in the same transaction. Returns the paths written.
+
+    Blobs tiering moved to the cold volume are made hot again: the content is
+    in the cache now, so the row points back at it and the cold copy is
+    removed after the commit (instead of leaving an untracked hot copy).
+    """
+    restored = []
+    for path, src in sources.items():
+        path = Path(path)
+        if path.exists():
+            continue
+        if isinstance(src, (str, Path)):
+            place_blob(Path(src), path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".part")
+            src.seek(0)
+            with open(tmp, "wb") as f:
+                shutil.copyfileobj(src, f)
+            os.replace(tmp, path)
+        restored.append(path)
+    if restored:
+        logger.info(f"Blob GC: restored {len(restored)} blobs swept during upload")
+
+    # Cache paths are named after their checksum
+    hot = {Path(p).name: str(p) for p in sources if str(cache_path_for(Path(p).name)) == str(p)}
+    if not hot:
+        return restored
+    cold_rows = (
+        db.query(Blob.checksum, Blob.path)
+        .filter(Blob.checksum.in_(sorted(hot)), Blob.tier == TIER_COLD)
+        .order_by(Blob.checksum)
+        .with_for_update()
+        .all()
+    )
+    if not cold_rows:
+        return restored
+    for checksum, _ in cold_rows:
+        db.query(Blob).filter(Blob.checksum == checksum).update(
+            {"tier": TIER_HOT, "path": hot[checksum]}, synchronize_session=False
+        )
+    cold_copies = [Path(path) for _, path in cold_rows]
+
+    def _drop_cold_copies(session):
+        for p in cold_copies:
+            p.unlink(missing_ok=True)
+
+    event.listen(db, "after_commit", _drop_cold_copies, once=True)
+    logger.info(f"Blob GC: {len(cold_rows)} cold blobs made hot again by an upload")
+    return restored
+
+
+def release_blobs(db: Session, counts: dict[str, int]):
+    """Drops references in bulk; blobs reaching zero get their zero_ref_at stamped."""
+    params = [
+        {"b_checksum": c, "b_n": n}
+        for c, n in sorted(counts.items())
+        if c and n
+    ]
+    if not params:
+        return
+    remaining = blobs.c.ref_count - bindparam("b_n")
+    db.execute(
+        blobs.update()
+        .where(blobs.c.checksum == bindparam("b_checksum"))
+        .values(
+            ref_count=remaining,
+            zero_ref_at=case((remaining <= 0, bindparam("b_now")), else_=blobs.c.zero_ref_at),
+        ),
+        [{**p, "b_now": _now()} for p in params],
+    )
+
+
+def release_artifacts(db: Session, artifact_query: Query):
+    """
+    Drops the references held by the artifacts matched by artifact_query.
+    Call it before deleting those rows (or their version).
+    """
+    rows = (
+        artifact_query
+        .with_entities(Artifact.checksum, func.count(Artifact.id))
+        .group_by(Artifact.checksum)
+        .all()
+    )
+    release_blobs(db, dict(rows))
+
+
+def release_versions(db: Session, *criteria):
+    """
+    Drops the references of every artifact of the versions matching criteria
+    (expressions on ModelVersion / Model). For deletes that remove versions
+    through bulk deletes or FK cascades (model, factory, algorithm).
+    """
+    release_artifacts(
+        db,
+        db.query(Artifact)
+        .join(ModelVersion, Artifact.version_id == ModelVersion.id)
+        .join(Model, ModelVersion.model_id == Model.id)
+        .filter(*criteria),
+    )
+
+
+def reset_blob_refs(db: Session, rows):
+    """
+    Overwrites ref_count with a recounted value for (checksum, path, size, count)
+    rows, creating missing index entries. Blobs recounted to zero keep their
+    existing zero_ref_at (or get one now) so the grace period still applies.
+    Callers must hold the blob rows locked while counting (see storage_reconciler).
+    """
+    now = _now()
+    params = [
+        {
+            "checksum": c,
+            "path": path,
+            "size": size,
+            "ref_count": n,
+            "zero_ref_at": now if n <= 0 else None,
+        }
+        for c, path, size, n in sorted(rows)
+    ]
+    if not params:
+        return
+
+    insert = _insert_for(db)
+    if insert is not None:
+        stmt = insert(blobs)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[blobs.c.checksum],
+            set_={
+                "ref_count": stmt.excluded.ref_count,
+                "zero_ref_at": case(
+                    (stmt.excluded.ref_count <= 0, func.coalesce(blobs.c.zero_ref_at, stmt.excluded.zero_ref_at)),
+                    else_=None,
+                ),
+            },
+        )
+        db.execute(stmt, params)
+        return
+
+    for p in params:
+        updated = db.execute(
+            blobs.update()
+            .where(blobs.c.checksum == p["checksum"])
+            .values(
+                ref_count=p["ref_count"],
+                zero_ref_at=func.coalesce(blobs.c.zero_ref_at, p["zero_ref_at"]) if p["ref_count"] <= 0 else None,
+            )
+        )
+        if not updated.rowcount:
+            db.execute(blobs.insert(), p)
+
+
+def sweep_zero_ref_blobs(
+    grace_seconds: int = GC_GRACE_SECONDS,
+    batch_size: int = GC_BATCH_SIZE,
+) -> dict:
+    """
+    Deletes blobs that have been unreferenced for at least grace_seconds.
+    Each batch locks its rows (skipping rows another sweeper holds), deletes
+    the ones still unreferenced and moves their files aside before
+    committing; the files are unlinked after the commit. Rows whose count
+    drifted to zero while artifacts still use them are recounted, not swept.
+    """
+    cutoff = _now() - timedelta(seconds=grace_seconds)
+    swept = freed = 0
+
+    db = SessionLocal()
+    try:
+        while True:
+            candidates = [
+                c for (c,) in (
+                    db.query(Blob.checksum)
+                    .filter(Blob.ref_count <= 0, Blob.zero_ref_at < cutoff)
+                    .order_by(Blob.checksum)
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ]
+            if not candidates:
+                break
+
+            # Only the rows this delete removed: a writer may have taken a
+            # reference since the select, and a count that drifted to zero
+            # while artifacts still point at the blob must not cost the file
+            referenced = select(Artifact.id).where(Artifact.checksum == blobs.c.checksum).exists()
+            deleted = db.execute(
+                blobs.delete()
+                .where(blobs.c.checksum.in_(candidates), blobs.c.ref_count <= 0, ~referenced)
+                .returning(blobs.c.path, blobs.c.size)
+            ).all()
+
+            # Drifted rows are recounted instead (the rows are still locked)
+            drifted = (
+                db.query(Artifact.checksum, func.min(Artifact.path), func.max(Artifact.size), func.count(Artifact.id))
+                .filter(Artifact.checksum.in_(candidates))
+                .group_by(Artifact.checksum)
+                .all()
+            )
+            if drifted:
+                reset_blob_refs(db, drifted)
+                logger.warning(f"Blob GC: recounted {len(drifted)} blobs still referenced by artifacts")
+
+            moved = []
+            for path, size in deleted:
+                doomed = Path(path).with_name(Path(path).name + GC_SUFFIX)
+                try:
+                    os.replace(path, doomed)
+                    moved.append((Path(path), doomed, size))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error(f"Blob GC: could not delete {path}: {e}")
+            try:
+                db.commit()
+            except Exception:
+                for path, doomed, _ in moved:
+                    os.replace(doomed, path)
+                raise
+
+            for _, doomed, size in moved:
+                try:
+                    doomed.unlink()
+                    freed += size or 0
+                except OSError as e:
+                    logger.error(f"Blob GC: could not delete {doomed}: {e}")
+            swept += len(deleted)
+    finally:
+        db.close()
+
+    if swept:
+        logger.info(f"Blob GC: swept {swept} unreferenced blobs ({freed} bytes)")
+    return {"swept": swept, "bytes_freed": freed}
+
+
+def backfill_blob_index():
+    """
+    Builds the blob index from existing artifact rows the first time the
+    blobs table is empty (upgrade from the per-file GC).
+    """
+    with engine.begin() as conn:
+        if conn.execute(select(blobs.c.checksum).limit(1)).first():
+            return
+        artifacts = Artifact.__table__
+        result = conn.execute(
+            blobs.insert().from_select(
+                ["checksum", "path", "size", "ref_count"],
+                select(
+                    artifacts.c.checksum,
+                    func.min(artifacts.c.path),
+                    func.max(artifacts.c.size),
+                    func.count(artifacts.c.id),
+                )
+                .where(artifacts.c.checksum.isnot(None), artifacts.c.path.isnot(None))
+                .group_by(artifacts.c.checksum),
+            )
+        )
+    if result.rowcount:
+        logger.info(f"Blob GC: indexed {result.rowcount} existing blobs")
@@ -0,0 +1,178 @@
+"""
+Denormalized counters read by the list endpoints:
+
+  factories.models_count, factories.algorithms_count
+  algorithms.models_count
+  models.versions_count
+  experiments.runs_count
+  model_versions.artifacts_count, model_versions.artifacts_bytes
+
+Writers adjust them in the same transaction that inserts or deletes the
+counted rows, the same way they take and drop blob references (blob_gc).
+Plain counts are applied as increments, which the row lock of the UPDATE keeps
+exact under concurrent writers. algorithms_count is a distinct count, so it is
+recounted while holding the factory row lock instead.
+
+Every change to the model, version and artifact counts also flags the
+affected factories for the dashboard aggregate refresh (dashboard_aggregates).
+
+recount_all rebuilds every counter from the base tables (migration backfill,
+repairs): python -m app.services.counters
+"""
+from collections import Counter
+
+from sqlalchemy import bindparam, func, text
+from sqlalchemy.orm import Query, Session
+
+from app.models.algorithm import Algorithm
+from app.models.artifact import Artifact
+from app.models.experiment import Experiment
+from app.models.factory import Factory
+from app.models.model import Model
+from app.models.version import ModelVersion
+from app.services.dashboard_aggregates import mark_dirty
+
+
+def _adjust(db: Session, model, columns: tuple[str, ...], deltas: dict):
+    """Adds deltas[id] (one value per column) to the counters of each row."""
+    table = model.__table__
+    params = [
+        {"b_id": row_id, **{f"b_{c}": d for c, d in zip(columns, values)}}
+        for row_id, values in sorted(deltas.items())  # sorted: same lock order for every writer
+        if row_id is not None and any(values)
+    ]
+    if not params:
+        return
+    db.execute(
+        table.update()
+        .where(table.c.id == bindparam("b_id"))
+        .values({c: table.c[c] + bindparam(f"b_{c}") for c in columns}),
+        params,
+    )
+
+
+def refresh_algorithm_counts(db: Session, factory_ids):
+    """
+    Recounts factories.algorithms_count: distinct algorithms of the factory's
+    models plus the algorithm that created it.
+    """
+    ids = sorted({f for f in factory_ids if f is not None})
+    if not ids:
+        return
+    creators = dict(
+        db.query(Factory.id, Factory.created_by_algorithm_id)
+        .filter(Factory.id.in_(ids))
+        .order_by(Factory.id)
+        .with_for_update()
+        .all()
+    )
+    algorithms = {f: set() for f in creators}
+    for factory_id, algorithm_id in (
+        db.query(Model.factory_id, Model.algorithm_id)
+        .filter(Model.factory_id.in_(ids))
+        .distinct()
+    ):
+        algorithms[factory_id].add(algorithm_id)
+    for factory_id, creator in creators.items():
+        if creator is not None:
+            algorithms[factory_id].add(creator)
+
+    mark_dirty(db, ids)
+    if not algorithms:
+        return
+    table = Factory.__table__
+    db.execute(
+        table.update().where(table.c.id == bindparam("b_id")).values(algorithms_count=bindparam("b_n")),
+        [{"b_id": f, "b_n": len(algorithms[f])} for f in sorted(algorithms)],
+    )
+
+
+def adjust_model_counts(db: Session, models, sign: int = 1):
+    """
+    Counts models added (sign=1) or removed (sign=-1), given as
+    (factory_id, algorithm_id) pairs. Call after the rows are written.
+    """
+    models = list(models)
+    by_factory = Counter(f for f, _ in models)
+    by_algorithm = Counter(a for _, a in models)
+    _adjust(db, Factory, ("models_count",), {f: (sign * n,) for f, n in by_factory.items()})
+    _adjust(db, Algorithm, ("models_count",), {a: (sign * n,) for a, n in by_algorithm.items()})
+    refresh_algorithm_counts(db, by_factory)
+
+
+def adjust_version_counts(db: Session, model_ids, sign: int = 1):
+    """Counts versions added or removed, one model_id per version."""
+    deltas = {m: (sign * n,) for m, n in Counter(model_ids).items()}
+    _adjust(db, Model, ("versions_count",), deltas)
+    mark_dirty(db, model_ids=deltas)
+
+
+def adjust_run_counts(db: Session, experiment_ids, sign: int = 1):
+    """Counts experiment runs added or removed, one experiment_id per run."""
+    _adjust(db, Experiment, ("runs_count",), {e: (sign * n,) for e, n in Counter(experiment_ids).items()})
+
+
+def adjust_artifact_counts(db: Session, artifacts, sign: int = 1):
+    """Counts Artifact objects or artifact row dicts added or removed."""
+    deltas = {}
+    for a in artifacts:
+        version_id, size = (a["version_id"], a["size"]) if isinstance(a, dict) else (a.version_id, a.size)
+        count, total = deltas.get(version_id, (0, 0))
+        deltas[version_id] = (count + sign, total + sign * (size or 0))
+    _adjust(db, ModelVersion, ("artifacts_count", "artifacts_bytes"), deltas)
+    mark_dirty(db, version_ids=deltas)
+
+
+def adjust_artifact_query_counts(db: Session, artifact_query: Query, sign: int = 1):
+    """
+    Counts the artifacts matched by artifact_query as added or removed. When
+    removing, call it before deleting those rows (next to
+    blob_gc.release_artifacts).
+    """
+    rows = (
+        artifact_query
+        .with_entities(Artifact.version_id, func.count(Artifact.id), func.coalesce(func.sum(Artifact.size), 0))
+        .group_by(Artifact.version_id)
+        .all()
+    )
+    deltas = {version_id: (sign * count, sign * int(total)) for version_id, count, total in rows}
+    _adjust(db, ModelVersion, ("artifacts_count", "artifacts_bytes"), deltas)
+    mark_dirty(db, version_ids=deltas)
+
+
+RECOUNT_STATEMENTS = [
+    """UPDATE model_versions SET
+        artifacts_count = (SELECT COUNT(*) FROM artifacts a WHERE a.version_id = model_versions.id),
+        artifacts_bytes = (SELECT COALESCE(SUM(a.size), 0) FROM artifacts a WHERE a.version_id = model_versions.id)""",
+    """UPDATE models SET
+        versions_count = (SELECT COUNT(*) FROM model_versions v WHERE v.model_id = models.id)""",
+    """UPDATE algorithms SET
+        models_count = (SELECT COUNT(*) FROM models m WHERE m.algorithm_id = algorithms.id)""",
+    """UPDATE factories SET
+        models_count = (SELECT COUNT(*) FROM models m WHERE m.factory_id = factories.id),
+        algorithms_count = (SELECT COUNT(DISTINCT m.algorithm_id) FROM models m WHERE m.factory_id = factories.id)
+            + CASE WHEN created_by_algorithm_id IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM models m
+                WHERE m.factory_id = factories.id AND m.algorithm_id = factories.created_by_algorithm_id
+            ) THEN 1 ELSE 0 END""",
+    """UPDATE experiments SET
+        runs_count = (SELECT COUNT(*) FROM experiment_runs r WHERE r.experiment_id = experiments.id)""",
+]
+
+
+def recount_all(conn):
+    """Rebuilds every counter from the base tables (conn: Connection or Session)."""
+    for statement in RECOUNT_STATEMENTS:
+        conn.execute(text(statement))
+
+
+def main():
+    from app.database import engine
+
+    with engine.begin() as conn:
+        recount_all(conn)
+    print("Counters rebuilt")
+
+
+if __name__ == "__main__":
+    main()
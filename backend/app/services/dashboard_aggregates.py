@@ -0,0 +1,328 @@
+"""
+Materialized dashboard aggregates (see app.models.dashboard_aggregate).
+
+Writers flag the factories they touch in their own transaction (mark_dirty,
+called by app.services.counters next to every counter change). The periodic
+refresh recomputes only the flagged factories, plus factories that have no
+row yet, then rebuilds the per-algorithm and system rows from the
+factory-level rows. The dashboard reads a few rows instead of joining
+artifacts through versions and models, at the cost of lagging writes by up to
+DASHBOARD_REFRESH_INTERVAL seconds. Change events (app.services.events) wake
+the refresh early after commits made in the same process.
+
+Full rebuild: python -m app.services.dashboard_aggregates
+"""
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, case, func, select, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.algorithm import Algorithm
+from app.models.artifact import Artifact
+from app.models.blob import Blob
+from app.models.dashboard_aggregate import DashboardAggregate
+from app.models.factory import Factory
+from app.models.model import Model
+from app.models.version import ModelVersion
+from app.services import response_cache, scheduler
+from app.utils.logger import logger
+
+DASHBOARD_REFRESH_INTERVAL_SECONDS = int(os.getenv("DASHBOARD_REFRESH_INTERVAL", "30"))
+
+# One refresher at a time across API processes (Postgres)
+REFRESH_LOCK_ID = 735_201_041
+
+ALL = 0  # factory_id / algorithm_id of the rows that span every factory / algorithm
+
+aggregates = DashboardAggregate.__table__
+COUNT_COLUMNS = ("factories", "algorithms", "models", "versions", "active_versions", "logical_bytes")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def mark_dirty(db: Session, factory_ids=(), *, model_ids=(), version_ids=()):
+    """
+    Flags the aggregates of the given factories, or of the factories owning
+    the given models / versions, for the next refresh.
+    """
+    ids = {f for f in factory_ids if f is not None}
+    model_ids = {m for m in model_ids if m is not None}
+    version_ids = {v for v in version_ids if v is not None}
+    if version_ids:
+        model_ids.update(
+            m for (m,) in db.query(ModelVersion.model_id).filter(ModelVersion.id.in_(version_ids)).distinct()
+        )
+    if model_ids:
+        ids.update(f for (f,) in db.query(Model.factory_id).filter(Model.id.in_(model_ids)).distinct())
+    if not ids:
+        return
+    # Written even when already flagged: the row lock orders this writer
+    # against a refresh clearing the flag (see refresh)
+    db.execute(
+        aggregates.update()
+        .where(aggregates.c.algorithm_id == ALL)
+        .where(aggregates.c.factory_id.in_(sorted(ids)))
+        .values(dirty=True)
+    )
+
+
+def _cell_rows(db: Session, factory_ids: list[int], now) -> list[dict]:
+    """(factory, algorithm) rows of the given factories, computed from the base tables."""
+    cells = {}
+
+    def cell(factory_id, algorithm_id):
+        return cells.setdefault(
+            (factory_id, algorithm_id),
+            {
+                "factory_id": factory_id,
+                "algorithm_id": algorithm_id,
+                "factories": 1,
+                "algorithms": 1,
+                "models": 0,
+                "versions": 0,
+                "active_versions": 0,
+                "logical_bytes": 0,
+                "physical_bytes": None,
+                "dirty": False,
+                "refreshed_at": now,
+            },
+        )
+
+    for factory_id, algorithm_id, models in (
+        db.query(Model.factory_id, Model.algorithm_id, func.count(Model.id))
+        .filter(Model.factory_id.in_(factory_ids), Model.algorithm_id.isnot(None))
+        .group_by(Model.factory_id, Model.algorithm_id)
+    ):
+        cell(factory_id, algorithm_id)["models"] = models
+
+    for factory_id, algorithm_id, versions, active, logical in (
+        db.query(
+            Model.factory_id,
+            Model.algorithm_id,
+            func.count(ModelVersion.id),
+            func.sum(case((ModelVersion.is_active == True, 1), else_=0)),
+            func.coalesce(func.sum(ModelVersion.artifacts_bytes), 0),
+        )
+        .join(Model, ModelVersion.model_id == Model.id)
+        .filter(Model.factory_id.in_(factory_ids), Model.algorithm_id.isnot(None))
+        .group_by(Model.factory_id, Model.algorithm_id)
+    ):
+        row = cell(factory_id, algorithm_id)
+        row.update(versions=versions, active_versions=int(active or 0), logical_bytes=int(logical))
+
+    return list(cells.values())
+
+
+def _physical_bytes(db: Session, factory_ids: list[int]) -> dict[int, int]:
+    """{factory_id: bytes of the distinct blobs its artifacts reference}."""
+    distinct_blobs = (
+        select(Model.factory_id, Artifact.checksum, Artifact.size)
+        .join(ModelVersion, Artifact.version_id == ModelVersion.id)
+        .join(Model, ModelVersion.model_id == Model.id)
+        .where(Model.factory_id.in_(factory_ids))
+        .distinct()
+        .subquery()
+    )
+    return {
+        f: int(total or 0)
+        for f, total in db.execute(
+            select(distinct_blobs.c.factory_id, func.sum(distinct_blobs.c.size))
+            .group_by(distinct_blobs.c.factory_id)
+        )
+    }
+
+
+def _replace(db: Session, rows: list[dict], existing: set[tuple[int, int]]):
+    """Writes computed rows, updating the ones that exist (their dirty flag is left alone)."""
+    updates = [r for r in rows if (r["factory_id"], r["algorithm_id"]) in existing]
+    inserts = [r for r in rows if (r["factory_id"], r["algorithm_id"]) not in existing]
+    if updates:
+        columns = (*COUNT_COLUMNS, "physical_bytes", "refreshed_at")
+        db.execute(
+            aggregates.update()
+            .where(aggregates.c.factory_id == bindparam("b_factory_id"))
+            .where(aggregates.c.algorithm_id == bindparam("b_algorithm_id"))
+            .values({c: bindparam(f"b_{c}") for c in columns}),
+            [{f"b_{k}": v for k, v in r.items() if k != "dirty"} for r in updates],
+        )
+    if inserts:
+        db.execute(aggregates.insert(), inserts)
+
+
+def refresh(full: bool = False) -> dict:
+    """
+    Recomputes the aggregates of dirty (or, with full=True, all) factories and
+    the per-algorithm and system rows. A no-op when nothing changed.
+    """
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            if not db.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": REFRESH_LOCK_ID}).scalar():
+                return {"skipped": True}
+
+        factory_ids = {f for (f,) in db.query(Factory.id)}
+        factory_rows = dict(
+            db.query(aggregates.c.factory_id, aggregates.c.dirty)
+            .filter(aggregates.c.algorithm_id == ALL, aggregates.c.factory_id != ALL)
+        )
+        stale = sorted(f for f in factory_ids if full or factory_rows.get(f, True))
+        removed = sorted(set(factory_rows) - factory_ids)
+        system = db.get(DashboardAggregate, (ALL, ALL))
+        if (
+            not stale
+            and not removed
+            and system is not None
+            and system.factories == len(factory_ids)
+            and system.algorithms == db.query(func.count(Algorithm.id)).scalar()
+        ):
+            return {"factories_refreshed": 0, "factories_removed": 0}
+
+        now = _now()
+        if removed:
+            db.execute(aggregates.delete().where(aggregates.c.factory_id.in_(removed)))
+
+        for i in range(0, len(stale), 500):
+            batch = stale[i : i + 500]
+            # Cleared before the reads below, each of which sees the data
+            # committed when it starts: a writer flagging one of these
+            # factories either committed before the clear (the reads see its
+            # change) or waits on the row lock and flags it again after our
+            # commit, for the next refresh
+            db.execute(
+                aggregates.update()
+                .where(aggregates.c.algorithm_id == ALL, aggregates.c.factory_id.in_(batch))
+                .values(dirty=False)
+            )
+            db.execute(
+                aggregates.delete()
+                .where(aggregates.c.algorithm_id != ALL, aggregates.c.factory_id.in_(batch))
+            )
+            cells = _cell_rows(db, batch, now)
+            if cells:
+                db.execute(aggregates.insert(), cells)
+
+            physical = _physical_bytes(db, batch)
+            totals = {
+                f: {
+                    "factory_id": f,
+                    "algorithm_id": ALL,
+                    "factories": 1,
+                    "algorithms": 0,
+                    "models": 0,
+                    "versions": 0,
+                    "active_versions": 0,
+                    "logical_bytes": 0,
+                    "physical_bytes": physical.get(f, 0),
+                    "dirty": False,
+                    "refreshed_at": now,
+                }
+                for f in batch
+            }
+            for c in cells:
+                row = totals[c["factory_id"]]
+                row["algorithms"] += 1 if c["models"] else 0
+                for column in ("models", "versions", "active_versions", "logical_bytes"):
+                    row[column] += c[column]
+            _replace(db, list(totals.values()), {(f, ALL) for f in batch if f in factory_rows})
+
+        # Per-algorithm rows, summed over the (factory, algorithm) cells
+        db.execute(aggregates.delete().where(aggregates.c.factory_id == ALL, aggregates.c.algorithm_id != ALL))
+        by_algorithm = (
+            db.query(
+                aggregates.c.algorithm_id,
+                func.sum(case((aggregates.c.models > 0, 1), else_=0)),
+                func.sum(aggregates.c.models),
+                func.sum(aggregates.c.versions),
+                func.sum(aggregates.c.active_versions),
+                func.sum(aggregates.c.logical_bytes),
+            )
+            .filter(aggregates.c.factory_id != ALL, aggregates.c.algorithm_id != ALL)
+            .group_by(aggregates.c.algorithm_id)
+            .all()
+        )
+        if by_algorithm:
+            db.execute(
+                aggregates.insert(),
+                [
+                    {
+                        "factory_id": ALL,
+                        "algorithm_id": a,
+                        "factories": int(factories),
+                        "algorithms": 1,
+                        "models": int(models),
+                        "versions": int(versions),
+                        "active_versions": int(active),
+                        "logical_bytes": int(logical),
+                        "physical_bytes": None,
+                        "dirty": False,
+                        "refreshed_at": now,
+                    }
+                    for a, factories, models, versions, active, logical in by_algorithm
+                ],
+            )
+
+        # System row
+        models, versions, active, logical = (
+            db.query(
+                func.coalesce(func.sum(aggregates.c.models), 0),
+                func.coalesce(func.sum(aggregates.c.versions), 0),
+                func.coalesce(func.sum(aggregates.c.active_versions), 0),
+                func.coalesce(func.sum(aggregates.c.logical_bytes), 0),
+            )
+            .filter(aggregates.c.factory_id != ALL, aggregates.c.algorithm_id == ALL)
+            .one()
+        )
+        physical = db.query(func.coalesce(func.sum(Blob.size), 0)).filter(Blob.ref_count > 0).scalar()
+        _replace(
+            db,
+            [{
+                "factory_id": ALL,
+                "algorithm_id": ALL,
+                "factories": len(factory_ids),
+                "algorithms": db.query(func.count(Algorithm.id)).scalar(),
+                "models": int(models),
+                "versions": int(versions),
+                "active_versions": int(active),
+                "logical_bytes": int(logical),
+                "physical_bytes": int(physical),
+                "dirty": False,
+                "refreshed_at": now,
+            }],
+            {(ALL, ALL)} if system is not None else set(),
+        )
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    response_cache.invalidate()
+    if stale or removed:
+        logger.info(f"Dashboard aggregates: refreshed {len(stale)} factories, removed {len(removed)}")
+    return {"factories_refreshed": len(stale), "factories_removed": len(removed)}
+
+
+def get_aggregate(db: Session, factory_id: int = ALL, algorithm_id: int = ALL) -> DashboardAggregate | None:
+    """
+    The aggregate row of a scope. None if the row is missing (first start, or
+    a factory created since the last refresh); the refresher is woken instead
+    of refreshing inline, and its commit invalidates the cached responses.
+    """
+    row = db.get(DashboardAggregate, (factory_id, algorithm_id))
+    if row is None:
+        scheduler.wake("dashboard-aggregates")
+    return row
+
+
+def main():
+    print(refresh(full=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Registry change events: factory / model / version created, updated, deleted
+and checked out.
+
+Writers call emit() before committing; the event is a change_events row in
+the writer's own transaction, so it exists exactly when the change does.
+After the commit the session's events are handed to in-process subscribers
+(subscribe(callback)) and wake the local activity streams. Subscribers run
+on the writer's thread after its commit: keep them cheap (invalidate a cache,
+wake a scheduled task) and never let them write to the registry.
+
+Other API processes and ingest workers see the same events by tailing the
+table (stream_events), which is what the live activity endpoint does.
+prune() drops events older than EVENT_RETENTION_DAYS.
+
+Event ids are allocated at flush time but become visible at commit, so on
+Postgres a higher id can be visible before a lower one. A stream never moves
+its cursor past a missing id until it has seen the gap for
+EVENT_SETTLE_SECONDS (time enough for the lower id's transaction to commit,
+or for a rolled-back id to be given up on), so late commits are delivered
+once and in id order, including after a Last-Event-ID resume. The wait is
+timed by the stream itself, not by created_at, which is stamped at emit time
+and says nothing about how long the transaction stayed open.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models.change_event import ChangeEvent
+from app.models.model import Model
+from app.utils.logger import logger
+
+EVENT_RETENTION_DAYS = int(os.getenv("EVENT_RETENTION_DAYS", "7"))
+EVENT_PRUNE_INTERVAL_SECONDS = int(os.getenv("EVENT_PRUNE_INTERVAL", "3600"))
+EVENT_POLL_INTERVAL = float(os.getenv("EVENT_POLL_INTERVAL", "2"))  # seconds between table polls of a stream
+EVENT_SETTLE_SECONDS = float(os.getenv("EVENT_SETTLE_SECONDS", "10"))  # wait for a missing id to commit
+EVENT_STREAM_BATCH = 500
+
+_PENDING = "change_events"             # session.info: emitted, not flushed yet
+_FLUSHED = "change_events_flushed"     # session.info: serialized, waiting for the commit
+
+_subscribers: list[Callable[[list[dict]], object]] = []
+_streams: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()  # wakeups of the local streams
+_streams_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def emit(
+    db: Session,
+    kind: str,
+    *,
+    factory_id: int | None = None,
+    algorithm_id: int | None = None,
+    model_id: int | None = None,
+    version_id: int | None = None,
+    **data,
+) -> ChangeEvent:
+    """
+    Records a change event (kind: "<entity>.<action>", e.g. "version.created")
+    in the session's transaction. Extra keyword arguments are the event's
+    JSON payload.
+    """
+    change = ChangeEvent(
+        kind=kind,
+        factory_id=factory_id,
+        algorithm_id=algorithm_id,
+        model_id=model_id,
+        version_id=version_id,
+        data=data,
+        created_at=_now(),
+    )
+    db.add(change)
+    db.info.setdefault(_PENDING, []).append(change)
+    return change
+
+
+def emit_for_model(db: Session, kind: str, model_id: int, **fields) -> ChangeEvent:
+    """emit() scoped to a model's factory and algorithm (version events)."""
+    scope = db.query(Model.factory_id, Model.algorithm_id).filter(Model.id == model_id).first()
+    factory_id, algorithm_id = scope if scope else (None, None)
+    return emit(db, kind, factory_id=factory_id, algorithm_id=algorithm_id, model_id=model_id, **fields)
+
+
+def serialize(change: ChangeEvent) -> dict:
+    return {
+        "id": change.id,
+        "kind": change.kind,
+        "factory_id": change.factory_id,
+        "algorithm_id": change.algorithm_id,
+        "model_id": change.model_id,
+        "version_id": change.version_id,
+        "data": change.data or {},
+        "created_at": change.created_at.isoformat() if change.created_at else None,
+    }
+
+
+def subscribe(callback: Callable[[list[dict]], object]):
+    """Calls callback(events) after every commit that emitted events in this process."""
+    _subscribers.append(callback)
+
+
+# Ids only exist after the flush, and the objects are expired by the commit,
+# so events are serialized right after the flush that inserts them
+@event.listens_for(Session, "after_flush")
+def _serialize_flushed(session, flush_context):
+    pending = session.info.get(_PENDING)
+    if not pending:
+        return
+    flushed = session.info.setdefault(_FLUSHED, [])
+    still_pending = []
+    for change in pending:
+        if change.id is None:
+            still_pending.append(change)
+        else:
+            flushed.append(serialize(change))
+    session.info[_PENDING] = still_pending
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session):
+    batch = session.info.pop(_FLUSHED, None)
+    session.info.pop(_PENDING, None)
+    if not batch:
+        return
+    for callback in list(_subscribers):
+        try:
+            callback(batch)
+        except Exception as e:
+            logger.error(f"Change event subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+    with _streams_lock:
+        streams = list(_streams)
+    for loop, wakeup in streams:
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:  # loop closed
+            pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_FLUSHED, None)
+    session.info.pop(_PENDING, None)
+
+
+def latest_id(db: Session) -> int:
+    return db.query(func.max(ChangeEvent.id)).scalar() or 0
+
+
+def _poll(
+    last_id: int, factory_id: int | None, gaps: dict[int, float], settle_seconds: float,
+) -> tuple[list[dict], int, bool]:
+    """
+    (events to send, new cursor, more to read) after last_id. Reads the
+    unfiltered log so id gaps are visible, and stops before a gap this stream
+    first saw less than settle_seconds ago. gaps maps the id before a gap to
+    when the stream first saw it (time.monotonic) and is kept by the caller
+    across polls.
+    """
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ChangeEvent)
+            .filter(ChangeEvent.id > last_id)
+            .order_by(ChangeEvent.id)
+            .limit(EVENT_STREAM_BATCH)
+            .all()
+        )
+        # Every gap in the batch starts its wait now, so a resume over old
+        # rolled-back ids waits once per batch rather than once per gap
+        now = time.monotonic()
+        previous = last_id
+        for change in rows:
+            if change.id != previous + 1:
+                gaps.setdefault(previous, now)
+            previous = change.id
+
+        batch = []
+        held = False
+        for change in rows:
+            if change.id != last_id + 1 and now - gaps[last_id] < settle_seconds:
+                held = True
+                break
+            last_id = change.id
+            if factory_id is None or change.factory_id == factory_id:
+                batch.append(serialize(change))
+        # Gaps the cursor has moved past are done with
+        for gap in [g for g in gaps if g < last_id]:
+            del gaps[gap]
+        return batch, last_id, not held and len(rows) == EVENT_STREAM_BATCH
+    finally:
+        db.close()
+
+
+def _latest_id() -> int:
+    db = SessionLocal()
+    try:
+        return latest_id(db)
+    finally:
+        db.close()
+
+
+async def stream_events(
+    last_id: int | None = None,
+    factory_id: int | None = None,
+    poll_interval: float = EVENT_POLL_INTERVAL,
+    keepalive: float = 15.0,
+    settle_seconds: float = EVENT_SETTLE_SECONDS,
+):
+    """
+    Server-Sent Events of the change log after last_id (from now on when
+    None), optionally restricted to one factory. Every event carries its id,
+    so a reconnecting EventSource resumes from Last-Event-ID. Commits in this
+    process wake the stream at once; changes made by other processes show up
+    within poll_interval. The polls run in the threadpool, so an idle stream
+    holds no worker thread.
+    """
+    if last_id is None:
+        last_id = await run_in_threadpool(_latest_id)
+    last_sent = time.monotonic()
+    yield "retry: 3000\n\n"
+
+    gaps = {}  # id before a missing id -> when this stream first saw the gap
+    wakeup = asyncio.Event()
+    stream = (asyncio.get_running_loop(), wakeup)
+    with _streams_lock:
+        _streams.add(stream)
+    try:
+        while True:
+            wakeup.clear()
+            batch, last_id, more = await run_in_threadpool(_poll, last_id, factory_id, gaps, settle_seconds)
+
+            for change in batch:
+                yield f"id: {change['id']}\nevent: {change['kind']}\ndata: {json.dumps(change)}\n\n"
+            now = time.monotonic()
+            if batch:
+                last_sent = now
+            if more:
+                continue
+            if not batch and now - last_sent >= keepalive:
+                yield ": keepalive\n\n"
+                last_sent = now
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        with _streams_lock:
+            _streams.discard(stream)
+
+
+def prune() -> int:
+    """Deletes events older than EVENT_RETENTION_DAYS. Returns the number deleted."""
+    db = SessionLocal()
+    try:
+        deleted = (
+            db.query(ChangeEvent)
+            .filter(ChangeEvent.created_at < _now() - timedelta(days=EVENT_RETENTION_DAYS))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if deleted:
+        logger.info(f"Change events pruned: {deleted}")
+    return deleted
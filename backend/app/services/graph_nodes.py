@@ -110,6 +110,10 @@ def handle_download_interactive(q: str, context: Optional[List[Dict[str, Any]]],
 def db_session_from_config(config: RunnableConfig) -> Session:
     return config["configurable"]["db_session"]
 
+def read_session_from_config(config: RunnableConfig) -> Session:
+    """Session for the generated read-only SQL (the read replica when the caller passed one)."""
+    return config["configurable"].get("read_session") or db_session_from_config(config)
+
 def detect_table_download_intent(user_question: str, context: List[Dict[str, Any]]) -> Optional[str]:
     """Dynamically checks if the user wants to download the table in the last bot response."""
     last_bot_msg = None
@@ -480,16 +484,18 @@ def sql_executor_node(state: ChatbotState, config: RunnableConfig) -> Dict[str,
         return {"latest_error": "No SQL generated", "error_count": state["error_count"] + 3}
 
     schema_provider = SchemaProvider.from_session(db_session)
-    validation = validate_sql(state["sql_query"], schema_provider)
+    dialect = "sqlite" if db_session.get_bind().dialect.name == "sqlite" else "postgres"
+    validation = validate_sql(state["sql_query"], schema_provider, dialect=dialect)
     
     if not validation["valid"]:
         return {"latest_error": ", ".join(validation["errors"]), "error_count": state["error_count"] + 1, "sql_results": None}
         
+    read_session = read_session_from_config(config)
     try:
-        query_results = execute_query(validation["sql"], db_session)
+        query_results = execute_query(validation["sql"], read_session)
         return {"sql_results": query_results, "latest_error": None, "sql_query": validation["sql"]}
     except Exception as e:
-        db_session.rollback()
+        read_session.rollback()
         return {"latest_error": str(e), "error_count": state["error_count"] + 1, "sql_results": None}
 
 def response_composer_node(state: ChatbotState, config: RunnableConfig) -> Dict[str, Any]:
@@ -0,0 +1,140 @@
+"""
+Progress reporting for ingest jobs and chunked upload sessions.
+
+Counters live on the IngestJob row so every API worker and ingest process
+sees the same numbers. Writes go through their own short-lived session, so
+reporting never commits (or waits on) the caller's transaction.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models.ingest_job import IngestJob
+
+COUNTERS = (
+    "files_received",
+    "files_processed",
+    "bytes_received",
+    "bytes_hashed",
+    "bytes_deduped",
+    "bytes_written",
+    "rows_flushed",
+)
+TERMINAL_STATUSES = ("completed", "failed", "closed")
+
+
+class ProgressReporter:
+    """
+    Buffers counter increments and flushes them as a single atomic
+    `UPDATE ... SET col = col + n` at most every `interval` seconds.
+    A reporter for job_id=None is a no-op, so callers don't need to branch.
+    """
+
+    def __init__(self, job_id: int | None, interval: float = 0.5):
+        self.job_id = job_id
+        self.interval = interval
+        self._pending = defaultdict(int)
+        self._stage = None
+        self._last_flush = time.monotonic()
+
+    def add(self, **counters):
+        if self.job_id is None:
+            return
+        for name, value in counters.items():
+            self._pending[name] += value
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def stage(self, stage: str):
+        if self.job_id is None:
+            return
+        self._stage = stage
+        self.flush()
+
+    def flush(self):
+        if self.job_id is None:
+            return
+        values = {
+            getattr(IngestJob, name): getattr(IngestJob, name) + value
+            for name, value in self._pending.items()
+            if value
+        }
+        values[IngestJob.heartbeat_at] = datetime.now(timezone.utc)
+        if self._stage is not None:
+            values[IngestJob.stage] = self._stage
+
+        db = SessionLocal()
+        try:
+            db.query(IngestJob).filter(IngestJob.id == self.job_id).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        self._pending.clear()
+        self._stage = None
+        self._last_flush = time.monotonic()
+
+
+def _snapshot(job: IngestJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "version_id": job.version_id,
+        "error": job.error,
+        **{name: getattr(job, name) or 0 for name in COUNTERS},
+    }
+
+
+def _load(job_id: int) -> dict | None:
+    db = SessionLocal()
+    try:
+        job = db.query(IngestJob).filter(IngestJob.id == job_id).first()
+        return _snapshot(job) if job else None
+    finally:
+        db.close()
+
+
+async def stream_job_events(job_id: int, poll_interval: float = 0.5, keepalive: float = 15.0):
+    """
+    Server-Sent Events for one job/session. Emits a `progress` event whenever
+    the counters change, with per-second rates computed between snapshots so
+    the client can size its chunks, and a final `done` event. Polls run in
+    the threadpool, so a watching client holds no worker thread between them.
+    """
+    previous = None
+    previous_at = time.monotonic()
+    last_sent = time.monotonic()
+
+    while True:
+        snapshot = await run_in_threadpool(_load, job_id)
+
+        if snapshot is None:
+            yield f"event: error\ndata: {json.dumps({'detail': 'Ingest job not found'})}\n\n"
+            return
+
+        now = time.monotonic()
+        if snapshot != previous:
+            elapsed = max(now - previous_at, 1e-6)
+            snapshot["rates"] = {
+                f"{name}_per_sec": round((snapshot[name] - previous[name]) / elapsed, 1)
+                for name in ("bytes_hashed", "bytes_written", "rows_flushed")
+            } if previous else {}
+            yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+            snapshot.pop("rates")
+            previous, previous_at, last_sent = snapshot, now, now
+        elif now - last_sent >= keepalive:
+            yield ": keepalive\n\n"
+            last_sent = now
+
+        if snapshot["status"] in TERMINAL_STATUSES:
+            yield f"event: done\ndata: {json.dumps(snapshot)}\n\n"
+            return
+
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,234 @@
+"""
+Durable ingest queue for large version uploads.
+
+The HTTP handler only streams the files into storage/staging and inserts an
+IngestJob row. Workers (threads inside the API process and/or standalone
+processes started with `python -m app.services.ingest_queue --workers N`)
+claim queued jobs from the database, hash and store the staged files, and
+finalize the version in a single transaction.
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from multiprocessing import Process
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+from app.models.ingest_job import IngestJob
+from app.schemas.version import VersionManifest
+from app.services.blob_gc import restore_blobs
+from app.services.ingest_progress import ProgressReporter
+from app.services import response_cache
+from app.services.version_registry import register_versions
+from app.utils.logger import logger
+from app.utils.storage import cache_path_for, place_blob
+
+POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "1.0"))
+STALE_AFTER_SECONDS = int(os.getenv("INGEST_STALE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+HASH_CHUNK = 1024 * 1024
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def claim_next_job(db: Session, worker_id: str) -> IngestJob | None:
+    """
+    Atomically moves the oldest queued job to "running".
+    The conditional UPDATE works the same on Postgres and SQLite: if another
+    worker claimed the row first, rowcount is 0 and we try the next one.
+    """
+    while True:
+        candidate = (
+            db.query(IngestJob.id)
+            .filter(IngestJob.status == "queued")
+            .order_by(IngestJob.id.asc())
+            .first()
+        )
+        if not candidate:
+            return None
+
+        claimed = (
+            db.query(IngestJob)
+            .filter(IngestJob.id == candidate.id, IngestJob.status == "queued")
+            .update(
+                {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "attempts": IngestJob.attempts + 1,
+                    "stage": "claimed",
+                    "started_at": _now(),
+                    "heartbeat_at": _now(),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if claimed == 1:
+            return db.get(IngestJob, candidate.id)
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """Re-queues running jobs whose worker stopped sending heartbeats."""
+    cutoff = _now() - timedelta(seconds=STALE_AFTER_SECONDS)
+    stale = (
+        db.query(IngestJob)
+        .filter(IngestJob.status == "running", IngestJob.heartbeat_at < cutoff)
+        .all()
+    )
+    for job in stale:
+        if (job.attempts or 0) >= MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error = f"Worker {job.worker_id} stopped responding ({job.attempts} attempts)"
+            job.finished_at = _now()
+        else:
+            job.status = "queued"
+            job.worker_id = None
+    db.commit()
+    return len(stale)
+
+
+def process_job(db: Session, job: IngestJob):
+    """Hashes + stores the staged files, then creates the version atomically."""
+    meta = dict(job.manifest or {})
+    files = meta.pop("files", [])
+    reporter = ProgressReporter(job.id)
+    reporter.stage("hashing")
+
+    stored = {}  # checksum -> (path, size)
+    sources = {}  # store path -> staged file (restore_blobs)
+    refs = []
+    new_files_on_disk = []
+
+    try:
+        for f in files:
+            staged = Path(f["path"])
+            hasher = hashlib.sha256()
+            size = 0
+            with open(staged, "rb") as fh:
+                while chunk := fh.read(HASH_CHUNK):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    reporter.add(bytes_hashed=len(chunk))
+            checksum = hasher.hexdigest()
+
+            cache_path = cache_path_for(checksum)
+            if checksum in stored or cache_path.exists():
+                reporter.add(bytes_deduped=size)
+            else:
+                place_blob(staged, cache_path)
+                new_files_on_disk.append(cache_path)
+                reporter.add(bytes_written=size)
+
+            stored[checksum] = (str(cache_path), size)
+            sources[str(cache_path)] = staged
+            refs.append({"name": f["name"], "type": f["type"], "checksum": checksum})
+            reporter.add(files_processed=1)
+
+        # -------------------------------
+        # Finalize (one transaction)
+        # -------------------------------
+        reporter.stage("finalizing")
+
+        meta["artifacts"] = list(meta.get("artifacts") or []) + refs
+        [version] = register_versions(
+            db, [VersionManifest(model_id=job.model_id, **meta)], known_blobs=stored
+        )
+        new_files_on_disk.extend(restore_blobs(db, sources))
+        job.version_id = version.id
+        job.status = "completed"
+        job.stage = "completed"
+        job.finished_at = _now()
+        # In the terminal commit, so the stream's "done" event has the final count
+        job.rows_flushed = func.coalesce(IngestJob.rows_flushed, 0) + len(meta["artifacts"]) + 2  # artifacts + version + delta
+        db.commit()
+        response_cache.invalidate()
+
+        shutil.rmtree(job.staging_dir, ignore_errors=True)
+        logger.info(f"Ingest job {job.id} completed: version {version.version_number} (Model ID: {job.model_id}, Version ID: {version.id})")
+
+    except Exception as e:
+        db.rollback()
+        for p in new_files_on_disk:
+            try: p.unlink()
+            except: pass
+        job = db.get(IngestJob, job.id)
+        job.status = "failed"
+        job.stage = "failed"
+        job.error = str(getattr(e, "detail", e))
+        job.finished_at = _now()
+        db.commit()
+        shutil.rmtree(job.staging_dir, ignore_errors=True)
+        logger.error(f"Ingest job {job.id} failed: {job.error}")
+
+
+def run_worker(worker_id: str | None = None, stop_event: threading.Event | None = None):
+    """Polls the queue until stop_event is set."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    stop_event = stop_event or threading.Event()
+    last_reap = 0.0
+    logger.info(f"Ingest worker started: {worker_id}")
+
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            if time.monotonic() - last_reap > STALE_AFTER_SECONDS / 2:
+                requeue_stale_jobs(db)
+                last_reap = time.monotonic()
+
+            job = claim_next_job(db, worker_id)
+            if job:
+                process_job(db, job)
+                continue
+        except Exception as e:
+            logger.error(f"Ingest worker {worker_id} error: {e}")
+        finally:
+            db.close()
+        stop_event.wait(POLL_INTERVAL)
+
+
+def start_worker_threads(count: int) -> threading.Event:
+    """Starts in-process worker threads; set the returned event to stop them."""
+    stop_event = threading.Event()
+    for i in range(count):
+        threading.Thread(
+            target=run_worker,
+            kwargs={"worker_id": f"{socket.gethostname()}:{os.getpid()}:t{i}", "stop_event": stop_event},
+            daemon=True,
+        ).start()
+    return stop_event
+
+
+def _worker_process():
+    # Don't reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    run_worker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ingest queue workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    procs = [Process(target=_worker_process, daemon=True) for _ in range(args.workers)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from app.services.llm_service import call_llm, parse_json_from_llm
 from app.models.algorithm import Algorithm
 from app.models.factory import Factory
 from app.models.model import Model
+from app.services.counters import adjust_model_counts, refresh_algorithm_counts
 
 def process_creation_flow(entity_type: str, context: List[Dict[str, Any]], current_question: str, db_session: Session) -> Dict[str, Any]:
     """
@@ -167,6 +168,8 @@ Do NOT wrap in markdown backticks. Do NOT write any explanations.
         
         factory = Factory(name=name, description=desc, created_by_algorithm_id=created_by_algo_id)
         db_session.add(factory)
+        db_session.flush()
+        refresh_algorithm_counts(db_session, [factory.id])
         db_session.commit()
         if created_by_algo_id:
             return {"type": "complete", "message": f"🎉 Factory **{name}** has been successfully created inside the **{algo.name}** algorithm!", "success": True}
@@ -187,6 +190,8 @@ Do NOT wrap in markdown backticks. Do NOT write any explanations.
 
         model = Model(name=name, description=desc, algorithm_id=algo.id, factory_id=factory.id)
         db_session.add(model)
+        db_session.flush()
+        adjust_model_counts(db_session, [(factory.id, algo.id)])
         db_session.commit()
         return {"type": "complete", "message": f"🎉 Model **{name}** has been successfully registered under the {algo.name} algorithm and {factory.name} factory!", "success": True}
 
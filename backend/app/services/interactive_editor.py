@@ -7,6 +7,9 @@ from app.models.algorithm import Algorithm
 from app.models.factory import Factory
 from app.models.model import Model
 from app.models.version import ModelVersion
+from app.services.events import emit_for_model
+from app.services.leaderboard import refresh_models
+from app.services.metrics_store import sync_version_metrics
 
 def process_edit_flow(
     entity_type: str,
@@ -165,6 +168,12 @@ Do NOT wrap in markdown backticks. Do NOT write any explanations.
                 
             from sqlalchemy.orm.attributes import flag_modified
             flag_modified(version, "parameters")
+            sync_version_metrics(db_session, [version])
+            refresh_models(db_session, [version.model_id])
+            emit_for_model(
+                db_session, "version.updated", version.model_id,
+                version_id=version.id, version_number=version.version_number,
+            )
             
             db_session.commit()
             return {"type": "complete", "message": f"Version **{version.version_number}** of **{model.name}** has been updated.", "success": True}
@@ -0,0 +1,353 @@
+"""
+Leaderboards: the best active versions per metric, overall and per factory,
+algorithm and factory x algorithm.
+
+The top LEADERBOARD_TOP_K of every group are kept in leaderboard_entries.
+Version writers call refresh_models (or refresh_groups) after their changes,
+in their own transaction; that recomputes only the groups of the touched
+models, with one query per metric and level served by the partial indexes on
+the active versions' metric columns. refresh_all rebuilds every group on a
+schedule.
+
+On Postgres every group has its own advisory lock, taken in key order, so
+writers to different factories / algorithms do not wait for each other. The
+overall groups, which every writer touches, are only try-locked: a writer
+that finds them busy leaves them alone and, after its commit, wakes the
+"leaderboard-overall" task (refresh_overall) to recompute them.
+
+Rebuild: python -m app.services.leaderboard
+"""
+import os
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, event, func, or_, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.algorithm import Algorithm
+from app.models.factory import Factory
+from app.models.leaderboard_entry import LeaderboardEntry
+from app.models.model import Model
+from app.models.version import ModelVersion
+from app.services import response_cache, scheduler
+from app.utils.logger import logger
+
+LEADERBOARD_TOP_K = int(os.getenv("LEADERBOARD_TOP_K", "10"))
+LEADERBOARD_REFRESH_INTERVAL_SECONDS = int(os.getenv("LEADERBOARD_REFRESH_INTERVAL", "600"))
+
+# Namespace of the advisory locks (two-key form, Postgres): REBUILD_KEY is held
+# shared by group refreshes and exclusively by the full rebuild, and every
+# group has its own key (_group_key)
+LEADERBOARD_LOCK_ID = 735_201_047
+REBUILD_KEY = 0
+
+ALL = 0  # factory_id / algorithm_id of the groups that span every factory / algorithm
+
+# metric -> True when higher is better
+METRICS = {
+    "accuracy": True,
+    "precision": True,
+    "recall": True,
+    "f1_score": True,
+    "inference_time": False,
+}
+
+# level -> grouping columns (factory_id, algorithm_id); None means ALL
+LEVELS = {
+    "all": (None, None),
+    "factory": (Model.factory_id, None),
+    "algorithm": (None, Model.algorithm_id),
+    "pair": (Model.factory_id, Model.algorithm_id),
+}
+
+entries = LeaderboardEntry.__table__
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _ranked(db: Session, metric: str, level: str, criteria=(), limit: int = LEADERBOARD_TOP_K) -> list[dict]:
+    """
+    Entry rows of the top `limit` active versions of every group of a level,
+    restricted by criteria. The single "all" group is an indexed ORDER BY
+    ... LIMIT; the grouped levels rank with ROW_NUMBER() per group.
+    """
+    column = getattr(ModelVersion, metric)
+    order = (column.desc() if METRICS[metric] else column.asc(), ModelVersion.id)
+    factory_column, algorithm_column = LEVELS[level]
+    partition = [c for c in (factory_column, algorithm_column) if c is not None]
+    query = (
+        db.query(
+            ModelVersion.id.label("version_id"),
+            ModelVersion.model_id,
+            Model.factory_id,
+            Model.algorithm_id,
+            column.label("value"),
+        )
+        .join(Model, Model.id == ModelVersion.model_id)
+        .filter(ModelVersion.is_active == True, column.isnot(None), Model.algorithm_id.isnot(None), *criteria)
+    )
+
+    if partition:
+        ranked = query.add_columns(
+            func.row_number().over(partition_by=partition, order_by=order).label("position")
+        ).subquery()
+        rows = db.query(ranked).filter(ranked.c.position <= limit).all()
+    else:
+        rows = [
+            (*r, position)
+            for position, r in enumerate(query.order_by(*order).limit(limit).all(), start=1)
+        ]
+
+    return [
+        {
+            "metric": metric,
+            "factory_id": factory_id if factory_column is not None else ALL,
+            "algorithm_id": algorithm_id if algorithm_column is not None else ALL,
+            "rank": position,
+            "version_id": version_id,
+            "model_id": model_id,
+            "value": value,
+        }
+        for version_id, model_id, factory_id, algorithm_id, value, position in rows
+    ]
+
+
+def _group_key(factory_id: int, algorithm_id: int) -> int:
+    """Lock key of a group (a collision only serializes two unrelated groups)."""
+    return zlib.crc32(f"{factory_id}:{algorithm_id}".encode()) % 2_147_483_646 + 1
+
+
+def _lock(db: Session, groups):
+    """Takes the rebuild lock (shared) and the locks of the (factory_id, algorithm_id) groups, in key order."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(
+        text("SELECT pg_advisory_xact_lock_shared(:ns, :key)"), {"ns": LEADERBOARD_LOCK_ID, "key": REBUILD_KEY}
+    )
+    for key in sorted({_group_key(*g) for g in groups}):
+        db.execute(text("SELECT pg_advisory_xact_lock(:ns, :key)"), {"ns": LEADERBOARD_LOCK_ID, "key": key})
+
+
+def _try_lock(db: Session, key: int) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:ns, :key)"), {"ns": LEADERBOARD_LOCK_ID, "key": key}
+    ).scalar()
+
+
+def _wake_overall(session):
+    scheduler.wake("leaderboard-overall")
+
+
+def refresh_groups(db: Session, pairs):
+    """
+    Recomputes the leaderboards a change to models of the given
+    (factory_id, algorithm_id) pairs can affect: overall, their factories,
+    their algorithms and the pairs themselves. Also call it with the pairs
+    of models a delete removed.
+    """
+    pairs = sorted({(f, a) for f, a in pairs if f is not None and a is not None})
+    if not pairs:
+        return
+    db.flush()
+    factories = sorted({f for f, _ in pairs})
+    algorithms = sorted({a for _, a in pairs})
+    _lock(db, [*((f, ALL) for f in factories), *((ALL, a) for a in algorithms), *pairs])
+    overall = _try_lock(db, _group_key(ALL, ALL))
+    if not overall:
+        event.listen(db, "after_commit", _wake_overall, once=True)
+
+    groups = [
+        and_(entries.c.factory_id.in_(factories), entries.c.algorithm_id == ALL),
+        and_(entries.c.factory_id == ALL, entries.c.algorithm_id.in_(algorithms)),
+        *(and_(entries.c.factory_id == f, entries.c.algorithm_id == a) for f, a in pairs),
+    ]
+    if overall:
+        groups.append(and_(entries.c.factory_id == ALL, entries.c.algorithm_id == ALL))
+    db.execute(entries.delete().where(or_(*groups)))
+    rows = []
+    for metric in METRICS:
+        if overall:
+            rows += _ranked(db, metric, "all")
+        rows += _ranked(db, metric, "factory", [Model.factory_id.in_(factories)])
+        rows += _ranked(db, metric, "algorithm", [Model.algorithm_id.in_(algorithms)])
+        rows += _ranked(
+            db, metric, "pair",
+            [or_(*(and_(Model.factory_id == f, Model.algorithm_id == a) for f, a in pairs))],
+        )
+    if rows:
+        now = _now()
+        db.execute(entries.insert(), [{**r, "refreshed_at": now} for r in rows])
+
+
+def refresh_models(db: Session, model_ids):
+    """refresh_groups for the factory / algorithm pairs of the given models."""
+    ids = sorted({m for m in model_ids if m is not None})
+    if not ids:
+        return
+    refresh_groups(
+        db, db.query(Model.factory_id, Model.algorithm_id).filter(Model.id.in_(ids)).distinct().all()
+    )
+
+
+def _all_rows(db: Session) -> list[dict]:
+    return [row for metric in METRICS for level in LEVELS for row in _ranked(db, metric, level)]
+
+
+def rebuild(db: Session) -> int:
+    """Replaces every leaderboard in the session's transaction. Returns the entry count."""
+    rows = _all_rows(db)
+    db.execute(entries.delete())
+    if rows:
+        now = _now()
+        db.execute(entries.insert(), [{**r, "refreshed_at": now} for r in rows])
+    return len(rows)
+
+
+def refresh_overall() -> dict:
+    """
+    Recomputes the overall leaderboards (scheduled, and woken by writers that
+    found them locked); a no-op (and no cache invalidation) when nothing moved.
+    """
+    db = SessionLocal()
+    try:
+        _lock(db, [(ALL, ALL)])
+        columns = ("metric", "rank", "version_id", "value")
+        current = {
+            tuple(getattr(e, c) for c in columns)
+            for e in db.query(LeaderboardEntry).filter(
+                LeaderboardEntry.factory_id == ALL, LeaderboardEntry.algorithm_id == ALL
+            )
+        }
+        rows = [row for metric in METRICS for row in _ranked(db, metric, "all")]
+        if {tuple(r[c] for c in columns) for r in rows} == current:
+            return {"entries": len(rows), "changed": False}
+        db.execute(entries.delete().where(entries.c.factory_id == ALL, entries.c.algorithm_id == ALL))
+        if rows:
+            now = _now()
+            db.execute(entries.insert(), [{**r, "refreshed_at": now} for r in rows])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    response_cache.invalidate()
+    return {"entries": len(rows), "changed": True}
+
+
+def refresh_all() -> dict:
+    """Scheduled full rebuild; a no-op (and no cache invalidation) when nothing moved."""
+    db = SessionLocal()
+    try:
+        if not _try_lock(db, REBUILD_KEY):
+            return {"skipped": True}
+        columns = ("metric", "factory_id", "algorithm_id", "rank", "version_id", "value")
+        current = {tuple(getattr(e, c) for c in columns) for e in db.query(LeaderboardEntry)}
+        rows = _all_rows(db)
+        if {tuple(r[c] for c in columns) for r in rows} == current:
+            return {"entries": len(rows), "changed": False}
+        rebuild(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    response_cache.invalidate()
+    logger.info(f"Leaderboards rebuilt: {len(rows)} entries")
+    return {"entries": len(rows), "changed": True}
+
+
+def top(
+    db: Session,
+    metric: str,
+    factory_id: int = ALL,
+    algorithm_id: int = ALL,
+    limit: int = LEADERBOARD_TOP_K,
+) -> list[dict]:
+    """
+    Leaderboard of one group with model / version / factory / algorithm
+    names. Served from the precomputed entries; a limit above
+    LEADERBOARD_TOP_K, or a group without entries, runs the indexed query.
+    """
+    ranked = []
+    if limit <= LEADERBOARD_TOP_K:
+        ranked = [
+            {"rank": e.rank, "version_id": e.version_id, "value": e.value}
+            for e in (
+                db.query(LeaderboardEntry)
+                .filter(
+                    LeaderboardEntry.metric == metric,
+                    LeaderboardEntry.factory_id == factory_id,
+                    LeaderboardEntry.algorithm_id == algorithm_id,
+                    LeaderboardEntry.rank <= limit,
+                )
+                .order_by(LeaderboardEntry.rank)
+            )
+        ]
+    if not ranked:
+        criteria = []
+        if factory_id != ALL:
+            criteria.append(Model.factory_id == factory_id)
+        if algorithm_id != ALL:
+            criteria.append(Model.algorithm_id == algorithm_id)
+        ranked = _ranked(db, metric, "all", criteria, limit=limit)
+    if not ranked:
+        return []
+
+    details = {
+        r.version_id: r
+        for r in (
+            db.query(
+                ModelVersion.id.label("version_id"),
+                ModelVersion.version_number,
+                Model.id.label("model_id"),
+                Model.name.label("model_name"),
+                Factory.id.label("factory_id"),
+                Factory.name.label("factory_name"),
+                Algorithm.id.label("algorithm_id"),
+                Algorithm.name.label("algorithm_name"),
+            )
+            .join(Model, Model.id == ModelVersion.model_id)
+            .join(Factory, Factory.id == Model.factory_id)
+            .join(Algorithm, Algorithm.id == Model.algorithm_id)
+            .filter(ModelVersion.id.in_([r["version_id"] for r in ranked]))
+        )
+    }
+    return [
+        {
+            "rank": r["rank"],
+            "value": r["value"],
+            "version_id": r["version_id"],
+            "version_number": d.version_number,
+            "model_id": d.model_id,
+            "model_name": d.model_name,
+            "factory_id": d.factory_id,
+            "factory_name": d.factory_name,
+            "algorithm_id": d.algorithm_id,
+            "algorithm_name": d.algorithm_name,
+        }
+        for r in ranked
+        if (d := details.get(r["version_id"])) is not None
+    ]
+
+
+def main():
+    db = SessionLocal()
+    try:
+        count = rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Leaderboards rebuilt: {count} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Long-format metrics store (app.models.metric).
+
+Version metrics arrive in three shapes: typed ModelVersion columns, the
+free-form resource_metrics JSON ({"key": {"value": "45%", "unit": "%"}} or a
+list of {"key", "value", "unit"}) and the parameters JSON. Run metrics are a
+JSON dict on ExperimentRun. Writers call sync_version_metrics /
+sync_run_metrics after flushing, in the same transaction, and the entity's
+rows are replaced by one numeric row per key: values such as "45%",
+"2.5 GB" or "12ms" are parsed once here, non-numeric ones are skipped.
+
+Readers aggregate in SQL (summarize, or version_metric_query + GROUP BY)
+across any number of versions instead of loading and parsing JSON per row.
+
+Rebuild from the source columns: python -m app.services.metrics_store
+"""
+import math
+import re
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.algorithm import Algorithm
+from app.models.experiment import ExperimentRun
+from app.models.factory import Factory
+from app.models.metric import Metric
+from app.models.model import Model
+from app.models.version import ModelVersion
+
+# ModelVersion metric columns and their units
+COLUMN_UNITS = {
+    "accuracy": "%",
+    "precision": "%",
+    "recall": "%",
+    "f1_score": "%",
+    "cpu_utilization": "%",
+    "gpu_utilization": "%",
+    "inference_time": "ms",
+    "cpu_memory_usage": "MB",
+    "gpu_memory_usage": "MB",
+    "cameras_supported": "count",
+    **{f"{kind}_{outcome}": "count" for kind in ("frame", "alert") for outcome in ("tp", "tn", "fp", "fn")},
+}
+
+PARAM_PREFIX = "param."
+
+_NUMBER = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([^\d\s][^\d]*?)?\s*$")
+
+metrics = Metric.__table__
+
+
+def parse_number(value, unit=None) -> tuple[float | None, str | None]:
+    """
+    (number, unit) of a metric value: a number, a numeric string with an
+    optional unit suffix ("45%", "2.5 GB") or a {"value", "unit"} dict.
+    (None, None) when it is not numeric.
+    """
+    if isinstance(value, dict):
+        return parse_number(value.get("value"), value.get("unit") or unit)
+    if isinstance(value, bool) or value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        match = _NUMBER.match(value)
+        if not match:
+            return None, None
+        number = float(match.group(1))
+        unit = unit or match.group(2)
+    else:
+        return None, None
+    if not math.isfinite(number):
+        return None, None
+    return number, (unit.strip() or None) if isinstance(unit, str) else None
+
+
+def _json_entries(data) -> list[tuple[str, object]]:
+    """(key, raw value) pairs of a metrics dict or a [{"key", "value", "unit"}] list."""
+    if isinstance(data, dict):
+        return [(str(k), v) for k, v in data.items()]
+    if isinstance(data, list):
+        return [
+            (str(item["key"]), {"value": item.get("value"), "unit": item.get("unit")})
+            for item in data
+            if isinstance(item, dict) and item.get("key")
+        ]
+    return []
+
+
+def version_metrics(version) -> dict[str, tuple[float, str | None]]:
+    """{key: (value, unit)} of a ModelVersion (or a row with its columns)."""
+    values = {}
+    for key, raw in _json_entries(getattr(version, "resource_metrics", None)):
+        number, unit = parse_number(raw)
+        if number is not None:
+            values[key] = (number, unit)
+    # The typed columns win over a resource_metrics entry of the same key
+    for column, unit in COLUMN_UNITS.items():
+        number, _ = parse_number(getattr(version, column, None))
+        if number is not None:
+            values[column] = (number, unit)
+    for key, raw in _json_entries(getattr(version, "parameters", None)):
+        number, unit = parse_number(raw)
+        if number is not None:
+            values[f"{PARAM_PREFIX}{key}"] = (number, unit)
+    return values
+
+
+def run_metrics(run) -> dict[str, tuple[float, str | None]]:
+    """{key: (value, unit)} of an ExperimentRun's metrics."""
+    values = {}
+    for key, raw in _json_entries(getattr(run, "metrics", None)):
+        number, unit = parse_number(raw)
+        if number is not None:
+            values[key] = (number, unit)
+    return values
+
+
+def _rows(entity_column: str, entity_id: int, values: dict, recorded_at) -> list[dict]:
+    return [
+        {
+            "version_id": entity_id if entity_column == "version_id" else None,
+            "run_id": entity_id if entity_column == "run_id" else None,
+            "key": key,
+            "value": number,
+            "unit": unit,
+            "recorded_at": recorded_at,
+        }
+        for key, (number, unit) in values.items()
+    ]
+
+
+def _replace(db, entity_column: str, ids: list[int], rows: list[dict]):
+    for i in range(0, len(ids), 500):
+        db.execute(metrics.delete().where(metrics.c[entity_column].in_(ids[i : i + 500])))
+    for i in range(0, len(rows), 5000):
+        db.execute(metrics.insert(), rows[i : i + 5000])
+
+
+def sync_version_metrics(db: Session, versions):
+    """Replaces the metric rows of the given (flushed) ModelVersion objects."""
+    versions = [v for v in versions if v.id is not None]
+    if not versions:
+        return
+    ids = [v.id for v in versions]
+    created = dict(db.query(ModelVersion.id, ModelVersion.created_at).filter(ModelVersion.id.in_(ids)))
+    rows = []
+    for v in versions:
+        rows.extend(_rows("version_id", v.id, version_metrics(v), created.get(v.id)))
+    _replace(db, "version_id", ids, rows)
+
+
+def sync_run_metrics(db: Session, runs):
+    """Replaces the metric rows of the given (flushed) ExperimentRun objects."""
+    runs = [r for r in runs if r.id is not None]
+    if not runs:
+        return
+    rows = []
+    for r in runs:
+        rows.extend(_rows("run_id", r.id, run_metrics(r), r.finished_at or r.started_at))
+    _replace(db, "run_id", [r.id for r in runs], rows)
+
+
+def version_metric_query(db: Session, *entities):
+    """
+    db.query(*entities) over metric rows joined to their version and model;
+    add joins (Algorithm, Factory), filters and GROUP BY for aggregates.
+    """
+    return (
+        db.query(*entities)
+        .select_from(Metric)
+        .join(ModelVersion, Metric.version_id == ModelVersion.id)
+        .join(Model, ModelVersion.model_id == Model.id)
+    )
+
+
+SUMMARY_GROUPS = {
+    "factory": (Factory.id, Factory.name),
+    "algorithm": (Algorithm.id, Algorithm.name),
+    "model": (Model.id, Model.name),
+}
+
+
+def summarize(
+    db: Session,
+    keys,
+    group_by: str = "algorithm",
+    factory_name: str | None = None,
+    active_only: bool = False,
+) -> list[dict]:
+    """
+    avg / min / max / count of each metric key per factory, algorithm or
+    model, computed by one GROUP BY over the metric rows.
+    """
+    group_id, group_name = SUMMARY_GROUPS[group_by]
+    query = (
+        version_metric_query(
+            db,
+            group_id.label("group_id"),
+            group_name.label("group_name"),
+            Metric.key,
+            func.avg(Metric.value).label("avg_value"),
+            func.min(Metric.value).label("min_value"),
+            func.max(Metric.value).label("max_value"),
+            func.count(Metric.id).label("versions")
+        )
+        .join(Algorithm, Model.algorithm_id == Algorithm.id)
+        .join(Factory, Model.factory_id == Factory.id)
+        .filter(Metric.key.in_(list(keys)))
+    )
+    if factory_name:
+        query = query.filter(Factory.name == factory_name)
+    if active_only:
+        query = query.filter(ModelVersion.is_active == True)
+
+    groups = {}
+    for r in query.group_by(group_id, group_name, Metric.key).order_by(group_name, group_id):
+        node = groups.setdefault(r.group_id, {"id": r.group_id, "name": r.group_name, "metrics": {}})
+        node["metrics"][r.key] = {
+            "avg": float(r.avg_value),
+            "min": float(r.min_value),
+            "max": float(r.max_value),
+            "count": r.versions,
+        }
+    return list(groups.values())
+
+
+def rebuild(conn, batch_size: int = 1000) -> int:
+    """
+    Recreates every metric row from the source columns (conn: Connection or
+    Session). Returns the number of rows written.
+    """
+    conn.execute(metrics.delete())
+    written = 0
+    versions = ModelVersion.__table__
+    columns = [versions.c.id, versions.c.created_at, versions.c.resource_metrics, versions.c.parameters]
+    columns += [versions.c[c] for c in COLUMN_UNITS]
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            select(*columns).where(versions.c.id > last_id).order_by(versions.c.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        rows = [r for v in batch for r in _rows("version_id", v.id, version_metrics(v), v.created_at)]
+        if rows:
+            conn.execute(metrics.insert(), rows)
+        written += len(rows)
+        last_id = batch[-1].id
+
+    runs = ExperimentRun.__table__
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            select(runs.c.id, runs.c.metrics, runs.c.started_at, runs.c.finished_at)
+            .where(runs.c.id > last_id)
+            .order_by(runs.c.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        rows = [r for run in batch for r in _rows("run_id", run.id, run_metrics(run), run.finished_at or run.started_at)]
+        if rows:
+            conn.execute(metrics.insert(), rows)
+        written += len(rows)
+        last_id = batch[-1].id
+    return written
+
+
+def main():
+    from app.database import engine
+
+    with engine.begin() as conn:
+        written = rebuild(conn)
+    print(f"Metrics rebuilt: {written} rows")
+
+
+if __name__ == "__main__":
+    main()
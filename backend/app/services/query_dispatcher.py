@@ -16,10 +16,13 @@ def run_sql_agent(
     user_question: str,
     db_session: Session,
     context: List[Dict] = [],
+    read_session: Session | None = None,
 ) -> Dict[str, Any]:
     """
     Unified entrypoint for MIRA AI chatbot, routing all queries through the 
     new dynamic, LLM-driven Text-to-SQL chat pipeline.
+    Generated SQL runs on read_session when given; the interactive create /
+    edit / delete flows always use db_session.
     """
     from app.utils.fuzzy import auto_correct_query
     
@@ -40,7 +43,7 @@ def run_sql_agent(
         "latest_error": None
     }
     
-    config = {"configurable": {"db_session": db_session}}
+    config = {"configurable": {"db_session": db_session, "read_session": read_session}}
     
     final_state = graph.invoke(initial_state, config=config)
     
@@ -52,6 +55,7 @@ def stream_sql_agent(
     user_question: str,
     db_session: Session,
     context: List[Dict] = [],
+    read_session: Session | None = None,
 ):
     """
     Streams the execution graph's progress as Server-Sent Events (SSE).
@@ -73,7 +77,7 @@ def stream_sql_agent(
         "latest_error": None
     }
     
-    config = {"configurable": {"db_session": db_session}}
+    config = {"configurable": {"db_session": db_session, "read_session": read_session}}
     
     # Map node names to user-friendly status messages
     status_map = {
@@ -0,0 +1,268 @@
+"""
+Cached report builds (app.services.reports) for large factory, algorithm and
+model reports.
+
+A report's fingerprint hashes the state of its subtree: version count, model
+count, latest version created_at / updated_at, the entity's own columns, the
+last change event of the subtree and the last factory / algorithm / model
+rename anywhere (algorithm names appear in factory reports). Any write that
+changes what the report would contain changes the fingerprint, which is also
+the report's ETag, so an unchanged report is answered with 304 or served from
+the file of a completed build without touching the versions again.
+
+A request for a report with no current build queues a ReportJob and builds it
+after the response (BackgroundTasks) into REPORTS_ROOT, on its own primary
+session: a lagging replica could store stale rows under the fingerprint the
+primary computed. Concurrent requests for the same fingerprint share the job.
+A finished build replaces the older builds of the same report and emits a
+"report.completed" (or "report.failed") change event, which the live activity
+stream delivers.
+Jobs queued or running for longer than REPORT_JOB_STALE_SECONDS (their
+process died) are ignored and the next request queues a new one.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import and_, distinct, func, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.algorithm import Algorithm
+from app.models.change_event import ChangeEvent
+from app.models.factory import Factory
+from app.models.model import Model
+from app.models.report_job import ReportJob
+from app.models.version import ModelVersion
+from app.services.events import emit, emit_for_model
+from app.services.reports import FORMATS, stream_report
+from app.utils.logger import logger
+from app.utils.storage import REPORTS_ROOT
+
+REPORT_JOB_STALE_SECONDS = int(os.getenv("REPORT_JOB_STALE_SECONDS", "900"))
+REPORT_CACHE_DAYS = int(os.getenv("REPORT_CACHE_DAYS", "7"))
+REPORT_PRUNE_INTERVAL_SECONDS = int(os.getenv("REPORT_PRUNE_INTERVAL", "3600"))
+
+# kind -> (entity, columns the report shows, model column and change event column of its subtree)
+SUBTREES = {
+    "factory": (Factory, (Factory.name,), Model.factory_id, ChangeEvent.factory_id),
+    "algorithm": (
+        Algorithm,
+        (Algorithm.name, Algorithm.description, Algorithm.ini_config),
+        Model.algorithm_id,
+        ChangeEvent.algorithm_id,
+    ),
+    "model": (Model, (Model.name,), Model.id, ChangeEvent.model_id),
+}
+
+# Changes that alter report rows without touching version rows
+RENAME_EVENTS = ("factory.updated", "algorithm.updated", "model.updated")
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def subtree_state(
+    db: Session,
+    kind: str,
+    entity_id: int,
+    fmt: str,
+    algorithm_id: int | None = None,
+) -> tuple[str, str]:
+    """(entity name, fingerprint) of a report; 404 when the entity does not exist."""
+    entity, columns, model_column, event_column = SUBTREES[kind]
+    row = db.query(*columns).filter(entity.id == entity_id).first()
+    if row is None:
+        raise HTTPException(404, f"{kind.capitalize()} not found")
+
+    criteria = [model_column == entity_id]
+    if algorithm_id is not None:
+        criteria.append(Model.algorithm_id == algorithm_id)
+    versions, models, last_version_change = (
+        db.query(
+            func.count(ModelVersion.id),
+            func.count(distinct(Model.id)),
+            func.max(func.coalesce(ModelVersion.updated_at, ModelVersion.created_at)),
+        )
+        .select_from(Model)
+        .outerjoin(ModelVersion, ModelVersion.model_id == Model.id)
+        .filter(*criteria)
+        .one()
+    )
+    # Report events are excluded, or every build would outdate itself
+    last_change = (
+        db.query(ChangeEvent.id)
+        .filter(event_column == entity_id, ~ChangeEvent.kind.startswith("report."))
+        .order_by(ChangeEvent.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    last_rename = db.query(func.max(ChangeEvent.id)).filter(ChangeEvent.kind.in_(RENAME_EVENTS)).scalar()
+
+    state = [
+        kind, entity_id, algorithm_id, fmt, list(row),
+        versions, models, last_version_change, last_change, last_rename,
+    ]
+    fingerprint = hashlib.sha256(json.dumps(state, default=str).encode()).hexdigest()[:32]
+    return row[0], fingerprint
+
+
+def etag(fingerprint: str) -> str:
+    return f'"{fingerprint}"'
+
+
+def current_job(db: Session, fingerprint: str) -> ReportJob | None:
+    """The completed build of a fingerprint, else a live queued / running job for it."""
+    stale_before = _now() - timedelta(seconds=REPORT_JOB_STALE_SECONDS)
+    jobs = (
+        db.query(ReportJob)
+        .filter(
+            ReportJob.fingerprint == fingerprint,
+            or_(
+                ReportJob.status == "completed",
+                and_(
+                    ReportJob.status.in_(ACTIVE_STATUSES),
+                    func.coalesce(ReportJob.started_at, ReportJob.created_at) > stale_before,
+                ),
+            ),
+        )
+        .order_by(ReportJob.id.desc())
+        .all()
+    )
+    for job in jobs:
+        if job.status != "completed" or (job.path and os.path.exists(job.path)):
+            return job
+    return None
+
+
+def request_report(
+    db: Session,
+    kind: str,
+    entity_id: int,
+    fmt: str,
+    fingerprint: str,
+    algorithm_id: int | None = None,
+) -> tuple[ReportJob, bool]:
+    """(job, created): the current job of the fingerprint, or a new queued one (committed)."""
+    job = current_job(db, fingerprint)
+    if job:
+        return job, False
+    job = ReportJob(
+        kind=kind,
+        entity_id=entity_id,
+        algorithm_id=algorithm_id,
+        format=fmt,
+        fingerprint=fingerprint,
+        status="queued",
+        created_at=_now(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job, True
+
+
+def _scope(job: ReportJob) -> dict:
+    if job.kind == "factory":
+        return {"factory_id": job.entity_id, "algorithm_id": job.algorithm_id}
+    return {f"{job.kind}_id": job.entity_id}
+
+
+def _notify(db: Session, job: ReportJob, kind: str, **data):
+    data.update(report_job_id=job.id, report=job.kind, format=job.format)
+    if job.kind == "model":
+        emit_for_model(db, kind, job.entity_id, **data)
+    else:
+        emit(db, kind, **_scope(job), **data)
+
+
+def _remove(db: Session, jobs):
+    for job in jobs:
+        if job.path:
+            try:
+                os.unlink(job.path)
+            except FileNotFoundError:
+                pass
+        db.delete(job)
+
+
+def build(job_id: int):
+    """Builds a queued report job into REPORTS_ROOT (runs after the response)."""
+    db = SessionLocal()
+    try:
+        claimed = (
+            db.query(ReportJob)
+            .filter(ReportJob.id == job_id, ReportJob.status == "queued")
+            .update({"status": "running", "started_at": _now()}, synchronize_session=False)
+        )
+        db.commit()
+        if not claimed:
+            return
+        job = db.get(ReportJob, job_id)
+
+        path = REPORTS_ROOT / f"{job.id}.{FORMATS[job.format][1]}"
+        tmp = path.with_name(path.name + ".part")
+        try:
+            with open(tmp, "wb") as out:
+                for chunk in stream_report(job.kind, job.format, session_factory=SessionLocal, **_scope(job)):
+                    out.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            os.replace(tmp, path)
+        except Exception as e:
+            tmp.unlink(missing_ok=True)
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = _now()
+            _notify(db, job, "report.failed", error=str(e))
+            db.commit()
+            logger.error(f"Report build failed: {job.kind} {job.entity_id} ({job.format}, Job ID: {job.id}): {e}")
+            return
+
+        job.status = "completed"
+        job.path = str(path)
+        job.size = path.stat().st_size
+        job.finished_at = _now()
+        # Older builds of the same report are superseded
+        _remove(
+            db,
+            db.query(ReportJob).filter(
+                ReportJob.kind == job.kind,
+                ReportJob.entity_id == job.entity_id,
+                ReportJob.algorithm_id.is_(None) if job.algorithm_id is None else ReportJob.algorithm_id == job.algorithm_id,
+                ReportJob.format == job.format,
+                ReportJob.status == "completed",
+                ReportJob.id < job.id,
+            ),
+        )
+        _notify(db, job, "report.completed", size=job.size)
+        db.commit()
+        logger.info(f"Report built: {job.kind} {job.entity_id} ({job.format}, {job.size} bytes, Job ID: {job.id})")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def prune() -> int:
+    """Deletes builds and failed jobs finished more than REPORT_CACHE_DAYS ago. Returns the number removed."""
+    db = SessionLocal()
+    try:
+        old = db.query(ReportJob).filter(
+            ReportJob.status.in_(("completed", "failed")),
+            ReportJob.finished_at < _now() - timedelta(days=REPORT_CACHE_DAYS),
+        ).all()
+        _remove(db, old)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if old:
+        logger.info(f"Report builds pruned: {len(old)}")
+    return len(old)
@@ -0,0 +1,390 @@
+"""
+Version reports (factory, algorithm, model) as CSV, Parquet or XLSX.
+
+Every report is one flat query (version x model x algorithm x factory x
+delta), read through a server-side cursor (yield_per) on a session owned by
+the response generator, so rows are written as they are fetched and memory
+stays flat however many versions a report covers:
+
+- CSV is streamed row by row;
+- Parquet is sent one row group per REPORT_BATCH_SIZE rows;
+- XLSX is a zip archive that is only complete at the end: the workbook is
+  written in openpyxl's write-only mode to a spooled temporary file, then sent.
+
+Parquet needs pyarrow and XLSX needs openpyxl. Both are optional:
+check_format answers 501 for a format whose package is not installed.
+
+Large reports can also be built in the background and cached
+(app.services.report_jobs).
+"""
+import csv
+import importlib.util
+import io
+import json
+import os
+import tempfile
+from datetime import timezone
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import ReadSessionLocal
+from app.models.algorithm import Algorithm
+from app.models.factory import Factory
+from app.models.model import Model
+from app.models.version import ModelVersion, VersionDelta
+
+REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", "1000"))
+XLSX_SPOOL_BYTES = 16 * 1024 * 1024
+
+# format -> (media type, file extension, required package)
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv", None),
+    "parquet": ("application/vnd.apache.parquet", "parquet", "pyarrow"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", "openpyxl"),
+}
+
+DATE_FORMAT = "%d-%m-%Y %H:%M:%S"
+
+
+def missing_dependency(fmt: str) -> str | None:
+    """Name of the package a format needs when it is not installed, else None."""
+    package = FORMATS[fmt][2]
+    if package and importlib.util.find_spec(package) is None:
+        return package
+    return None
+
+
+# ======================================================
+# FLAT PROJECTION
+# ======================================================
+def _projection(db: Session, with_empty_models: bool = False):
+    """
+    One row per version with its model, algorithm, factory and dataset count;
+    with_empty_models adds one all-NULL version row per model without versions.
+    """
+    query = db.query(
+        Model.id.label("model_id"),
+        Model.name.label("model_name"),
+        Algorithm.name.label("algorithm_name"),
+        Factory.name.label("factory_name"),
+        ModelVersion.id.label("version_id"),
+        ModelVersion.version_number,
+        ModelVersion.is_active,
+        ModelVersion.created_at,
+        ModelVersion.note,
+        ModelVersion.accuracy,
+        ModelVersion.precision,
+        ModelVersion.recall,
+        ModelVersion.f1_score,
+        ModelVersion.cpu_utilization,
+        ModelVersion.gpu_utilization,
+        ModelVersion.inference_time,
+        ModelVersion.parameters,
+        ModelVersion.ini_config,
+        VersionDelta.dataset_count,
+    ).select_from(Model)
+    if with_empty_models:
+        query = query.outerjoin(ModelVersion, ModelVersion.model_id == Model.id)
+    else:
+        query = query.join(ModelVersion, ModelVersion.model_id == Model.id)
+    return (
+        query.outerjoin(Algorithm, Algorithm.id == Model.algorithm_id)
+        .outerjoin(Factory, Factory.id == Model.factory_id)
+        .outerjoin(VersionDelta, VersionDelta.version_id == ModelVersion.id)
+        .order_by(Model.name.asc(), Model.id.asc(), ModelVersion.version_number.asc())
+    )
+
+
+# ======================================================
+# COLUMNS
+# ======================================================
+def _na(value):
+    return value if value is not None else "N/A"
+
+
+def _one_line(value: str) -> str:
+    return value.replace("\n", " | ").replace("\r", "")
+
+
+def _parameters_json(row):
+    return json.dumps(row.parameters) if row.parameters else None
+
+
+def _metric(name, header):
+    return (header, "float", lambda r: getattr(r, name), lambda r: _na(getattr(r, name)))
+
+
+# (header, parquet type, typed value for Parquet / XLSX, CSV cell)
+METRIC_COLUMNS = [
+    _metric("accuracy", "Accuracy"),
+    _metric("precision", "Precision"),
+    _metric("recall", "Recall"),
+    _metric("f1_score", "F1 Score"),
+    _metric("cpu_utilization", "CPU Utilization (%)"),
+    _metric("gpu_utilization", "GPU Utilization (%)"),
+    _metric("inference_time", "Inference Time (ms)"),
+]
+CREATED_AT = (
+    "Created At", "datetime",
+    lambda r: r.created_at,
+    lambda r: r.created_at.strftime(DATE_FORMAT) if r.created_at else "N/A",
+)
+DESCRIPTION = ("Description", "string", lambda r: r.note, lambda r: r.note or "")
+DATASET_COUNT = (
+    "Dataset Total Count", "int",
+    lambda r: (r.dataset_count or 0) if r.version_id else None,
+    lambda r: r.dataset_count or 0,
+)
+HYPERPARAMETERS = (
+    "Hyperparameters", "string", _parameters_json,
+    lambda r: _one_line(str(r.parameters)) if r.parameters else "None",
+)
+INI_CONFIG = (
+    "INI Configuration", "string",
+    lambda r: r.ini_config,
+    lambda r: _one_line(r.ini_config) if r.ini_config else "None",
+)
+
+FACTORY_COLUMNS = [
+    ("Model Name", "string", lambda r: r.model_name, lambda r: r.model_name),
+    ("Algorithm Name", "string", lambda r: r.algorithm_name, lambda r: r.algorithm_name or "N/A"),
+    (
+        "Version", "string",
+        lambda r: f"v{r.version_number}" if r.version_id else None,
+        lambda r: f"v{r.version_number}",
+    ),
+    (
+        "Status", "string",
+        lambda r: ("Active" if r.is_active else "Inactive") if r.version_id else None,
+        lambda r: "Active" if r.is_active else "Inactive",
+    ),
+    CREATED_AT,
+    DESCRIPTION,
+    ("Dataset Count", *DATASET_COUNT[1:]),
+    *METRIC_COLUMNS,
+    (
+        "Hyperparameters", "string", _parameters_json,
+        lambda r: str(r.parameters) if r.parameters else "None",
+    ),
+]
+ALGORITHM_COLUMNS = [
+    ("Factory Name", "string", lambda r: r.factory_name, lambda r: r.factory_name or "N/A"),
+    ("Model Name", "string", lambda r: r.model_name, lambda r: r.model_name),
+    ("Version Number", "int", lambda r: r.version_number, lambda r: r.version_number),
+    CREATED_AT,
+    DESCRIPTION,
+    DATASET_COUNT,
+    *METRIC_COLUMNS,
+    HYPERPARAMETERS,
+    INI_CONFIG,
+]
+MODEL_COLUMNS = ALGORITHM_COLUMNS[2:]
+
+
+# ======================================================
+# REPORTS
+# ======================================================
+def factory_report(db: Session, factory_id: int, algorithm_id: int | None = None):
+    """Every model of a factory (optionally one algorithm's), versions included."""
+    query = _projection(db, with_empty_models=True).filter(Model.factory_id == factory_id)
+    if algorithm_id is not None:
+        query = query.filter(Model.algorithm_id == algorithm_id)
+    return {"query": query, "columns": FACTORY_COLUMNS, "preamble": [], "model_breaks": True, "bom": True}
+
+
+def algorithm_report(db: Session, algorithm_id: int):
+    """Every version of an algorithm's models, after the algorithm's details (CSV)."""
+    algo = db.query(Algorithm.name, Algorithm.description, Algorithm.ini_config).filter(Algorithm.id == algorithm_id).one()
+    preamble = [["Algorithm Details"], ["Name", algo.name], ["Description", algo.description or "N/A"], []]
+    if algo.ini_config:
+        preamble.append(["INI Configuration"])
+        preamble += [[line.strip()] for line in algo.ini_config.splitlines() if line.strip()]
+        preamble.append([])
+    query = _projection(db).filter(Model.algorithm_id == algorithm_id)
+    return {"query": query, "columns": ALGORITHM_COLUMNS, "preamble": preamble, "model_breaks": True, "bom": False}
+
+
+def model_report(db: Session, model_id: int):
+    """Every version of one model."""
+    query = _projection(db).filter(Model.id == model_id)
+    return {"query": query, "columns": MODEL_COLUMNS, "preamble": [], "model_breaks": False, "bom": False}
+
+
+REPORTS = {
+    "factory": factory_report,
+    "algorithm": algorithm_report,
+    "model": model_report,
+}
+
+
+# ======================================================
+# WRITERS
+# ======================================================
+def _write_csv(report, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    if report["bom"]:
+        buffer.write("\ufeff")
+    writer.writerows(report["preamble"])
+    writer.writerow([header for header, *_ in report["columns"]])
+
+    # A blank row closes every model's block of versions (as the original reports did)
+    current_model = None
+    pending_break = False
+    for count, row in enumerate(rows, start=1):
+        if report["model_breaks"] and row.model_id != current_model:
+            if pending_break:
+                writer.writerow([])
+            current_model = row.model_id
+        if row.version_id is None:
+            writer.writerow([row.model_name, row.algorithm_name or "N/A"] + ["N/A"] * (len(report["columns"]) - 2))
+            pending_break = False
+        else:
+            writer.writerow([text(row) for *_, text in report["columns"]])
+            pending_break = True
+        if count % REPORT_BATCH_SIZE == 0:
+            yield drain()
+    if report["model_breaks"] and pending_break:
+        writer.writerow([])
+    yield drain()
+
+
+def _naive_utc(value):
+    # Parquet timestamps are stored as UTC; Excel has no time zones
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks = []
+        return chunk
+
+
+def _write_parquet(report, rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "datetime": pa.timestamp("us"),
+    }
+    columns = report["columns"]
+    schema = pa.schema([(header, types[kind]) for header, kind, *_ in columns])
+
+    def table(batch):
+        return pa.Table.from_pydict(
+            {
+                header: [_naive_utc(value(r)) if kind == "datetime" else value(r) for r in batch]
+                for header, kind, value, _ in columns
+            },
+            schema=schema,
+        )
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == REPORT_BATCH_SIZE:
+            writer.write_table(table(batch))
+            batch = []
+            yield sink.drain()
+    if batch:
+        writer.write_table(table(batch))
+    writer.close()
+    yield sink.drain()
+
+
+def _write_xlsx(report, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Report")
+    sheet.append([header for header, *_ in report["columns"]])
+    for row in rows:
+        sheet.append([
+            _naive_utc(value(row)) if kind == "datetime" else value(row)
+            for _, kind, value, _ in report["columns"]
+        ])
+
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while chunk := spool.read(1024 * 1024):
+            yield chunk
+
+
+WRITERS = {
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+    "xlsx": _write_xlsx,
+}
+
+
+def stream_report(kind: str, fmt: str, session_factory=ReadSessionLocal, **scope):
+    """
+    Response body of a report, generated on its own session (the request's
+    session is closed before a streaming body is sent); a read replica
+    session unless session_factory says otherwise. scope: factory_id /
+    algorithm_id / model_id, as taken by the report function.
+    """
+    db = session_factory()
+    try:
+        report = REPORTS[kind](db, **scope)
+        rows = report["query"].yield_per(REPORT_BATCH_SIZE)
+        yield from WRITERS[fmt](report, rows)
+    finally:
+        db.close()
+
+
+def check_format(fmt: str):
+    """400 for an unknown format, 501 when its package is missing."""
+    if fmt not in FORMATS:
+        raise HTTPException(400, f"format must be one of {', '.join(FORMATS)}")
+    package = missing_dependency(fmt)
+    if package:
+        raise HTTPException(501, f"{fmt} reports need the {package} package")
+
+
+def report_filename(kind: str, fmt: str, name: str) -> str:
+    safe_name = name.replace(" ", "_").lower()
+    return f"{kind}_{safe_name}_report.{FORMATS[fmt][1]}"
+
+
+def report_response(kind: str, fmt: str, name: str, **scope) -> StreamingResponse:
+    """Streaming download of a report (see check_format for the errors)."""
+    check_format(fmt)
+    response = StreamingResponse(stream_report(kind, fmt, **scope), media_type=FORMATS[fmt][0])
+    response.headers["Content-Disposition"] = f"attachment; filename={report_filename(kind, fmt, name)}"
+    return response
@@ -0,0 +1,137 @@
+"""
+Response cache for expensive read endpoints (dashboard, hierarchies).
+
+Entries live for RESPONSE_CACHE_TTL seconds and are keyed by route and query
+parameters. Writes invalidate everything at once by bumping a generation
+number that is part of every key, so stale entries are never read again and
+simply age out.
+
+By default entries are kept in an in-process LRU (RESPONSE_CACHE_SIZE
+entries); invalidation then only reaches the process that handled the write
+and other API processes serve their copy until it expires. Setting
+RESPONSE_CACHE_URL (redis://...) shares entries and the generation between
+processes and ingest workers; it needs the redis package.
+
+Values must be JSON-serializable (routes cache their serialized response).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils.logger import logger
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))  # seconds; 0 disables caching
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+
+MISS = object()
+
+
+class LocalBackend:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def bump_generation(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """Entries (SET with expiry) and generation (INCR) shared through Redis."""
+
+    GENERATION_KEY = "response-cache:generation"
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def generation(self) -> int:
+        return int(self.client.get(self.GENERATION_KEY) or 0)
+
+    def bump_generation(self):
+        self.client.incr(self.GENERATION_KEY)
+
+    def get(self, key: str):
+        raw = self.client.get(f"response-cache:{key}")
+        return MISS if raw is None else json.loads(raw)
+
+    def set(self, key: str, value, ttl: float):
+        self.client.set(f"response-cache:{key}", json.dumps(value), px=int(ttl * 1000))
+
+
+def _make_backend():
+    if RESPONSE_CACHE_URL:
+        try:
+            return RedisBackend(RESPONSE_CACHE_URL)
+        except ImportError:
+            logger.error("RESPONSE_CACHE_URL is set but the redis package is not installed; using the local cache")
+    return LocalBackend(RESPONSE_CACHE_SIZE)
+
+
+backend = _make_backend()
+
+
+def lookup(name: str, params: dict) -> tuple[str | None, object]:
+    """
+    (key, cached value or MISS) for a call of route name with params. The key
+    covers the current generation; it is None when caching is off or the
+    backend failed, and store() then does nothing.
+    """
+    if RESPONSE_CACHE_TTL <= 0:
+        return None, MISS
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:32]
+    try:
+        key = f"{name}:{backend.generation()}:{digest}"
+        return key, backend.get(key)
+    except Exception as e:
+        logger.error(f"Response cache read failed: {e}")
+        return None, MISS
+
+
+def store(key: str | None, value, ttl: float | None = None):
+    if key is None:
+        return
+    try:
+        backend.set(key, value, RESPONSE_CACHE_TTL if ttl is None else ttl)
+    except Exception as e:
+        logger.error(f"Response cache write failed: {e}")
+
+
+def invalidate():
+    """Drops every cached response (call after writes that change what they show)."""
+    try:
+        backend.bump_generation()
+    except Exception as e:
+        logger.error(f"Response cache invalidation failed: {e}")
@@ -0,0 +1,164 @@
+"""
+Version retention: keeps the active version, the last N versions and tagged
+versions of every model covered by a retention policy and deletes the rest.
+
+Policies are attached to a model, a factory or an algorithm. A model policy
+wins; otherwise the factory and algorithm policies that apply are merged
+conservatively (largest keep_last, keep tagged if either says so).
+
+Deletes run in batches: blob references are released (the blob GC reclaims
+the files after its grace period), then artifact, delta and version rows are
+bulk-deleted. Versions referenced by experiment runs are never pruned.
+"""
+import os
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.artifact import Artifact
+from app.models.experiment import ExperimentRun
+from app.models.model import Model
+from app.models.retention_policy import RetentionPolicy
+from app.models.version import ModelVersion, VersionDelta
+from app.services import response_cache
+from app.services.blob_gc import release_versions
+from app.services.counters import adjust_version_counts
+from app.services.events import emit
+from app.services.leaderboard import refresh_models
+from app.utils.logger import logger
+
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL", str(6 * 3600)))
+PRUNE_BATCH_SIZE = int(os.getenv("RETENTION_BATCH", "200"))
+
+
+def effective_policies(db: Session) -> dict[int, tuple[int, bool]]:
+    """{model_id: (keep_last, keep_tagged)} for every model covered by an enabled policy."""
+    policies = db.query(RetentionPolicy).filter(RetentionPolicy.enabled == True).all()
+    if not policies:
+        return {}
+    by_model = {p.model_id: p for p in policies if p.model_id}
+    by_factory = {p.factory_id: p for p in policies if p.factory_id}
+    by_algorithm = {p.algorithm_id: p for p in policies if p.algorithm_id}
+
+    effective = {}
+    for model_id, algorithm_id, factory_id in db.query(Model.id, Model.algorithm_id, Model.factory_id):
+        if model_id in by_model:
+            p = by_model[model_id]
+            effective[model_id] = (p.keep_last, p.keep_tagged)
+            continue
+        applicable = [p for p in (by_factory.get(factory_id), by_algorithm.get(algorithm_id)) if p]
+        if applicable:
+            effective[model_id] = (
+                max(p.keep_last for p in applicable),
+                any(p.keep_tagged for p in applicable),
+            )
+    return effective
+
+
+def _prunable_versions(db: Session, model_id: int, keep_last: int, keep_tagged: bool) -> list[tuple[int, int]]:
+    """(id, version_number) of the versions outside the keep set."""
+    in_experiments = (
+        select(ExperimentRun.model_version_id)
+        .where(ExperimentRun.model_version_id.isnot(None))
+    )
+    rows = (
+        db.query(ModelVersion.id, ModelVersion.version_number, ModelVersion.tags)
+        .filter(
+            ModelVersion.model_id == model_id,
+            ModelVersion.is_active == False,
+            ~ModelVersion.id.in_(in_experiments),
+        )
+        .order_by(ModelVersion.version_number.desc())
+        .all()
+    )
+    # The newest keep_last versions are kept whether or not one of them is active
+    newest = {
+        vid for (vid,) in (
+            db.query(ModelVersion.id)
+            .filter(ModelVersion.model_id == model_id)
+            .order_by(ModelVersion.version_number.desc())
+            .limit(keep_last)
+        )
+    }
+    return [
+        (vid, number)
+        for vid, number, tags in rows
+        if vid not in newest and not (keep_tagged and tags)
+    ]
+
+
+def delete_versions(db: Session, version_ids: list[int]) -> int:
+    """
+    Bulk-deletes inactive versions with their artifacts and deltas and
+    releases their blobs. The versions are locked first and only those still
+    there and inactive are deleted, so an overlapping prune, delete_version
+    or checkout never releases the same references twice. Returns the number
+    deleted.
+    """
+    criteria = (ModelVersion.id.in_(version_ids), ModelVersion.is_active == False)
+    if db.get_bind().dialect.name == "sqlite":
+        # No row locks on SQLite: a no-op UPDATE takes the database write lock instead
+        db.query(ModelVersion).filter(*criteria).update(
+            {ModelVersion.updated_at: ModelVersion.updated_at}, synchronize_session=False
+        )
+    version_ids = [
+        vid for (vid,) in db.query(ModelVersion.id).filter(*criteria).order_by(ModelVersion.id).with_for_update()
+    ]
+    if not version_ids:
+        return 0
+    release_versions(db, ModelVersion.id.in_(version_ids))
+    deleted = (
+        db.query(ModelVersion.id, ModelVersion.model_id, ModelVersion.version_number, Model.factory_id, Model.algorithm_id)
+        .join(Model, Model.id == ModelVersion.model_id)
+        .filter(ModelVersion.id.in_(version_ids))
+        .all()
+    )
+    model_ids = [v.model_id for v in deleted]
+    adjust_version_counts(db, model_ids, sign=-1)
+    db.query(Artifact).filter(Artifact.version_id.in_(version_ids)).delete(synchronize_session=False)
+    db.query(VersionDelta).filter(VersionDelta.version_id.in_(version_ids)).delete(synchronize_session=False)
+    db.query(ModelVersion).filter(ModelVersion.id.in_(version_ids)).delete(synchronize_session=False)
+    refresh_models(db, model_ids)
+    for v in deleted:
+        emit(
+            db, "version.deleted",
+            factory_id=v.factory_id, algorithm_id=v.algorithm_id,
+            model_id=v.model_id, version_id=v.id,
+            version_number=v.version_number, reason="retention",
+        )
+    return len(version_ids)
+
+
+def prune_versions(dry_run: bool = False, batch_size: int = PRUNE_BATCH_SIZE) -> dict:
+    """Applies all retention policies once. Returns what was (or would be) deleted."""
+    report = {"dry_run": dry_run, "models": 0, "versions_deleted": 0, "by_model": {}}
+
+    db = SessionLocal()
+    try:
+        for model_id, (keep_last, keep_tagged) in effective_policies(db).items():
+            prunable = _prunable_versions(db, model_id, keep_last, keep_tagged)
+            if not prunable:
+                continue
+            report["models"] += 1
+            report["by_model"][model_id] = sorted(number for _, number in prunable)
+            if dry_run:
+                report["versions_deleted"] += len(prunable)
+                continue
+
+            ids = [vid for vid, _ in prunable]
+            pruned = 0
+            for i in range(0, len(ids), batch_size):
+                pruned += delete_versions(db, ids[i : i + batch_size])
+                db.commit()
+            report["versions_deleted"] += pruned
+            logger.info(f"Retention: pruned {pruned} versions (Model ID: {model_id}, keep last {keep_last})")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if report["versions_deleted"] and not dry_run:
+        response_cache.invalidate()
+    return report
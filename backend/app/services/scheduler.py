@@ -0,0 +1,66 @@
+"""
+Minimal in-process scheduler for periodic maintenance (blob GC, ...).
+
+Tasks run on daemon threads started from the app lifespan. Every task must be
+safe to run concurrently from several API processes, since each process runs
+its own scheduler.
+
+wake(name) runs a task early (e.g. from a change event subscriber); wakes
+that arrive while the task is running coalesce into one more run.
+"""
+import threading
+from typing import Callable
+
+from app.utils.logger import logger
+
+_tasks: list[tuple[str, float, Callable[[], object]]] = []
+_wakeups: dict[str, threading.Event] = {}
+
+
+def register(name: str, interval_seconds: float, fn: Callable[[], object]):
+    _tasks.append((name, interval_seconds, fn))
+    _wakeups[name] = threading.Event()
+
+
+def wake(name: str):
+    """Runs the task now instead of at the end of its interval (no-op for unknown tasks)."""
+    wakeup = _wakeups.get(name)
+    if wakeup is not None:
+        wakeup.set()
+
+
+class _StopEvent(threading.Event):
+    """Stop flag that also interrupts the tasks' waits."""
+
+    def set(self):
+        super().set()
+        for wakeup in _wakeups.values():
+            wakeup.set()
+
+
+def _run_periodic(name: str, interval_seconds: float, fn, stop_event: threading.Event):
+    wakeup = _wakeups[name]
+    while True:
+        wakeup.wait(interval_seconds)
+        wakeup.clear()
+        if stop_event.is_set():
+            return
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"Scheduled task {name} failed: {e}")
+
+
+def start() -> threading.Event:
+    """Starts all registered tasks; set the returned event to stop them."""
+    stop_event = _StopEvent()
+    for name, interval_seconds, fn in _tasks:
+        if interval_seconds <= 0:
+            continue
+        threading.Thread(
+            target=_run_periodic,
+            args=(name, interval_seconds, fn, stop_event),
+            name=f"scheduler-{name}",
+            daemon=True,
+        ).start()
+    return stop_event
@@ -0,0 +1,290 @@
+"""
+Integrity scrubber: re-hashes stored blobs and quarantines any whose content
+no longer matches its checksum.
+
+Blobs are visited in last_verified_at order (never-verified first), which is
+the resumable cursor: a run that stops half way continues with the blobs it
+did not reach, and nothing needs to be remembered between runs. Hashing runs
+in a process pool so it is not bound by the GIL; the configured byte rate is
+split across the workers so a scrub never saturates the disks.
+
+Mismatching blobs are moved to storage/quarantine and flagged with
+tier="quarantine". Artifact rows keep their path, so downloads of a corrupt
+file fail loudly instead of serving bad bytes.
+
+A blob whose file is gone (and was not moved by tiering or swept by the GC
+meanwhile) is flagged with missing_at and keeps its old last_verified_at, so
+it is reported in the coverage instead of counting as verified. It is looked
+at again once per cycle and the flag clears when the file verifies.
+
+On Postgres one process scrubs at a time (an advisory lock held for the run);
+a run that finds the lock taken returns straight away.
+
+CLI: python -m app.services.scrubber [--max-blobs N] [--workers N] [--rate BYTES_PER_SEC]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import bindparam, func, text
+
+from app.database import SessionLocal, engine
+from app.models.blob import Blob
+from app.utils.logger import logger
+from app.utils.storage import QUARANTINE_ROOT
+
+TIER_QUARANTINE = "quarantine"
+
+SCRUB_INTERVAL_SECONDS = int(os.getenv("SCRUB_INTERVAL", "3600"))
+SCRUB_BLOBS_PER_RUN = int(os.getenv("SCRUB_BLOBS_PER_RUN", "10000"))
+SCRUB_WORKERS = int(os.getenv("SCRUB_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+SCRUB_RATE_BYTES = int(os.getenv("SCRUB_RATE_BYTES", str(100 * 1024 * 1024)))  # per second, all workers
+# A blob verified more recently than this is not re-hashed
+SCRUB_CYCLE_DAYS = int(os.getenv("SCRUB_CYCLE_DAYS", "30"))
+SCRUB_BATCH_SIZE = 200
+HASH_CHUNK = 1024 * 1024
+
+# One scrubber at a time across API processes (Postgres)
+SCRUB_LOCK_ID = 735_201_035
+
+_lock = threading.Lock()
+_state = {
+    "running": False,
+    "started_at": None,
+    "finished_at": None,
+    "verified": 0,
+    "bytes_hashed": 0,
+    "mismatches": 0,
+    "missing": 0,
+    "errors": 0,
+    "bytes_per_second": 0,
+    "last_checksum": None,
+}
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _hash_file(path: str, max_bytes_per_second: float) -> tuple[str | None, int, str | None]:
+    """(sha256, size, error) of one file, reading no faster than the given rate."""
+    hasher = hashlib.sha256()
+    size = 0
+    started = time.monotonic()
+    try:
+        with open(path, "rb") as fh:
+            while chunk := fh.read(HASH_CHUNK):
+                hasher.update(chunk)
+                size += len(chunk)
+                if max_bytes_per_second:
+                    ahead = size / max_bytes_per_second - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+    except FileNotFoundError:
+        return None, 0, "missing"
+    except OSError as e:
+        return None, size, str(e)
+    return hasher.hexdigest(), size, None
+
+
+def _quarantine(db, checksum: str, path: str) -> Path | None:
+    """
+    Moves a mismatching blob to the quarantine and flags it, unless tiering /
+    GC moved or swept it since it was read. None when it was left alone.
+    """
+    current = db.query(Blob.path).filter(Blob.checksum == checksum).with_for_update().scalar()
+    if current != path:
+        return None
+    target = QUARANTINE_ROOT / f"{checksum}.{int(time.time())}"
+    try:
+        shutil.move(path, target)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        _count(errors=1)
+        logger.error(f"Scrubber: could not quarantine {path}: {e}")
+        return None
+    db.query(Blob).filter(Blob.checksum == checksum).update(
+        {"tier": TIER_QUARANTINE, "path": str(target), "last_verified_at": _now(), "missing_at": None},
+        synchronize_session=False,
+    )
+    return target
+
+
+def _flag_missing(db, checksum: str, path: str):
+    """Flags a blob whose file was not found, unless tiering / GC moved or swept it since it was read."""
+    current = db.query(Blob.path).filter(Blob.checksum == checksum).with_for_update().scalar()
+    if current != path or os.path.exists(path):
+        return
+    db.query(Blob).filter(Blob.checksum == checksum).update(
+        {"missing_at": func.coalesce(Blob.missing_at, _now())}, synchronize_session=False
+    )
+    _count(missing=1)
+    logger.error(f"Scrubber: blob {checksum} is missing from {path}")
+
+
+def _release(claim):
+    if claim is None:
+        return
+    try:
+        claim.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCRUB_LOCK_ID})
+        claim.close()
+    except Exception:
+        # A connection that may still hold the lock must not go back to the pool
+        claim.invalidate()
+
+
+def _count(**counters):
+    with _lock:
+        for key, value in counters.items():
+            _state[key] += value
+
+
+def scrub(
+    max_blobs: int = SCRUB_BLOBS_PER_RUN,
+    workers: int = SCRUB_WORKERS,
+    max_bytes_per_second: int = SCRUB_RATE_BYTES,
+    cycle_days: int = SCRUB_CYCLE_DAYS,
+) -> dict:
+    """Verifies up to max_blobs of the least recently verified blobs."""
+    # Held on its own connection for the whole run; the batches commit as they go
+    claim = None
+    if engine.dialect.name == "postgresql":
+        claim = engine.connect()
+        if not claim.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": SCRUB_LOCK_ID}).scalar():
+            claim.close()
+            return {**status_snapshot(), "skipped": True}
+
+    with _lock:
+        already_running = _state["running"]
+        if not already_running:
+            _state.update(
+                running=True, started_at=_now().isoformat(), finished_at=None,
+                verified=0, bytes_hashed=0, mismatches=0, missing=0, errors=0, bytes_per_second=0,
+            )
+    if already_running:
+        _release(claim)
+        return status_snapshot()
+
+    per_worker_rate = max_bytes_per_second / workers if max_bytes_per_second else 0
+    due_before = _now() - timedelta(days=cycle_days)
+    started = time.monotonic()
+    done = 0
+
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            while done < max_blobs:
+                rows = (
+                    db.query(Blob.checksum, Blob.path)
+                    .filter(
+                        Blob.tier != TIER_QUARANTINE,
+                        (Blob.last_verified_at == None) | (Blob.last_verified_at < due_before),
+                        (Blob.missing_at == None) | (Blob.missing_at < due_before),
+                    )
+                    .order_by(Blob.last_verified_at.asc().nulls_first(), Blob.checksum)
+                    .limit(min(SCRUB_BATCH_SIZE, max_blobs - done))
+                    .all()
+                )
+                if not rows:
+                    break
+
+                results = pool.map(_hash_file, [r.path for r in rows], [per_worker_rate] * len(rows))
+                verified = []
+                for (checksum, path), (digest, size, error) in zip(rows, results):
+                    if error == "missing":
+                        _flag_missing(db, checksum, path)
+                    elif error:
+                        _count(errors=1)
+                        logger.error(f"Scrubber: could not read {path}: {error}")
+                    elif digest != checksum:
+                        target = _quarantine(db, checksum, path)
+                        if target:
+                            _count(mismatches=1, bytes_hashed=size)
+                            logger.error(f"Scrubber: checksum mismatch for {checksum} at {path}, quarantined to {target}")
+                    else:
+                        verified.append((checksum, path))
+                        _count(verified=1, bytes_hashed=size)
+
+                if verified:
+                    # Only where the path is unchanged: a blob tiering moved
+                    # meanwhile is verified again at its new path
+                    blobs = Blob.__table__
+                    db.execute(
+                        blobs.update()
+                        .where(blobs.c.checksum == bindparam("b_checksum"), blobs.c.path == bindparam("b_path"))
+                        .values(last_verified_at=bindparam("b_now"), missing_at=None),
+                        [{"b_checksum": c, "b_path": p, "b_now": _now()} for c, p in verified],
+                    )
+                db.commit()
+
+                done += len(rows)
+                elapsed = max(time.monotonic() - started, 1e-6)
+                with _lock:
+                    _state["last_checksum"] = rows[-1].checksum
+                    _state["bytes_per_second"] = int(_state["bytes_hashed"] / elapsed)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Scrubber failed: {e}")
+    finally:
+        db.close()
+        _release(claim)
+        with _lock:
+            _state["running"] = False
+            _state["finished_at"] = _now().isoformat()
+
+    result = status_snapshot()
+    logger.info(
+        f"Scrubber: verified {result['verified']} blobs ({result['bytes_hashed']} bytes), "
+        f"{result['mismatches']} quarantined, {result['missing']} missing"
+    )
+    return result
+
+
+def status_snapshot() -> dict:
+    with _lock:
+        return dict(_state)
+
+
+def coverage(db, cycle_days: int = SCRUB_CYCLE_DAYS) -> dict:
+    """How much of the store has been verified within the current cycle."""
+    due_before = _now() - timedelta(days=cycle_days)
+    present = (Blob.tier != TIER_QUARANTINE) & (Blob.missing_at == None)
+    total, quarantined, missing, fresh, oldest = db.query(
+        func.count(Blob.checksum),
+        func.count(Blob.checksum).filter(Blob.tier == TIER_QUARANTINE),
+        func.count(Blob.checksum).filter(Blob.tier != TIER_QUARANTINE, Blob.missing_at != None),
+        func.count(Blob.checksum).filter(present, Blob.last_verified_at >= due_before),
+        func.min(Blob.last_verified_at).filter(present),
+    ).one()
+    return {
+        "blobs": total,
+        "verified_in_cycle": fresh,
+        "never_or_overdue": total - fresh - quarantined - missing,
+        "quarantined": quarantined,
+        "missing": missing,
+        "oldest_verification": oldest.isoformat() if oldest else None,
+        "cycle_days": cycle_days,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify blob checksums")
+    parser.add_argument("--max-blobs", type=int, default=SCRUB_BLOBS_PER_RUN)
+    parser.add_argument("--workers", type=int, default=SCRUB_WORKERS)
+    parser.add_argument("--rate", type=int, default=SCRUB_RATE_BYTES, help="max bytes hashed per second (0 = unlimited)")
+    args = parser.parse_args()
+
+    print(json.dumps(scrub(args.max_blobs, args.workers, args.rate), indent=2))
+
+
+if __name__ == "__main__":
+    main()
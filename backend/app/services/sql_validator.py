@@ -5,9 +5,11 @@ from sqlglot import exp
 from sqlglot.optimizer.qualify import qualify
 from app.services.schema_provider import SchemaProvider
 
-def validate_sql(sql: str, schema: Union[Dict[str, Any], SchemaProvider]) -> Dict[str, Any]:
+def validate_sql(sql: str, schema: Union[Dict[str, Any], SchemaProvider], dialect: str = "postgres") -> Dict[str, Any]:
     """
     Validates a SQL query using sqlglot against read-only rules and a schema.
+    The query is parsed as PostgreSQL (what the LLM is prompted for) and
+    returned in the target dialect ("postgres" or "sqlite").
     
     Rules:
     1. Allow only SELECT and WITH statements.
@@ -153,8 +155,8 @@ def validate_sql(sql: str, schema: Union[Dict[str, Any], SchemaProvider]) -> Dic
     if parsed.args.get("limit") is None:
         parsed = parsed.limit(100)
         
-    # Generate final validated SQL in PostgreSQL dialect
-    validated_sql = parsed.sql(dialect="postgres")
+    # Generate final validated SQL in the target dialect
+    validated_sql = parsed.sql(dialect=dialect)
     
     return {
         "valid": True,
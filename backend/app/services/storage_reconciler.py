@@ -0,0 +1,303 @@
+"""
+Mark-and-sweep reconciliation of storage/cache against the database.
+
+Two passes, both streamed so memory stays flat on multi-terabyte stores:
+
+1. Disk -> DB: walks the CAS trees (cache/<ab>/<cd>/<sha256> and the same
+   layout on the cold volume), one worker per top-level prefix, and recounts
+   the artifact references of each batch of files. Reports
+     - orphans: files no artifact row references
+     - size mismatches: file size differs from the indexed size
+     - ref drift: blob index ref_count differs from the real artifact count
+2. DB -> disk: streams the distinct artifact paths and reports dangling rows
+   (artifact rows whose file is missing).
+
+Dry-run only reports. Apply mode rewrites the blob index counts (locking the
+rows while recounting) so orphans become zero-ref blobs that the blob GC
+sweeps after its grace period, and repoints dangling rows at the canonical
+cache path when the content is still there. Size mismatches are only
+reported; the integrity scrubber decides what is corrupt.
+
+CLI: python -m app.services.storage_reconciler [--apply] [--workers N] [--rate FILES_PER_SEC]
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.artifact import Artifact
+from app.models.blob import Blob
+from app.services.blob_gc import reset_blob_refs
+from app.utils.logger import logger
+from app.utils.storage import CACHE_ROOT, COLD_STORAGE_ROOT, cache_path_for
+
+BATCH_SIZE = 500
+SAMPLE_LIMIT = 100
+CHECKSUM_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class Throttle:
+    """Thread-safe token bucket limiting how many files are touched per second."""
+
+    def __init__(self, rate: float | None):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self, n: int = 1):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + n / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class ReconcileReport:
+    def __init__(self, apply: bool):
+        self._lock = threading.Lock()
+        self.data = {
+            "mode": "apply" if apply else "dry-run",
+            "status": "running",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+            "scanned_files": 0,
+            "scanned_bytes": 0,
+            "skipped_files": 0,
+            "orphans": {"count": 0, "bytes": 0, "sample": []},
+            "size_mismatches": {"count": 0, "sample": []},
+            "ref_drift": {"count": 0, "fixed": 0, "sample": []},
+            "dangling_rows": {"count": 0, "paths": 0, "repointed": 0, "sample": []},
+            "error": None,
+        }
+
+    def add(self, section: str, sample=None, **counters):
+        with self._lock:
+            target = self.data[section] if section else self.data
+            for key, value in counters.items():
+                target[key] += value
+            if sample is not None and len(target["sample"]) < SAMPLE_LIMIT:
+                target["sample"].append(sample)
+
+    def finish(self, error: str | None = None):
+        with self._lock:
+            self.data["status"] = "failed" if error else "completed"
+            self.data["error"] = error
+            self.data["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self.data))
+
+
+# ======================================================
+# PASS 1: DISK -> DB
+# ======================================================
+def _iter_cache_files(prefix_dir: str, report: ReconcileReport):
+    """Yields (checksum, path, size) for blobs under one cache/<ab> directory."""
+    with os.scandir(prefix_dir) as level2:
+        for sub in level2:
+            if not sub.is_dir(follow_symlinks=False):
+                continue
+            with os.scandir(sub.path) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if not CHECKSUM_RE.match(entry.name):
+                        # In-flight ".part" copies and foreign files are left alone
+                        report.add(None, skipped_files=1)
+                        continue
+                    yield entry.name, entry.path, entry.stat(follow_symlinks=False).st_size
+
+
+def _reconcile_batch(batch, apply: bool, report: ReconcileReport):
+    checksums = [c for c, _, _ in batch]
+    db = SessionLocal()
+    try:
+        # Lock the index rows first so concurrent uploads wait for our recount
+        blob_query = db.query(Blob.checksum, Blob.ref_count, Blob.size).filter(Blob.checksum.in_(checksums))
+        if apply:
+            blob_query = blob_query.with_for_update()
+        indexed = {c: (refs, size) for c, refs, size in blob_query.all()}
+
+        counted = {
+            c: (n, size)
+            for c, n, size in (
+                db.query(Artifact.checksum, func.count(Artifact.id), func.max(Artifact.size))
+                .filter(Artifact.checksum.in_(checksums))
+                .group_by(Artifact.checksum)
+                .all()
+            )
+        }
+
+        fixes = []
+        for checksum, path, size in batch:
+            refs, artifact_size = counted.get(checksum, (0, None))
+            blob = indexed.get(checksum)
+
+            if refs == 0:
+                report.add("orphans", {"checksum": checksum, "path": path, "size": size}, count=1, bytes=size)
+
+            expected_size = blob[1] if blob and blob[1] is not None else artifact_size
+            if expected_size is not None and expected_size != size:
+                report.add(
+                    "size_mismatches",
+                    {"checksum": checksum, "path": path, "size_on_disk": size, "size_indexed": expected_size},
+                    count=1,
+                )
+
+            if blob is None or blob[0] != refs:
+                report.add(
+                    "ref_drift",
+                    {"checksum": checksum, "indexed": blob[0] if blob else None, "actual": refs},
+                    count=1,
+                )
+                fixes.append((checksum, path, size, refs))
+
+        if apply and fixes:
+            reset_blob_refs(db, fixes)
+            db.commit()
+            report.add("ref_drift", fixed=len(fixes))
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+
+def _scan_prefix(prefix_dir: str, apply: bool, throttle: Throttle, report: ReconcileReport):
+    batch = []
+    for item in _iter_cache_files(prefix_dir, report):
+        throttle.wait()
+        batch.append(item)
+        report.add(None, scanned_files=1, scanned_bytes=item[2])
+        if len(batch) >= BATCH_SIZE:
+            _reconcile_batch(batch, apply, report)
+            batch = []
+    if batch:
+        _reconcile_batch(batch, apply, report)
+
+
+# ======================================================
+# PASS 2: DB -> DISK
+# ======================================================
+def _check_dangling(batch, apply: bool, pool: ThreadPoolExecutor, throttle: Throttle, report: ReconcileReport):
+    def exists(item):
+        throttle.wait()
+        return os.path.exists(item[0])
+
+    missing = [item for item, ok in zip(batch, pool.map(exists, batch)) if not ok]
+    if not missing:
+        return
+
+    db = SessionLocal()
+    try:
+        # Artifact rows keep the hot path while their blob sits in cold storage
+        cold = {
+            c
+            for c, p in db.query(Blob.checksum, Blob.path)
+            .filter(Blob.checksum.in_([c for _, c in missing]), Blob.tier == "cold")
+            .all()
+            if os.path.exists(p)
+        }
+        missing = [(path, c) for path, c in missing if c not in cold]
+
+        for path, checksum in missing:
+            rows = db.query(func.count(Artifact.id)).filter(Artifact.path == path).scalar() or 0
+            canonical = cache_path_for(checksum) if checksum else None
+            can_repoint = canonical is not None and str(canonical) != path and canonical.exists()
+            report.add(
+                "dangling_rows",
+                {"path": path, "checksum": checksum, "rows": rows, "recoverable": can_repoint},
+                count=rows,
+                paths=1,
+            )
+            if apply and can_repoint:
+                db.query(Artifact).filter(Artifact.path == path).update(
+                    {"path": str(canonical)}, synchronize_session=False
+                )
+                report.add("dangling_rows", repointed=rows)
+        if apply:
+            db.commit()
+    finally:
+        db.close()
+
+
+def _scan_artifact_paths(apply: bool, workers: int, throttle: Throttle, report: ReconcileReport):
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Artifact.path, Artifact.checksum)
+            .filter(Artifact.path.isnot(None))
+            .distinct()
+            .execution_options(yield_per=5000)
+        )
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            batch = []
+            for path, checksum in rows:
+                batch.append((path, checksum))
+                if len(batch) >= BATCH_SIZE:
+                    _check_dangling(batch, apply, pool, throttle, report)
+                    batch = []
+            if batch:
+                _check_dangling(batch, apply, pool, throttle, report)
+    finally:
+        db.close()
+
+
+def reconcile(
+    apply: bool = False,
+    workers: int = 8,
+    max_files_per_second: float | None = None,
+    report: ReconcileReport | None = None,
+) -> dict:
+    """Runs both passes and returns the report."""
+    report = report or ReconcileReport(apply)
+    throttle = Throttle(max_files_per_second)
+    try:
+        prefixes = sorted(
+            e.path
+            for root in (CACHE_ROOT, COLD_STORAGE_ROOT)
+            for e in os.scandir(root)
+            if e.is_dir(follow_symlinks=False)
+        )
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(_scan_prefix, p, apply, throttle, report) for p in prefixes]:
+                future.result()
+
+        _scan_artifact_paths(apply, workers, throttle, report)
+        report.finish()
+    except Exception as e:
+        logger.error(f"Storage reconcile failed: {e}")
+        report.finish(str(e))
+
+    result = report.snapshot()
+    logger.info(
+        f"Storage reconcile ({result['mode']}): {result['scanned_files']} files, "
+        f"{result['orphans']['count']} orphans ({result['orphans']['bytes']} bytes), "
+        f"{result['dangling_rows']['count']} dangling rows, "
+        f"{result['size_mismatches']['count']} size mismatches"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile storage/cache with the database")
+    parser.add_argument("--apply", action="store_true", help="fix the blob index and dangling rows (default: dry run)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None, help="max files checked per second")
+    args = parser.parse_args()
+
+    print(json.dumps(reconcile(args.apply, args.workers, args.rate), indent=2))
+
+
+if __name__ == "__main__":
+    main()
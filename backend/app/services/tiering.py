@@ -0,0 +1,190 @@
+"""
+Hot/cold storage tiering for blobs.
+
+Only active versions are served routinely, so blobs referenced exclusively by
+inactive versions older than TIERING_COLD_AFTER_DAYS (and not read for that
+long) are moved from storage/cache to COLD_STORAGE_ROOT. Artifact rows keep
+pointing at the hot path; the blob index records where the bytes really are.
+
+Anything that opens blob files (downloads, previews, checkout) calls
+recall_blobs first, which copies cold blobs back into the cache and stamps
+last_accessed_at, so tiering is invisible to readers apart from latency.
+Uploading the content of a cold blob again makes it hot in the same
+transaction (blob_gc.restore_blobs).
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import exists, func, or_, select
+
+from app.database import SessionLocal
+from app.models.artifact import Artifact
+from app.models.blob import Blob
+from app.models.version import ModelVersion
+from app.utils.logger import logger
+from app.utils.storage import cache_path_for, cold_path_for, place_blob
+
+TIER_HOT = "hot"
+TIER_COLD = "cold"
+
+COLD_AFTER_DAYS = int(os.getenv("TIERING_COLD_AFTER_DAYS", "30"))
+TIERING_INTERVAL_SECONDS = int(os.getenv("TIERING_INTERVAL", "3600"))
+TIERING_BATCH_SIZE = int(os.getenv("TIERING_BATCH", "200"))
+
+# Don't rewrite last_accessed_at more often than this per blob
+TOUCH_RESOLUTION = timedelta(hours=1)
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _cold_candidates(db, cutoff: datetime, after: str, limit: int):
+    """
+    Hot blobs at their canonical cache path that no active or recent version
+    references and that were not read since cutoff.
+    """
+    still_hot = (
+        select(Artifact.id)
+        .join(ModelVersion, Artifact.version_id == ModelVersion.id)
+        .where(
+            Artifact.checksum == Blob.checksum,
+            or_(ModelVersion.is_active == True, ModelVersion.created_at >= cutoff),
+        )
+    )
+    return (
+        db.query(Blob.checksum, Blob.path, Blob.size)
+        .filter(
+            Blob.tier == TIER_HOT,
+            Blob.ref_count > 0,
+            Blob.checksum > after,
+            func.coalesce(Blob.last_accessed_at, Blob.created_at) < cutoff,
+            ~exists(still_hot),
+        )
+        .order_by(Blob.checksum)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def demote_cold_blobs(
+    cold_after_days: int = COLD_AFTER_DAYS,
+    batch_size: int = TIERING_BATCH_SIZE,
+    max_blobs: int | None = None,
+) -> dict:
+    """
+    Moves eligible blobs to the cold volume in batches. Each batch copies the
+    files, flips the index rows to cold and commits before removing the hot
+    copies, so a crash leaves at worst a redundant copy.
+    """
+    cutoff = _now() - timedelta(days=cold_after_days)
+    moved = moved_bytes = failed = 0
+    after = ""
+
+    db = SessionLocal()
+    try:
+        while max_blobs is None or moved < max_blobs:
+            rows = _cold_candidates(db, cutoff, after, batch_size)
+            if not rows:
+                break
+            after = rows[-1].checksum
+
+            hot_copies = []
+            for checksum, path, size in rows:
+                if path != str(cache_path_for(checksum)):
+                    continue  # legacy location; artifact rows could not find it again
+                cold = cold_path_for(checksum)
+                try:
+                    place_blob(Path(path), cold)
+                    if size is not None and cold.stat().st_size != size:
+                        raise OSError(f"size mismatch after copy ({cold.stat().st_size} != {size})")
+                except OSError as e:
+                    failed += 1
+                    logger.error(f"Tiering: could not demote {checksum[:8]}: {e}")
+                    continue
+                db.query(Blob).filter(Blob.checksum == checksum).update(
+                    {"tier": TIER_COLD, "path": str(cold)}, synchronize_session=False
+                )
+                hot_copies.append(Path(path))
+                moved += 1
+                moved_bytes += size or 0
+            db.commit()
+
+            for p in hot_copies:
+                p.unlink(missing_ok=True)
+    finally:
+        db.close()
+
+    if moved or failed:
+        logger.info(f"Tiering: moved {moved} blobs ({moved_bytes} bytes) to cold storage, {failed} failed")
+    return {"moved": moved, "bytes_moved": moved_bytes, "failed": failed}
+
+
+def recall_blobs(checksums) -> int:
+    """
+    Brings cold blobs back into storage/cache and records the access.
+    Returns the number of blobs recalled.
+    """
+    unique = sorted({c for c in checksums if c})
+    recalled = 0
+    now = _now()
+
+    db = SessionLocal()
+    try:
+        for i in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+            batch = unique[i : i + LOOKUP_CHUNK_SIZE]
+            cold_rows = (
+                db.query(Blob)
+                .filter(Blob.checksum.in_(batch), Blob.tier == TIER_COLD)
+                .with_for_update()
+                .all()
+            )
+            cold_copies = []
+            for blob in cold_rows:
+                hot = cache_path_for(blob.checksum)
+                try:
+                    # A re-upload may already have put the content back
+                    if not hot.exists():
+                        place_blob(Path(blob.path), hot)
+                except OSError as e:
+                    logger.error(f"Tiering: could not recall {blob.checksum[:8]}: {e}")
+                    continue
+                cold_copies.append(Path(blob.path))
+                blob.tier = TIER_HOT
+                blob.path = str(hot)
+                recalled += 1
+
+            db.query(Blob).filter(
+                Blob.checksum.in_(batch),
+                or_(Blob.last_accessed_at == None, Blob.last_accessed_at < now - TOUCH_RESOLUTION),
+            ).update({"last_accessed_at": now}, synchronize_session=False)
+            db.commit()
+
+            for p in cold_copies:
+                p.unlink(missing_ok=True)
+    finally:
+        db.close()
+
+    if recalled:
+        logger.info(f"Tiering: recalled {recalled} blobs from cold storage")
+    return recalled
+
+
+def recall_version(version_id: int) -> int:
+    """Recalls every blob of a version (e.g. after checkout)."""
+    db = SessionLocal()
+    try:
+        checksums = [
+            c for (c,) in db.query(Artifact.checksum).filter(Artifact.version_id == version_id).distinct()
+        ]
+    finally:
+        db.close()
+    return recall_blobs(checksums)
+
+
+def tier_summary(db) -> dict:
+    rows = db.query(Blob.tier, func.count(Blob.checksum), func.coalesce(func.sum(Blob.size), 0)).group_by(Blob.tier).all()
+    return {tier: {"blobs": count, "bytes": int(size)} for tier, count, size in rows}
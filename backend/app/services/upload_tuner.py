@@ -0,0 +1,98 @@
+"""
+Server-advertised upload parameters for the chunked uploader.
+
+Every upload_chunk call reports how many files / bytes it handled and how
+long it took. The tuner keeps an exponentially weighted moving average of
+per-file latency and throughput and combines it with the current DB pool
+checkout level, so clients size their chunks (and parallelism) to what this
+process can actually absorb instead of using fixed guesses.
+
+State is per API process; each worker advertises what it measures itself.
+"""
+import os
+import threading
+
+from app.database import engine
+
+# A chunk should take about this long to ingest
+TARGET_CHUNK_SECONDS = float(os.getenv("UPLOAD_TARGET_CHUNK_SECONDS", "10"))
+
+MIN_CHUNK_FILES = 20
+MAX_CHUNK_FILES = int(os.getenv("UPLOAD_MAX_CHUNK_FILES", "2000"))
+MIN_CHUNK_BYTES = 5 * 1024 * 1024
+MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(200 * 1024 * 1024)))
+MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "4"))
+
+# Defaults match the previous static client limits until we have samples
+DEFAULT_CHUNK_FILES = 500
+DEFAULT_CHUNK_BYTES = 50 * 1024 * 1024
+DEFAULT_CONCURRENCY = 2
+
+EWMA_ALPHA = 0.3
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, int(value)))
+
+
+def pool_load() -> float:
+    """Fraction of DB connections currently checked out (0.0 - 1.0)."""
+    pool = engine.pool
+    try:
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        return min(pool.checkedout() / capacity, 1.0) if capacity else 0.0
+    except (AttributeError, TypeError):
+        # SingletonThreadPool / NullPool etc. don't expose checkout counts
+        return 0.0
+
+
+class UploadTuner:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds_per_file = None
+        self.bytes_per_second = None
+        self.samples = 0
+
+    def record(self, files: int, size: int, seconds: float):
+        if files <= 0 or seconds <= 0:
+            return
+        per_file = seconds / files
+        throughput = size / seconds
+        with self._lock:
+            if self.samples == 0:
+                self.seconds_per_file, self.bytes_per_second = per_file, throughput
+            else:
+                self.seconds_per_file += EWMA_ALPHA * (per_file - self.seconds_per_file)
+                self.bytes_per_second += EWMA_ALPHA * (throughput - self.bytes_per_second)
+            self.samples += 1
+
+    def params(self) -> dict:
+        load = pool_load()
+        with self._lock:
+            seconds_per_file = self.seconds_per_file
+            bytes_per_second = self.bytes_per_second
+            samples = self.samples
+
+        if samples == 0:
+            max_files, max_bytes = DEFAULT_CHUNK_FILES, DEFAULT_CHUNK_BYTES
+        else:
+            max_files = _clamp(TARGET_CHUNK_SECONDS / max(seconds_per_file, 1e-4), MIN_CHUNK_FILES, MAX_CHUNK_FILES)
+            max_bytes = _clamp(bytes_per_second * TARGET_CHUNK_SECONDS, MIN_CHUNK_BYTES, MAX_CHUNK_BYTES)
+
+        # Each in-flight chunk holds one DB connection; back off as the pool fills up
+        concurrency = DEFAULT_CONCURRENCY if samples == 0 else MAX_CONCURRENCY
+        concurrency = _clamp(concurrency * (1.0 - load), 1, MAX_CONCURRENCY)
+
+        return {
+            "max_files": max_files,
+            "max_bytes": max_bytes,
+            "concurrency": concurrency,
+            "db_pool_load": round(load, 2),
+            "seconds_per_file": round(seconds_per_file, 4) if seconds_per_file is not None else None,
+            "bytes_per_second": int(bytes_per_second) if bytes_per_second is not None else None,
+            "samples": samples,
+        }
+
+
+upload_tuner = UploadTuner()
+
@@ -0,0 +1,281 @@
+from collections import defaultdict
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.model import Model
+from app.models.version import ModelVersion, VersionDelta
+from app.models.artifact import Artifact
+from app.models.blob import Blob
+from app.schemas.version import ArtifactRef, VersionManifest
+from app.services.blob_gc import retain_artifacts
+from app.services.counters import adjust_artifact_counts, adjust_version_counts
+from app.services.events import emit
+from app.services.leaderboard import refresh_models
+from app.services.metrics_store import sync_version_metrics
+
+# Max bound parameters per IN (...) query, same batching as the upload paths
+LOOKUP_CHUNK_SIZE = 500
+
+METRIC_FIELDS = (
+    "accuracy", "precision", "recall", "f1_score",
+    "cpu_utilization", "gpu_utilization", "inference_time",
+    "cpu_memory_usage", "gpu_memory_usage", "cameras_supported",
+    "frame_tp", "frame_tn", "frame_fp", "frame_fn",
+    "alert_tp", "alert_tn", "alert_fp", "alert_fn",
+)
+
+
+def resolve_blob_refs(db: Session, checksums) -> dict[str, tuple[str, int]]:
+    """
+    Looks up already-stored blobs by checksum in the blob index.
+    Returns {checksum: (path, size)} for every checksum known to the store.
+    """
+    unique_checksums = list(set(checksums))
+    found = {}
+    for i in range(0, len(unique_checksums), LOOKUP_CHUNK_SIZE):
+        batch = unique_checksums[i : i + LOOKUP_CHUNK_SIZE]
+        rows = (
+            db.query(Blob.checksum, Blob.path, Blob.size)
+            .filter(Blob.checksum.in_(batch))
+            .all()
+        )
+        for checksum, path, size in rows:
+            found[checksum] = (path, size)
+    return found
+
+
+def require_blob_refs(
+    db: Session,
+    refs: list[ArtifactRef],
+    known_blobs: dict[str, tuple[str, int]] | None = None,
+) -> dict[str, tuple[str, int]]:
+    """
+    Same as resolve_blob_refs, but rejects the request if any ref is unknown.
+    known_blobs are blobs the caller has just written and not indexed yet.
+    """
+    known_blobs = known_blobs or {}
+    blobs = resolve_blob_refs(db, [r.checksum for r in refs if r.checksum not in known_blobs])
+    blobs.update(known_blobs)
+    unknown = {r.checksum for r in refs} - blobs.keys()
+    if unknown:
+        sample = ", ".join(sorted(unknown)[:10])
+        raise HTTPException(
+            400,
+            f"{len(unknown)} checksum(s) are not in the blob store, upload them first: {sample}",
+        )
+    return blobs
+
+
+def _snapshot_checksums(db: Session, version_ids) -> dict[int, dict[str, set[str]]]:
+    """Dataset/label checksum sets of the given versions, keyed by version id."""
+    snapshots = defaultdict(lambda: {"dataset": set(), "label": set()})
+    if not version_ids:
+        return snapshots
+    rows = (
+        db.query(Artifact.version_id, Artifact.type, Artifact.checksum)
+        .filter(Artifact.version_id.in_(list(version_ids)))
+        .filter(Artifact.type.in_(["dataset", "label"]))
+        .all()
+    )
+    for version_id, artifact_type, checksum in rows:
+        snapshots[version_id][artifact_type].add(checksum)
+    return snapshots
+
+
+def register_versions(
+    db: Session,
+    manifests: list[VersionManifest],
+    known_blobs: dict[str, tuple[str, int]] | None = None,
+) -> list[ModelVersion]:
+    """
+    Registers several versions from manifests whose artifacts reference blobs
+    that are already in the store (no file transfer).
+
+    Everything happens in the caller's transaction with a fixed number of
+    queries regardless of batch size: one model lookup, one blob lookup, one
+    version-number lookup, one active-flag update and bulk inserts for
+    versions, artifacts and deltas. The caller commits.
+
+    Several manifests may target the same model; they get consecutive version
+    numbers in manifest order and only the last one becomes active. Delta
+    counts are relative to the model's previous version: a dataset/label file
+    is "reused" when its checksum was in the previous snapshot, "new" otherwise.
+    """
+    model_ids = {m.model_id for m in manifests}
+
+    # -------------------------------
+    # Validate models
+    # -------------------------------
+    scopes = {
+        mid: (factory_id, algorithm_id)
+        for mid, factory_id, algorithm_id in (
+            db.query(Model.id, Model.factory_id, Model.algorithm_id).filter(Model.id.in_(model_ids)).all()
+        )
+    }
+    missing_models = model_ids - set(scopes)
+    if missing_models:
+        raise HTTPException(404, f"Model(s) not found: {sorted(missing_models)}")
+
+    # -------------------------------
+    # Validate blob references
+    # -------------------------------
+    blobs = require_blob_refs(db, [a for m in manifests for a in m.artifacts], known_blobs)
+
+    # -------------------------------
+    # Base version inheritance (dataset + labels)
+    # -------------------------------
+    base_ids = {m.base_version_id for m in manifests if m.base_version_id}
+    base_artifacts = defaultdict(list)
+    if base_ids:
+        base_models = dict(
+            db.query(ModelVersion.id, ModelVersion.model_id).filter(ModelVersion.id.in_(base_ids)).all()
+        )
+        missing_bases = base_ids - set(base_models)
+        if missing_bases:
+            raise HTTPException(404, f"Base version(s) not found: {sorted(missing_bases)}")
+        foreign = sorted({
+            m.base_version_id for m in manifests
+            if m.base_version_id and base_models[m.base_version_id] != m.model_id
+        })
+        if foreign:
+            raise HTTPException(400, f"Base version(s) belong to a different model: {foreign}")
+
+        rows = (
+            db.query(Artifact.version_id, Artifact.name, Artifact.type, Artifact.path, Artifact.size, Artifact.checksum)
+            .filter(Artifact.version_id.in_(base_ids))
+            .filter(Artifact.type.in_(["dataset", "label"]))
+            .all()
+        )
+        for r in rows:
+            base_artifacts[r.version_id].append(r)
+
+    # -------------------------------
+    # Version numbers + previous snapshots
+    # -------------------------------
+    latest_sub = (
+        db.query(
+            ModelVersion.model_id.label("model_id"),
+            func.max(ModelVersion.version_number).label("latest"),
+        )
+        .filter(ModelVersion.model_id.in_(model_ids))
+        .group_by(ModelVersion.model_id)
+        .subquery()
+    )
+    prev_rows = (
+        db.query(ModelVersion.id, ModelVersion.model_id, ModelVersion.version_number)
+        .join(
+            latest_sub,
+            (ModelVersion.model_id == latest_sub.c.model_id)
+            & (ModelVersion.version_number == latest_sub.c.latest),
+        )
+        .all()
+    )
+    latest_number = {mid: 0 for mid in model_ids}
+    prev_version_of = {}
+    for vid, mid, number in prev_rows:
+        latest_number[mid] = number or 0
+        prev_version_of[mid] = vid
+
+    snapshots = _snapshot_checksums(db, prev_version_of.values())
+    prev_sets = {
+        mid: snapshots[vid] for mid, vid in prev_version_of.items()
+    }
+
+    # -------------------------------
+    # Insert versions (single active flag update)
+    # -------------------------------
+    db.query(ModelVersion).filter(
+        ModelVersion.model_id.in_(model_ids),
+        ModelVersion.is_active == True,
+    ).update({"is_active": False}, synchronize_session=False)
+
+    last_index = {m.model_id: idx for idx, m in enumerate(manifests)}
+    versions = []
+    for idx, m in enumerate(manifests):
+        latest_number[m.model_id] += 1
+        versions.append(
+            ModelVersion(
+                model_id=m.model_id,
+                version_number=latest_number[m.model_id],
+                note=m.note,
+                is_active=(last_index[m.model_id] == idx),
+                ini_config=m.ini_config,
+                parameters=m.parameters,
+                resource_metrics=m.resource_metrics,
+                **{f: getattr(m, f) for f in METRIC_FIELDS},
+            )
+        )
+    db.add_all(versions)
+    db.flush()  # Populate ids for artifacts / deltas
+    sync_version_metrics(db, versions)
+
+    # -------------------------------
+    # Artifacts + deltas (bulk)
+    # -------------------------------
+    artifact_rows = []
+    delta_rows = []
+    for version, m in zip(versions, manifests):
+        # (type, name) -> row; explicit refs override inherited files of the same name
+        snapshot = {}
+        for a in base_artifacts.get(m.base_version_id, []):
+            snapshot[(a.type, a.name)] = {
+                "name": a.name, "type": a.type, "path": a.path,
+                "size": a.size, "checksum": a.checksum,
+            }
+        for ref in m.artifacts:
+            path, size = blobs[ref.checksum]
+            snapshot[(ref.type, ref.name)] = {
+                "name": ref.name, "type": ref.type, "path": path,
+                "size": size, "checksum": ref.checksum,
+            }
+
+        prev = prev_sets.get(m.model_id, {"dataset": set(), "label": set()})
+        current = {"dataset": set(), "label": set()}
+        counts = {"dataset": [0, 0], "label": [0, 0]}  # [new, reused]
+
+        for row in snapshot.values():
+            artifact_rows.append({"version_id": version.id, **row})
+            if row["type"] in current:
+                current[row["type"]].add(row["checksum"])
+                counts[row["type"]][row["checksum"] in prev[row["type"]]] += 1
+
+        dataset_removed = len(prev["dataset"] - current["dataset"])
+        label_removed = len(prev["label"] - current["label"])
+        (dataset_new, dataset_reused), (label_new, label_reused) = counts["dataset"], counts["label"]
+
+        delta_rows.append({
+            "version_id": version.id,
+            "dataset_count": len(current["dataset"]),
+            "label_count": len(current["label"]),
+            "dataset_new": dataset_new,
+            "dataset_reused": dataset_reused,
+            "dataset_removed": dataset_removed,
+            "label_new": label_new,
+            "label_reused": label_reused,
+            "label_removed": label_removed,
+            "new_count": dataset_new + label_new,
+            "reused_count": dataset_reused + label_reused,
+            "removed_count": dataset_removed + label_removed,
+        })
+
+        # Next manifest of the same model diffs against this one
+        prev_sets[m.model_id] = current
+
+    if artifact_rows:
+        db.bulk_insert_mappings(Artifact, artifact_rows)
+        retain_artifacts(db, artifact_rows)
+        adjust_artifact_counts(db, artifact_rows)
+    db.bulk_insert_mappings(VersionDelta, delta_rows)
+    adjust_version_counts(db, [m.model_id for m in manifests])
+    refresh_models(db, model_ids)
+    for version in versions:
+        factory_id, algorithm_id = scopes[version.model_id]
+        emit(
+            db, "version.created",
+            factory_id=factory_id, algorithm_id=algorithm_id,
+            model_id=version.model_id, version_id=version.id,
+            version_number=version.version_number,
+        )
+
+    return versions
@@ -0,0 +1,43 @@
+def lttb(points: list, threshold: int, x=lambda p: p[0], y=lambda p: p[1]) -> list:
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the first and last
+    point and, from each of threshold - 2 equal buckets in between, the point
+    forming the largest triangle with the previously kept point and the mean
+    of the next bucket. Preserves peaks and dips that averaging would flatten.
+
+    points must be sorted by x; x / y extract the coordinates of a point.
+    Returns the selected points themselves (at most threshold of them).
+    """
+    n = len(points)
+    if threshold >= n or n <= 2:
+        return list(points)
+    if threshold <= 2:
+        return [points[0], points[-1]][:max(threshold, 0)]
+
+    xs = [float(x(p)) for p in points]
+    ys = [float(y(p)) for p in points]
+    every = (n - 2) / (threshold - 2)
+
+    selected = [points[0]]
+    a = 0
+    for i in range(threshold - 2):
+        # Mean of the next bucket (the last point for the final bucket)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(points[best])
+        a = best
+
+    selected.append(points[-1])
+    return selected
@@ -0,0 +1,46 @@
+import os
+import shutil
+from pathlib import Path
+
+STORAGE_ROOT = Path("storage")
+CACHE_ROOT = STORAGE_ROOT / "cache"
+TEMP_ROOT = STORAGE_ROOT / "temp"
+STAGING_ROOT = STORAGE_ROOT / "staging"
+# Secondary (cheaper / slower) volume for blobs of old inactive versions
+COLD_STORAGE_ROOT = Path(os.getenv("COLD_STORAGE_ROOT", str(STORAGE_ROOT / "cold")))
+# Blobs whose content no longer matches their checksum
+QUARANTINE_ROOT = STORAGE_ROOT / "quarantine"
+# Built report files (app.services.report_jobs)
+REPORTS_ROOT = STORAGE_ROOT / "reports"
+
+for _root in (CACHE_ROOT, TEMP_ROOT, STAGING_ROOT, COLD_STORAGE_ROOT, QUARANTINE_ROOT, REPORTS_ROOT):
+    _root.mkdir(parents=True, exist_ok=True)
+
+
+def cache_path_for(checksum: str) -> Path:
+    """Content-addressed location of a blob: cache/<ab>/<cd>/<sha256>."""
+    return CACHE_ROOT / checksum[:2] / checksum[2:4] / checksum
+
+
+def cold_path_for(checksum: str) -> Path:
+    """Location of a demoted blob on the cold volume (same fan-out as the cache)."""
+    return COLD_STORAGE_ROOT / checksum[:2] / checksum[2:4] / checksum
+
+
+def place_blob(src: Path, dst: Path) -> None:
+    """
+    Puts src into the store at dst without consuming src.
+    Hard-links when possible (same volume), otherwise copies via a temp name
+    so a crash never leaves a truncated blob under its final checksum.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+        return
+    except FileExistsError:
+        return
+    except OSError:
+        pass
+    tmp = dst.with_name(dst.name + ".part")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
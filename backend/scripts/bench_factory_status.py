@@ -0,0 +1,195 @@
+"""
+Benchmark of the factory-status tree (GET /dashboard/factory-status).
+
+Times the previous builder (two queries plus a linear scan of the factory's
+algorithm list for every model row, then a query for empty factories) against
+app.api.dashboard.build_factory_status (one outer-joined query assembled
+through dict indexes), checks that both return the same tree, and times the
+collapsed (expand=false) and single-factory variants.
+
+    DATABASE_URL=... python scripts/bench_factory_status.py [--runs 3]
+    DATABASE_URL=sqlite:///bench.db python scripts/bench_factory_status.py --seed
+
+--seed fills an empty database with --factories factories, --algorithms
+algorithms and --models-per-factory models per factory (each on a different
+algorithm, one active version each). Defaults: 1000 x 200 x 200.
+"""
+import argparse
+import inspect
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.api.dashboard import build_factory_status, get_factory_status
+from app.database import Base, SessionLocal, engine
+from app.migrations import run_migrations
+from app.models.algorithm import Algorithm
+from app.models.factory import Factory
+from app.models.model import Model
+from app.models.version import ModelVersion
+
+
+def seed(db, factories: int, algorithms: int, models_per_factory: int):
+    if db.query(Factory.id).first():
+        print("Database is not empty, skipping --seed")
+        return
+    db.execute(Algorithm.__table__.insert(), [{"name": f"algorithm-{i:04d}"} for i in range(algorithms)])
+    db.execute(Factory.__table__.insert(), [{"name": f"factory-{i:05d}"} for i in range(factories)])
+    algorithm_ids = [a for (a,) in db.query(Algorithm.id).order_by(Algorithm.id)]
+    factory_ids = [f for (f,) in db.query(Factory.id).order_by(Factory.id)]
+
+    per_factory = min(models_per_factory, len(algorithm_ids))
+    for i in range(0, len(factory_ids), 50):
+        db.execute(
+            Model.__table__.insert(),
+            [
+                {"name": f"model-{f}-{n}", "factory_id": f, "algorithm_id": algorithm_ids[(f + n) % len(algorithm_ids)]}
+                for f in factory_ids[i : i + 50]
+                for n in range(per_factory)
+            ],
+        )
+    model_ids = [m for (m,) in db.query(Model.id).order_by(Model.id)]
+    for i in range(0, len(model_ids), 10_000):
+        db.execute(
+            ModelVersion.__table__.insert(),
+            [{"model_id": m, "version_number": 1, "is_active": True} for m in model_ids[i : i + 10_000]],
+        )
+    db.commit()
+    print(f"Seeded {len(factory_ids)} factories, {len(algorithm_ids)} algorithms, {len(model_ids)} models")
+
+
+def legacy_factory_status(db):
+    """The builder as it was before the single-query rewrite."""
+    active_versions = (
+        db.query(
+            ModelVersion.version_number,
+            ModelVersion.updated_at,
+            Model.id.label("model_id"),
+            Model.name.label("model_name"),
+            Algorithm.id.label("algorithm_id"),
+            Algorithm.name.label("algorithm_name"),
+            Factory.id.label("factory_id"),
+            Factory.name.label("factory_name")
+        )
+        .join(Model, Model.id == ModelVersion.model_id)
+        .join(Algorithm, Algorithm.id == Model.algorithm_id)
+        .join(Factory, Factory.id == Model.factory_id)
+        .filter(ModelVersion.is_active == True)
+        .all()
+    )
+    active_map = {}
+    for v in active_versions:
+        active_map.setdefault((v.factory_id, v.algorithm_id), []).append({
+            "model_id": v.model_id,
+            "model_name": v.model_name,
+            "version_number": v.version_number,
+            "updated_at": v.updated_at
+        })
+
+    all_models = (
+        db.query(
+            Model.id.label("model_id"),
+            Algorithm.id.label("algorithm_id"),
+            Algorithm.name.label("algorithm_name"),
+            Factory.id.label("factory_id"),
+            Factory.name.label("factory_name")
+        )
+        .join(Algorithm, Algorithm.id == Model.algorithm_id)
+        .join(Factory, Factory.id == Model.factory_id)
+        .order_by(Factory.name, Algorithm.name, Model.name)
+        .all()
+    )
+    status_tree = {}
+    for row in all_models:
+        fid = row.factory_id
+        if fid not in status_tree:
+            status_tree[fid] = {"factory_id": fid, "factory_name": row.factory_name, "algorithms": []}
+        algo_node = next((a for a in status_tree[fid]["algorithms"] if a["algorithm_id"] == row.algorithm_id), None)
+        if not algo_node:
+            status_tree[fid]["algorithms"].append({
+                "algorithm_id": row.algorithm_id,
+                "algorithm_name": row.algorithm_name,
+                "active_models": active_map.get((fid, row.algorithm_id), [])
+            })
+
+    for f in db.query(Factory).filter(~Factory.models.any()).all():
+        if f.id not in status_tree:
+            status_tree[f.id] = {"factory_id": f.id, "factory_name": f.name, "algorithms": []}
+    return list(status_tree.values())
+
+
+def _normalized(tree):
+    """Order-insensitive form (the legacy builder appended empty factories last)."""
+    return sorted(
+        (
+            node["factory_id"],
+            sorted(
+                (a["algorithm_id"], sorted((m["model_id"], m["version_number"]) for m in a["active_models"]))
+                for a in node["algorithms"]
+            ),
+        )
+        for node in tree
+    )
+
+
+def measure(fn, runs: int):
+    best = None
+    for _ in range(runs):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            result = fn(db)
+            elapsed = (time.perf_counter() - started) * 1000
+        finally:
+            db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(runs: int):
+    db = SessionLocal()
+    try:
+        factory_id = db.query(Factory.id).order_by(Factory.id).limit(1).scalar()
+    finally:
+        db.close()
+    collapsed = inspect.unwrap(get_factory_status)  # the plain route, without the cache and async wrappers
+
+    legacy_ms, legacy = measure(legacy_factory_status, runs)
+    tree_ms, tree = measure(build_factory_status, runs)
+    collapsed_ms, _ = measure(lambda db: collapsed(factory_id=None, expand=False, db=db), runs)
+    single_ms, _ = measure(lambda db: build_factory_status(db, factory_id), runs)
+
+    rows = sum(len(a["active_models"]) for node in tree for a in node["algorithms"])
+    print(f"{len(tree)} factories, {rows} active models (best of {runs})")
+    print(f"{'builder':28} {'ms':>10}")
+    print(f"{'legacy (list scan)':28} {legacy_ms:10.1f}")
+    print(f"{'single query':28} {tree_ms:10.1f}   {legacy_ms / max(tree_ms, 1e-6):.1f}x")
+    print(f"{'collapsed (expand=false)':28} {collapsed_ms:10.1f}")
+    print(f"{'one factory':28} {single_ms:10.1f}")
+    print("trees match" if _normalized(legacy) == _normalized(tree) else "TREES DIFFER")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="executions per builder (best is reported)")
+    parser.add_argument("--seed", action="store_true", help="fill an empty database with synthetic data first")
+    parser.add_argument("--factories", type=int, default=1000)
+    parser.add_argument("--algorithms", type=int, default=200)
+    parser.add_argument("--models-per-factory", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    if args.seed:
+        db = SessionLocal()
+        try:
+            seed(db, args.factories, args.algorithms, args.models_per_factory)
+        finally:
+            db.close()
+    run(args.runs)
+
+
+if __name__ == "__main__":
+    main()
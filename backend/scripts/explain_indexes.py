@@ -0,0 +1,195 @@
+"""
+Before/after EXPLAIN benchmark for the hot-path indexes (app/migrations/m0003).
+
+For each representative query from versions.py / dashboard.py it prints the
+plan and the mean execution time twice: with the m0003 indexes dropped inside
+a transaction that is rolled back ("before") and with them in place ("after";
+the indexes are recreated if the driver committed the drop). Dropping takes an
+exclusive lock on the tables for the duration of the run, so point it at a
+copy of the database, not at production.
+
+    DATABASE_URL=... python scripts/explain_indexes.py [--runs 20]
+    DATABASE_URL=sqlite:///bench.db python scripts/explain_indexes.py --seed 20000
+
+--seed fills an empty database with synthetic factories/models/versions/
+artifacts first (roughly 50 artifacts per version).
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import desc, func, text
+
+from app.database import Base, SessionLocal, engine
+from app.migrations import run_migrations
+from app.migrations import m0003_hot_path_indexes as hot_path_indexes
+from app.models.algorithm import Algorithm
+from app.models.artifact import Artifact
+from app.models.factory import Factory
+from app.models.model import Model
+from app.models.version import ModelVersion
+
+ARTIFACTS_PER_VERSION = 50
+
+
+def seed(db, versions: int):
+    if db.query(ModelVersion.id).first():
+        print("Database is not empty, skipping --seed")
+        return
+    rng = random.Random(36)
+    factories = [Factory(name=f"factory-{i}") for i in range(10)]
+    algorithms = [Algorithm(name=f"algorithm-{i}") for i in range(20)]
+    db.add_all(factories + algorithms)
+    db.flush()
+    models = [
+        Model(name=f"model-{i}", factory_id=rng.choice(factories).id, algorithm_id=rng.choice(algorithms).id)
+        for i in range(max(versions // 20, 1))
+    ]
+    db.add_all(models)
+    db.flush()
+
+    numbers = {}
+    version_rows = []
+    for _ in range(versions):
+        model = rng.choice(models)
+        numbers[model.id] = numbers.get(model.id, 0) + 1
+        version_rows.append({"model_id": model.id, "version_number": numbers[model.id], "is_active": False})
+    db.execute(ModelVersion.__table__.insert(), version_rows)
+    db.execute(
+        text(
+            "UPDATE model_versions SET is_active = :t WHERE id IN "
+            "(SELECT MAX(id) FROM model_versions GROUP BY model_id)"
+        ),
+        {"t": True},
+    )
+
+    version_ids = [vid for (vid,) in db.query(ModelVersion.id)]
+    for i in range(0, len(version_ids), 200):
+        rows = [
+            {
+                "version_id": vid,
+                "name": f"file-{n}.jpg",
+                "type": rng.choice(("dataset", "dataset", "dataset", "label", "model", "code")),
+                "path": f"storage/cache/{vid}/{n}",
+                "size": rng.randint(1_000, 5_000_000),
+                "checksum": f"{rng.getrandbits(256):064x}",
+            }
+            for vid in version_ids[i : i + 200]
+            for n in range(ARTIFACTS_PER_VERSION)
+        ]
+        db.execute(Artifact.__table__.insert(), rows)
+    db.commit()
+    print(f"Seeded {len(models)} models, {versions} versions, {versions * ARTIFACTS_PER_VERSION} artifacts")
+
+
+def queries(db):
+    """(label, query) pairs mirroring the API's hot paths."""
+    model_id = db.query(func.max(Model.id)).scalar() or 0
+    factory_id, algorithm_id = db.query(Model.factory_id, Model.algorithm_id).filter(Model.id == model_id).first() or (0, 0)
+    version_id = db.query(func.max(ModelVersion.id)).filter(ModelVersion.model_id == model_id).scalar() or 0
+    checksums = [c for (c,) in db.query(Artifact.checksum).filter(Artifact.version_id == version_id).limit(20)]
+
+    return [
+        ("model scope check", db.query(Model).filter(
+            Model.id == model_id, Model.algorithm_id == algorithm_id, Model.factory_id == factory_id)),
+        ("next version number", db.query(func.max(ModelVersion.version_number)).filter(
+            ModelVersion.model_id == model_id)),
+        ("list versions", db.query(ModelVersion).filter(
+            ModelVersion.model_id == model_id).order_by(ModelVersion.version_number.desc())),
+        ("active version of model", db.query(ModelVersion).filter(
+            ModelVersion.model_id == model_id, ModelVersion.is_active == True)),
+        ("version artifacts by type", db.query(Artifact).filter(
+            Artifact.version_id == version_id, Artifact.type.in_(["dataset", "label"]))),
+        ("dedup lookup by checksum", db.query(Artifact).filter(
+            Artifact.checksum.in_(checksums), Artifact.type == "dataset")),
+        ("dashboard active versions", db.query(func.count(ModelVersion.id))
+            .join(Model, ModelVersion.model_id == Model.id)
+            .filter(ModelVersion.is_active == True, Model.factory_id == factory_id)),
+        ("dashboard latest deployment", db.query(ModelVersion)
+            .filter(ModelVersion.is_active == True)
+            .order_by(desc(ModelVersion.updated_at)).limit(1)),
+        ("dashboard factory storage", db.query(func.sum(Artifact.size))
+            .join(ModelVersion, Artifact.version_id == ModelVersion.id)
+            .join(Model, ModelVersion.model_id == Model.id)
+            .filter(Model.factory_id == factory_id)),
+    ]
+
+
+def explain(conn, sql: str) -> str:
+    if engine.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}").fetchall()
+        return "\n".join(r[0] for r in rows)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return "\n".join(r[-1] for r in rows)
+
+
+def measure(conn, sql: str, runs: int) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        conn.exec_driver_sql(sql).fetchall()
+    return (time.perf_counter() - started) / runs * 1000
+
+
+def run(runs: int):
+    db = SessionLocal()
+    try:
+        compiled = [
+            (label, str(q.statement.compile(engine, compile_kwargs={"literal_binds": True})))
+            for label, q in queries(db)
+        ]
+    finally:
+        db.close()
+
+    results = {}
+    for phase in ("before", "after"):
+        with engine.connect() as conn:
+            trans = conn.begin()
+            if phase == "before":
+                for name, *_ in hot_path_indexes.INDEXES:
+                    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+            for label, sql in compiled:
+                results.setdefault(label, {})[phase] = (explain(conn, sql), measure(conn, sql, runs))
+            trans.rollback()
+        if phase == "before":
+            # pysqlite commits DDL immediately, so the rollback alone may not restore them
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                hot_path_indexes.upgrade(conn)
+            engine.dispose()  # drop pooled connections holding statements prepared without the indexes
+
+    for label, phases in results.items():
+        print("=" * 72)
+        print(label)
+        for phase in ("before", "after"):
+            plan, ms = phases[phase]
+            print(f"--- {phase}: {ms:.3f} ms")
+            print(plan)
+    print("=" * 72)
+    print(f"{'query':32} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for label, phases in results.items():
+        before, after = phases["before"][1], phases["after"][1]
+        print(f"{label:32} {before:10.3f} {after:10.3f} {before / max(after, 1e-6):7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="executions per query and phase")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic versions to create in an empty database")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    if args.seed:
+        db = SessionLocal()
+        try:
+            seed(db, args.seed)
+        finally:
+            db.close()
+    run(args.runs)
+
+
+if __name__ == "__main__":
+    main()
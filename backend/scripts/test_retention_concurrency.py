@@ -0,0 +1,122 @@
+"""
+Overlapping retention prunes must release each blob reference once.
+
+Builds a model whose versions share artifact checksums, attaches a keep-last-1
+policy and runs two prune_versions() at the same time (plus a stale
+delete_versions() batch), then checks every blob's ref_count against the
+artifacts still pointing at it.
+
+    DATABASE_URL=... python scripts/test_retention_concurrency.py
+"""
+import sys
+import threading
+import unittest
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func
+
+from app.database import Base, SessionLocal, engine
+from app.migrations import run_migrations
+from app.models import Algorithm, Artifact, Blob, Factory, Model, ModelVersion, RetentionPolicy
+from app.services.blob_gc import retain_artifacts
+from app.services.retention import delete_versions, prune_versions
+
+VERSIONS = 6
+SHARED = ["shared-a", "shared-b"]
+
+
+class TestRetentionConcurrency(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+
+    def setUp(self):
+        self.db = SessionLocal()
+        tag = uuid.uuid4().hex[:8]
+        self.checksums = [f"{c}-{tag}" for c in SHARED]
+        factory = Factory(name=f"retention-factory-{tag}")
+        algorithm = Algorithm(name=f"retention-algorithm-{tag}")
+        self.db.add_all([factory, algorithm])
+        self.db.flush()
+        model = Model(name=f"retention-model-{tag}", factory_id=factory.id, algorithm_id=algorithm.id)
+        self.db.add(model)
+        self.db.flush()
+        artifacts = []
+        for number in range(1, VERSIONS + 1):
+            version = ModelVersion(model_id=model.id, version_number=number, is_active=number == VERSIONS, tags=[])
+            self.db.add(version)
+            self.db.flush()
+            for checksum in self.checksums:
+                artifacts.append(Artifact(
+                    version_id=version.id, name=checksum, type="dataset",
+                    path=f"/tmp/{checksum}", size=1, checksum=checksum,
+                ))
+        self.db.add_all(artifacts)
+        retain_artifacts(self.db, artifacts)
+        self.db.add(RetentionPolicy(model_id=model.id, keep_last=1, keep_tagged=False))
+        self.db.commit()
+        self.factory_id, self.algorithm_id, self.model_id = factory.id, algorithm.id, model.id
+
+    def tearDown(self):
+        self.db.rollback()
+        self.db.query(Factory).filter(Factory.id == self.factory_id).delete()
+        self.db.query(Algorithm).filter(Algorithm.id == self.algorithm_id).delete()
+        self.db.query(Blob).filter(Blob.checksum.in_(self.checksums)).delete(synchronize_session=False)
+        self.db.commit()
+        self.db.close()
+
+    def assert_ref_counts(self):
+        self.db.expire_all()
+        counts = dict(
+            self.db.query(Artifact.checksum, func.count(Artifact.id))
+            .filter(Artifact.checksum.in_(self.checksums))
+            .group_by(Artifact.checksum)
+        )
+        for checksum, ref_count in self.db.query(Blob.checksum, Blob.ref_count).filter(Blob.checksum.in_(self.checksums)):
+            self.assertEqual(ref_count, counts.get(checksum, 0), checksum)
+
+    def test_overlapping_prunes(self):
+        stale = [
+            vid for (vid,) in
+            self.db.query(ModelVersion.id).filter(ModelVersion.model_id == self.model_id, ModelVersion.is_active == False)
+        ]
+        self.db.rollback()
+
+        start = threading.Barrier(2)
+        reports, errors = [], []
+
+        def run():
+            start.wait()
+            try:
+                reports.append(prune_versions())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # SQLite serializes writers, so a prune can lose on a lock timeout; what
+        # matters is that no reference was released twice.
+        self.assertTrue(reports, errors)
+        self.assertEqual(
+            self.db.query(ModelVersion).filter(ModelVersion.model_id == self.model_id).count(), 1,
+        )
+        self.assert_ref_counts()
+
+        # A batch computed before the prunes ran deletes and releases nothing
+        self.assertEqual(delete_versions(self.db, stale), 0)
+        self.db.commit()
+        self.assert_ref_counts()
+        for _, ref_count in self.db.query(Blob.checksum, Blob.ref_count).filter(Blob.checksum.in_(self.checksums)):
+            self.assertEqual(ref_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,6 +27,12 @@ interface UploadTask {
     dismissed?: boolean;
 }
 
+interface UploadParams {
+    max_files: number;
+    max_bytes: number;
+    concurrency: number;
+}
+
 interface BackgroundUploaderContextType {
     queueUpload: (
         factoryId: number,
@@ -63,8 +69,12 @@ export const BackgroundUploaderProvider: React.FC<{ children: React.ReactNode }>
     const activeTaskIds = useRef<Set<string>>(new Set());
     const cancelledVersionsRef = useRef<Set<number>>(new Set());
 
-    // Chunk size for batched uploads (optimized for browser main-thread responsiveness)
-    const CHUNK_SIZE = 500;
+    // Fallback chunk limits if the server can't be asked (the server adapts these to its measured ingest rate)
+    const DEFAULT_UPLOAD_PARAMS: UploadParams = {
+        max_files: 500,
+        max_bytes: 50 * 1024 * 1024, // 50MB
+        concurrency: 2
+    };
 
     // Keep tasksRef up to date with latest tasks state
     useEffect(() => {
@@ -171,40 +181,45 @@ export const BackgroundUploaderProvider: React.FC<{ children: React.ReactNode }>
                 const totalFiles = task.files.length;
                 let uploadedCount = 0;
 
-                const MAX_CHUNK_SIZE_BYTES = 50 * 1024 * 1024; // 50MB
-                const chunks: File[][] = [];
-                let currentChunk: File[] = [];
-                let currentChunkSize = 0;
-
-                for (const file of task.files) {
-                    // If adding this file exceeds max size (and we already have files), push current chunk
-                    if (currentChunk.length > 0 && (currentChunk.length >= CHUNK_SIZE || currentChunkSize + file.size > MAX_CHUNK_SIZE_BYTES)) {
-                        chunks.push(currentChunk);
-                        currentChunk = [];
-                        currentChunkSize = 0;
-                    }
-                    currentChunk.push(file);
-                    currentChunkSize += file.size;
-                }
-                if (currentChunk.length > 0) {
-                    chunks.push(currentChunk);
+                // Server-advertised limits, refreshed from every chunk response
+                let params: UploadParams = DEFAULT_UPLOAD_PARAMS;
+                try {
+                    const res = await axios.get('/algorithms/uploads/params');
+                    params = { ...DEFAULT_UPLOAD_PARAMS, ...res.data };
+                } catch {
+                    // Keep defaults
                 }
 
-                // Concurrency control: process up to 2 chunks in parallel to prevent CPU/network choke
-                const CONCURRENCY_LIMIT = 2;
-                let currentChunkIdx = 0;
+                // Chunks are cut lazily so each one uses the latest limits
+                let nextFileIdx = 0;
+                const takeNextChunk = (): File[] => {
+                    const chunk: File[] = [];
+                    let chunkSize = 0;
+                    while (nextFileIdx < totalFiles) {
+                        const file = task.files[nextFileIdx];
+                        // Always take at least one file, even if it alone exceeds max_bytes
+                        if (chunk.length > 0 && (chunk.length >= params.max_files || chunkSize + file.size > params.max_bytes)) {
+                            break;
+                        }
+                        chunk.push(file);
+                        chunkSize += file.size;
+                        nextFileIdx++;
+                    }
+                    return chunk;
+                };
+
+                // Concurrency control: the server lowers this when its DB pool is busy
                 const activeRequests = new Set<Promise<void>>();
 
-                while (currentChunkIdx < chunks.length || activeRequests.size > 0) {
+                while (nextFileIdx < totalFiles || activeRequests.size > 0) {
                     // STOP if version was cancelled mid-upload
                     if (task.context === 'version' && task.versionId && cancelledVersionsRef.current.has(task.versionId)) {
                         throw new Error("Upload cancelled: Version deleted");
                     }
 
                     // Fill up the active requests until limit or no more chunks
-                    while (activeRequests.size < CONCURRENCY_LIMIT && currentChunkIdx < chunks.length) {
-                        const chunkIdx = currentChunkIdx++;
-                        const chunk = chunks[chunkIdx];
+                    while (activeRequests.size < params.concurrency && nextFileIdx < totalFiles) {
+                        const chunk = takeNextChunk();
 
                         const uploadPromise = (async () => {
                             let url = '';
@@ -222,7 +237,10 @@ export const BackgroundUploaderProvider: React.FC<{ children: React.ReactNode }>
                                 formData.append("files", f, filename);
                             });
 
-                            await axios.post(url, formData, { timeout: 300000 });
+                            const res = await axios.post(url, formData, { timeout: 300000 });
+                            if (res.data?.upload_params) {
+                                params = { ...params, ...res.data.upload_params };
+                            }
 
                             // Update shared state safely
                             uploadedCount += chunk.length;